@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+import argparse
+import copy
+import glob
+import importlib
+import json
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from compact_replay import EXTENSION, CompactReplay, read_json_replay
+
+REPLAY_DIR = "games"                        # directory with '*.json', '*.html' or compact replays
+AGENT = "Alpha"                             # Alpha, Beta or KoreBeta
+BASELINE_FILE = "benchmark_baseline.json"
+NUM_SLOWEST_TURNS = 10
+PERCENTILES = (50, 95, 99)
+# a tail latency is flagged if it is this much worse than the baseline
+MAX_REGRESSION = 0.1
+MIN_REGRESSION_MS = 5
+
+
+def load_replay(file_name):
+    if file_name.endswith(EXTENSION):
+        return CompactReplay(file_name)
+
+    return read_json_replay(file_name)
+
+
+def seat_observations(env, seat):
+    """
+    the observation of every step the seat is active in
+    """
+    if isinstance(env, CompactReplay):
+        for i in range(len(env) - 1):
+            if env.statuses(i)[seat] != "ACTIVE":
+                break
+            yield env.observation(i, seat)
+        return
+
+    steps = env["steps"]
+    for i in range(len(steps) - 1):
+        if steps[i][seat]["status"] != "ACTIVE":
+            break
+        obs = copy.deepcopy(steps[i][0]["observation"])
+        obs["player"] = seat
+        obs["remainingOverageTime"] = steps[i][seat]["observation"]["remainingOverageTime"]
+        yield obs
+
+
+def make_agent(name):
+    """
+    a fresh agent with its own state and the timer of the agent package, if there is one
+    """
+    package = f"src.{name}"
+    logger = importlib.import_module(f"{package}.logger")
+    logger.LOGGING_ENABLED = False
+
+    try:
+        timer = importlib.import_module(f"{package}.timing").timer
+        timer.enabled = True
+    except ModuleNotFoundError:
+        timer = None
+
+    try:
+        agent = importlib.import_module(f"{package}.multi").make_agent()
+    except ModuleNotFoundError:
+        # main.py keeps the state in globals, reloading the module resets it
+        agent = importlib.reload(importlib.import_module(f"{package}.main")).agent
+    return agent, timer
+
+
+def run_seat(agent_name, env, seat):
+    """
+    feeds every step of the replay to the agent playing the seat,
+    returns step -> turn time and phase -> step -> phase time
+    """
+    agent, timer = make_agent(agent_name)
+    if timer:
+        timer.reset()
+
+    conf = env.configuration if isinstance(env, CompactReplay) else env["configuration"]
+    turn_times = {}
+    for obs in seat_observations(env, seat):
+        t = time.perf_counter()
+        agent(obs, conf)
+        turn_times[obs["step"]] = time.perf_counter() - t
+
+    phase_times = defaultdict(dict)
+    if timer:
+        for row in timer.records():
+            if row["kind"] == "phase":
+                phase_times[row["name"]][row["step"]] = row["value"]
+    return turn_times, phase_times
+
+
+def distribution(seconds):
+    ms = 1000 * np.array(seconds)
+    stats = {f"p{p}": float(np.percentile(ms, p)) for p in PERCENTILES}
+    stats["max"] = float(ms.max())
+    stats["turns"] = len(ms)
+    return stats
+
+
+def run(replay_dir, agent_name):
+    files = sorted(sum([glob.glob(os.path.join(replay_dir, f"*{x}")) for x in (".json", ".html", EXTENSION)], []))
+    if not files:
+        raise FileNotFoundError(f"No replays in `{replay_dir}`.")
+
+    turns = []
+    phases = defaultdict(list)
+    for file_name in files:
+        env = load_replay(file_name)
+        num_agents = env.num_agents if isinstance(env, CompactReplay) else len(env["steps"][0])
+        for seat in range(num_agents):
+            t = time.perf_counter()
+            turn_times, phase_times = run_seat(agent_name, env, seat)
+            for step, seconds in turn_times.items():
+                turns.append((seconds, file_name, seat, step))
+            for name, step_to_time in phase_times.items():
+                phases[name] += step_to_time.values()
+            print(f"{file_name} seat={seat}: {len(turn_times)} turns in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+
+    return {
+        "agent": agent_name,
+        "replays": len(files),
+        "turn": distribution([x[0] for x in turns]),
+        "phases": {name: distribution(times) for name, times in phases.items()},
+        "peak_memory_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "slowest_turns": [
+            {"ms": 1000 * seconds, "replay": file_name, "seat": seat, "step": step}
+            for seconds, file_name, seat, step in sorted(turns, reverse=True)[:NUM_SLOWEST_TURNS]
+        ],
+    }
+
+
+def find_regressions(report, baseline):
+    """
+    tail latencies that are noticeably worse than in the baseline:
+    p95 and p99 of the turns and the phases, and the slowest turn
+    (the max of a single phase is too noisy to compare)
+    """
+    tail_keys = [f"p{p}" for p in PERCENTILES if p >= 95]
+    pairs = [("turn", report["turn"], baseline.get("turn", {}), tail_keys + ["max"])]
+    for name, stats in report["phases"].items():
+        pairs.append((name, stats, baseline.get("phases", {}).get(name, {}), tail_keys))
+
+    regressions = []
+    for name, stats, base, keys in pairs:
+        for key in keys:
+            if key not in base:
+                continue
+            diff = stats[key] - base[key]
+            if diff > MIN_REGRESSION_MS and diff > MAX_REGRESSION * base[key]:
+                regressions.append(f"{name} {key}: {base[key]:.1f} -> {stats[key]:.1f} ms")
+    return regressions
+
+
+def print_report(report):
+    keys = [f"p{p}" for p in PERCENTILES] + ["max"]
+    print(f"{report['agent']}: {report['replays']} replays, peak memory {report['peak_memory_mb']:.0f} MB")
+    print(f"{'':<28}{'turns':>7}" + "".join(f"{k + ' ms':>10}" for k in keys))
+    rows = [("turn", report["turn"])] + sorted(report["phases"].items(), key=lambda x: -x[1]["max"])
+    for name, stats in rows:
+        print(f"{name:<28}{stats['turns']:>7}" + "".join(f"{stats[k]:>10.1f}" for k in keys))
+
+    print("slowest turns:")
+    for x in report["slowest_turns"]:
+        print(f"  {x['ms']:>8.1f} ms  step {x['step']:>3}  seat {x['seat']}  {x['replay']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-turn and per-phase latency of an agent over saved replays.")
+    parser.add_argument("replay_dir", nargs="?", default=REPLAY_DIR)
+    parser.add_argument("--agent", default=AGENT, choices=["Alpha", "Beta", "KoreBeta"])
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    args = parser.parse_args()
+
+    report = run(args.replay_dir, args.agent)
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline)
+        if regressions:
+            print("Tail latency regressions against the baseline:")
+            for x in regressions:
+                print(f"  {x}")
+            sys.exit(1)
+        print("No tail latency regressions against the baseline")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from numpy.lib.format import descr_to_dtype, dtype_to_descr
+
+from engine import ACTIVE, DONE, ERROR, INVALID, TIMEOUT, round3
+
+EXTENSION = ".kreplay"
+MAGIC = b"KOREREPLAY1\n"
+# the arrays start at multiples of this in the file
+ALIGNMENT = 64
+# the kore of the cells is kept in float32 and rounded to the 3 decimals of the game when loaded,
+# it differs from the replay by the float noise of the mining or, where a destroyed fleet
+# dropped its kore, by less than 0.0005
+CELL_KORE_DTYPE = np.float32
+STATUSES = [ACTIVE, DONE, ERROR, INVALID, TIMEOUT]
+
+PLAYER_DTYPE = [("kore", "f8"), ("reward", "f8"), ("status", "u1"), ("remaining_overage_time", "f8")]
+
+
+def read_json_replay(file_name: str) -> Dict[str, Any]:
+    """
+    the environment of a '*.json' or '*.html' replay
+    """
+    with open(file_name, "r") as f:
+        text = f.read()
+    if file_name.endswith(".html"):
+        start = "window.kaggle = "
+        end = "window.kaggle.renderer = "
+        text = text[text.find(start) + len(start):text.find(end) - 4]
+    r = json.loads(text)
+    return r.get("environment", r)
+
+
+def _max_length(strings) -> int:
+    return max([len(x) for x in strings] + [1])
+
+
+def _table_dtypes(steps: List[List[Dict[str, Any]]]) -> Dict[str, np.dtype]:
+    """
+    the fixed-width records of the shipyards, the fleets and the actions,
+    the strings are as wide as the longest one of the replay
+    """
+    uids, plans, actions = [], [], []
+    for state in steps:
+        for _, shipyards, fleets in state[0]["observation"]["players"]:
+            uids += shipyards.keys()
+            uids += fleets.keys()
+            plans += [x[4] for x in fleets.values()]
+        for x in state:
+            if x["action"]:
+                uids += x["action"].keys()
+                actions += x["action"].values()
+
+    uid = f"S{_max_length(uids)}"
+    return {
+        "shipyards": np.dtype([
+            ("player", "u1"), ("uid", uid), ("position", "i2"), ("ship_count", "i4"), ("turns_controlled", "i4")
+        ]),
+        "fleets": np.dtype([
+            ("player", "u1"), ("uid", uid), ("position", "i2"), ("kore", "f8"), ("ship_count", "i4"),
+            ("direction", "u1"), ("flight_plan", f"S{_max_length(plans)}")
+        ]),
+        "actions": np.dtype([("player", "u1"), ("uid", uid), ("action", f"S{_max_length(actions)}")]),
+    }
+
+
+def convert(replay: Dict[str, Any], file_name: str):
+    """
+    writes the environment of a replay in the compact format:
+    a json header and the arrays, the rows of the tables of step t are offsets[t]:offsets[t + 1]
+    """
+    steps = replay["steps"]
+    num_steps, num_agents = len(steps), len(steps[0])
+    dtypes = _table_dtypes(steps)
+
+    kore = np.array([x[0]["observation"]["kore"] for x in steps], dtype=CELL_KORE_DTYPE)
+    players = np.zeros((num_steps, num_agents), dtype=PLAYER_DTYPE)
+    rows = {name: [] for name in dtypes}
+    offsets = np.zeros((num_steps + 1, len(dtypes)), dtype=np.int64)
+    for t, state in enumerate(steps):
+        for i, x in enumerate(state):
+            obs = x["observation"]
+            players[t, i] = (
+                state[0]["observation"]["players"][i][0],
+                math.nan if x["reward"] is None else x["reward"],
+                STATUSES.index(x["status"]),
+                obs.get("remainingOverageTime", math.nan),
+            )
+            for uid, action in (x["action"] or {}).items():
+                rows["actions"].append((i, uid, action))
+            _, shipyards, fleets = state[0]["observation"]["players"][i]
+            for uid, (position, ship_count, turns_controlled) in shipyards.items():
+                rows["shipyards"].append((i, uid, position, ship_count, turns_controlled))
+            for uid, (position, fleet_kore, ship_count, direction, plan) in fleets.items():
+                rows["fleets"].append((i, uid, position, fleet_kore, ship_count, direction, plan))
+        offsets[t + 1] = [len(x) for x in rows.values()]
+
+    arrays = {"kore": kore, "players": players, "offsets": offsets}
+    for name, dtype in dtypes.items():
+        arrays[name] = np.array(rows[name], dtype=dtype)
+
+    header = {
+        "configuration": replay["configuration"],
+        "table_names": list(dtypes),
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        header["arrays"][name] = {"dtype": dtype_to_descr(array.dtype), "shape": array.shape, "offset": offset}
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header).encode()
+    start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+    with open(file_name, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(start + header["arrays"][name]["offset"])
+            f.write(array.tobytes())
+
+
+class CompactReplay:
+    """
+    A replay in the compact format, the file is memory-mapped and only the rows
+    of the requested step are read.
+    """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        with open(file_name, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"`{file_name}` is not a compact replay.")
+            header_length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_length))
+        start = -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * ALIGNMENT
+
+        self.configuration = header["configuration"]
+        self._arrays = {}
+        for name, x in header["arrays"].items():
+            dtype = descr_to_dtype(x["dtype"])
+            shape = tuple(x["shape"])
+            if 0 in shape:
+                self._arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                self._arrays[name] = np.memmap(file_name, dtype=dtype, mode="r", offset=start + x["offset"], shape=shape)
+        self._table_index = {name: i for i, name in enumerate(header["table_names"])}
+
+    def __len__(self) -> int:
+        return len(self._arrays["kore"])
+
+    @property
+    def num_agents(self) -> int:
+        return self._arrays["players"].shape[1]
+
+    def _rows(self, name: str, step: int) -> np.ndarray:
+        i = self._table_index[name]
+        start, end = self._arrays["offsets"][step:step + 2, i]
+        return self._arrays[name][start:end]
+
+    def statuses(self, step: int) -> List[str]:
+        return [STATUSES[x] for x in self._arrays["players"][step]["status"].tolist()]
+
+    def rewards(self, step: int) -> List[Optional[float]]:
+        return [None if math.isnan(x) else x for x in self._arrays["players"][step]["reward"].tolist()]
+
+    def remaining_overage_time(self, step: int) -> List[float]:
+        return self._arrays["players"][step]["remaining_overage_time"].tolist()
+
+    def actions(self, step: int) -> List[Dict[str, str]]:
+        """
+        player -> shipyard uid -> the action that led to the step
+        """
+        actions = [{} for _ in range(self.num_agents)]
+        for player, uid, action in self._rows("actions", step).tolist():
+            actions[player][uid.decode()] = action.decode()
+        return actions
+
+    def observation(self, step: int, player: Optional[int] = None) -> Dict[str, Any]:
+        """
+        the observation of the step as in the replay, for the player if it is given
+        """
+        kore = round3(self._arrays["kore"][step].astype(float)).tolist()
+        players = [[x, {}, {}] for x in self._arrays["players"][step]["kore"].tolist()]
+        for i, uid, position, ship_count, turns_controlled in self._rows("shipyards", step).tolist():
+            players[i][1][uid.decode()] = [position, ship_count, turns_controlled]
+        for i, uid, position, fleet_kore, ship_count, direction, plan in self._rows("fleets", step).tolist():
+            players[i][2][uid.decode()] = [position, fleet_kore, ship_count, direction, plan.decode()]
+
+        obs = {"kore": kore, "players": players, "step": step}
+        if player is not None:
+            obs["player"] = player
+            obs["remainingOverageTime"] = self.remaining_overage_time(step)[player]
+        return obs
+
+
+def convert_files(file_names: List[str], out_dir: Optional[str] = None):
+    for file_name in file_names:
+        t = time.perf_counter()
+        replay = read_json_replay(file_name)
+        out = os.path.splitext(file_name)[0] + EXTENSION
+        if out_dir is not None:
+            out = os.path.join(out_dir, os.path.basename(out))
+        convert(replay, out)
+        print(
+            f"{file_name} -> {out}: {os.path.getsize(file_name) / 1e6:.1f} MB -> {os.path.getsize(out) / 1e6:.1f} MB "
+            f"in {time.perf_counter() - t:.1f}s",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Converts '*.json' and '*.html' replays to '*{EXTENSION}' replays.")
+    parser.add_argument("replays", nargs="+", help="replay files or directories")
+    parser.add_argument("--out-dir", default=None, help="next to the replays by default")
+    args = parser.parse_args()
+
+    files = []
+    for x in args.replays:
+        if os.path.isdir(x):
+            files += sorted(glob.glob(os.path.join(x, "*.json")) + glob.glob(os.path.join(x, "*.html")))
+        else:
+            files.append(x)
+    convert_files(files, args.out_dir)
@@ -0,0 +1,887 @@
+#!/usr/bin/env python
+
+import argparse
+import contextlib
+import copy
+import math
+import os
+import random
+import sys
+import time
+import traceback
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.Alpha.basic import collection_rate_for_ship_count, max_flight_plan_len_for_ship_count
+from src.Alpha.geometry import Field, North, East, South, West
+
+DEFAULT_CONFIGURATION = {
+    "episodeSteps": 400,
+    "actTimeout": 3,
+    "runTimeout": 9600,
+    "startingKore": 2750,
+    "size": 21,
+    "spawnCost": 10.0,
+    "convertCost": 50,
+    "regenRate": 0.02,
+    "maxRegenCellKore": 500,
+    "agentTimeout": 60,
+}
+# the kore of every player and the reward at the start of the game
+STARTING_KORE = 500
+REMAINING_OVERAGE_TIME = 60
+
+ACTIVE = "ACTIVE"
+DONE = "DONE"
+ERROR = "ERROR"
+INVALID = "INVALID"
+TIMEOUT = "TIMEOUT"
+
+# in the order of the game ids
+DIRECTIONS = [North, East, South, West]
+CHAR_TO_DIRECTION = {x.command: x.game_id for x in DIRECTIONS}
+SPAWN = "SPAWN"
+LAUNCH = "LAUNCH"
+
+# the output of the agents goes nowhere, like in kaggle_environments without debug
+_DEVNULL = open(os.devnull, "w")
+
+# turns controlled -> the max number of ships a shipyard can spawn
+_SPAWN_VALUES = list(np.cumsum([i ** 2 + 1 for i in range(1, 10)]))
+
+
+def max_spawn(turns_controlled: int) -> int:
+    for i, target in enumerate(_SPAWN_VALUES):
+        if turns_controlled < target:
+            return i + 1
+    return len(_SPAWN_VALUES) + 1
+
+
+def round3(values: np.ndarray) -> np.ndarray:
+    """
+    round(x, 3) of python for every value, the same as the kaggle interpreter does on floats,
+    np.round differs when x * 1000 is close to a half
+    """
+    scaled = values * 1000
+    out = np.rint(scaled) / 1000
+    is_close = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if is_close.any():
+        out[is_close] = [round(x, 3) for x in values[is_close].tolist()]
+    return out
+
+
+class Observation(dict):
+    """
+    a dict with attribute access, what the agents get from kaggle_environments
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class ShipyardAction:
+    def __init__(self, action_type: str, num_ships: int, flight_plan: Optional[str] = None):
+        self.action_type = action_type
+        self.num_ships = num_ships
+        self.flight_plan = flight_plan
+
+    @staticmethod
+    def from_str(raw: Optional[str]) -> Optional["ShipyardAction"]:
+        """
+        the same parsing and the same checks as ShipyardAction.from_str of kaggle_environments,
+        an action it fails on raises an error here as well
+        """
+        if not raw:
+            return None
+        if raw.startswith(SPAWN):
+            num_ships = int(raw.split("_")[1])
+            if num_ships < 0:
+                raise ValueError(f"Invalid action `{raw}`: must be a non-negative number")
+            return ShipyardAction(SPAWN, num_ships)
+        if raw.startswith(LAUNCH):
+            _, ship_str, flight_plan = raw.split("_")
+            num_ships = int(ship_str)
+            flight_plan = flight_plan.upper()
+            if num_ships <= 0:
+                raise ValueError(f"Invalid action `{raw}`: must be a positive number_ships")
+            if not flight_plan or flight_plan[0] not in CHAR_TO_DIRECTION:
+                raise ValueError(f"Invalid action `{raw}`: flight_plan must start with a valid direction NESW")
+            if any(c not in "NESWC0123456789" for c in flight_plan):
+                raise ValueError(f"Invalid action `{raw}`: flight_plan can only contain NESWC0-9")
+            return ShipyardAction(LAUNCH, num_ships, flight_plan)
+        return None
+
+
+class EngineFleet:
+    __slots__ = ("game_id", "player_id", "position", "kore", "ship_count", "direction", "flight_plan")
+
+    def __init__(self, game_id, player_id, position, kore, ship_count, direction, flight_plan):
+        self.game_id = game_id
+        self.player_id = player_id
+        self.position = position
+        self.kore = kore
+        self.ship_count = ship_count
+        self.direction = direction
+        self.flight_plan = flight_plan
+
+    def less_than_other_allied_fleet(self, other: "EngineFleet") -> bool:
+        if self.ship_count != other.ship_count:
+            return self.ship_count < other.ship_count
+        if self.kore != other.kore:
+            return self.kore < other.kore
+        return self.direction > other.direction
+
+    def observation(self) -> list:
+        return [self.position, self.kore, self.ship_count, self.direction, self.flight_plan]
+
+
+class EngineShipyard:
+    __slots__ = ("game_id", "player_id", "position", "ship_count", "turns_controlled")
+
+    def __init__(self, game_id, player_id, position, ship_count, turns_controlled):
+        self.game_id = game_id
+        self.player_id = player_id
+        self.position = position
+        self.ship_count = ship_count
+        self.turns_controlled = turns_controlled
+
+    def observation(self) -> list:
+        return [self.position, self.ship_count, self.turns_controlled]
+
+
+class EnginePlayer:
+    __slots__ = ("game_id", "kore", "shipyards", "fleets")
+
+    def __init__(self, game_id: int, kore: float):
+        self.game_id = game_id
+        self.kore = kore
+        # game id -> object, in the order of the observation
+        self.shipyards: Dict[str, EngineShipyard] = {}
+        self.fleets: Dict[str, EngineFleet] = {}
+
+    def observation(self) -> list:
+        return [
+            self.kore,
+            {k: x.observation() for k, x in self.shipyards.items()},
+            {k: x.observation() for k, x in self.fleets.items()},
+        ]
+
+
+class KoreEngine:
+    """
+    A headless kore_fleets environment, the same rules as the interpreter of kaggle_environments
+    (Board.next there) and the same observations, statuses and rewards as Environment.step.
+
+    The kore of the board and the occupied cells are arrays indexed by the position,
+    fleets and shipyards are kept in the order of the observation because the order
+    decides ties and the order of float additions in the interpreter.
+    Positions are the ones of the game: row * size + column.
+    """
+
+    def __init__(
+        self,
+        configuration: Optional[Dict[str, Any]] = None,
+        num_agents: int = 2,
+        state: Optional[List[Dict[str, Any]]] = None,
+        debug: bool = False,
+    ):
+        self.configuration = Observation({**DEFAULT_CONFIGURATION, **(configuration or {})})
+        self.debug = debug
+        size = self.configuration["size"]
+        self._size = size
+
+        field = Field(size)
+        # direction -> position -> the next position
+        self._next_position = [
+            [field.get_point_by_id(i).apply(d).game_id for i in range(size * size)] for d in DIRECTIONS
+        ]
+
+        if state is None:
+            self.reset(num_agents, self.configuration.get("randomSeed"))
+        else:
+            self._set_state(state)
+
+    def reset(self, num_agents: int = 2, random_seed: Optional[int] = None):
+        """
+        a new game on the map of the seed, or on a random map
+        """
+        self.configuration["randomSeed"] = random_seed
+        self.statuses = [ACTIVE] * num_agents
+        self.rewards = [STARTING_KORE] * num_agents
+        self.remaining_overage_time = [REMAINING_OVERAGE_TIME] * num_agents
+        self._set_observation(self._initial_observation(num_agents))
+        self.steps = [self._record_state([{}] * num_agents)]
+        # step -> agent -> seconds the agent took to act, None if it did not act
+        self.durations = []
+
+    def _set_state(self, state: List[Dict[str, Any]]):
+        """
+        continues from a step of a replay, state is the list of the agent states of the step
+        """
+        self.statuses = [x["status"] for x in state]
+        self.rewards = [x["reward"] for x in state]
+        self.remaining_overage_time = [x["observation"]["remainingOverageTime"] for x in state]
+        self._set_observation(state[0]["observation"])
+        self.steps = [self._record_state([x["action"] for x in state])]
+        self.durations = []
+
+    @property
+    def num_agents(self) -> int:
+        return len(self.statuses)
+
+    @property
+    def done(self) -> bool:
+        return all(x != ACTIVE for x in self.statuses)
+
+    def _initial_observation(self, num_agents: int) -> Dict[str, Any]:
+        """
+        the map of populate_board of kaggle_environments, the same for the same random seed,
+        the global random generators are seeded the same way
+        """
+        config = self.configuration
+        size = config["size"]
+        if config.get("randomSeed") is None:
+            config["randomSeed"] = random.randrange((1 << 31) - 1)
+
+        np.random.seed(config["randomSeed"])
+        random.seed(config["randomSeed"])
+
+        half = math.ceil(size / 2)
+        grid = [[0] * half for _ in range(half)]
+        for i in range(half):
+            grid[random.randint(0, half - 1)][random.randint(0, half - 1)] = i ** 2
+            grid[random.randint(half // 2, half - 1)][random.randint(half // 2, half - 1)] = i ** 2
+
+        radius_grid = copy.deepcopy(grid)
+        for r in range(half):
+            for c in range(half):
+                value = grid[r][c]
+                if value == 0:
+                    continue
+                radius = min(round((value / half) ** 0.5), 1)
+                for r2 in range(r - radius + 1, r + radius):
+                    for c2 in range(c - radius + 1, c + radius):
+                        if 0 <= r2 < half and 0 <= c2 < half:
+                            distance = (abs(r2 - r) ** 2 + abs(c2 - c) ** 2) ** 0.5
+                            radius_grid[r2][c2] += int(value / max(1, distance) ** distance)
+
+        radius_grid = np.asarray(radius_grid)
+        add_grid = np.random.gumbel(0, 300.0, size=(half, half)).astype(int)
+        sparse_radius_grid = np.random.binomial(1, 0.5, size=(half, half))
+        add_grid = np.clip(add_grid, 0, a_max=None) * sparse_radius_grid
+        radius_grid += add_grid
+
+        corner_grid = np.random.gumbel(0, 500.0, size=(half // 4, half // 4)).astype(int)
+        corner_grid = np.clip(corner_grid, 0, a_max=None)
+        radius_grid[half - (half // 4):, half - (half // 4):] += corner_grid
+
+        for i in range(half):
+            for j in range(half):
+                if i + j < half:
+                    radius_grid[i][j] = radius_grid[j][i]
+
+        total = sum([sum(row) for row in radius_grid])
+        kore = [0] * (size ** 2)
+        for r, row in enumerate(radius_grid):
+            for c, val in enumerate(row):
+                val = int(val * config["startingKore"] / total / 4)
+                kore[size * r + c] = val
+                kore[size * r + (size - c - 1)] = val
+                kore[size * (size - 1) - (size * r) + c] = val
+                kore[size * (size - 1) - (size * r) + (size - c - 1)] = val
+
+        if num_agents == 1:
+            starting_positions = [size * (size // 2) + size // 2]
+        elif num_agents == 2:
+            starting_positions = [
+                size * (size // 2 - size // 4) + size // 4,
+                size * (size // 2 + size // 4) + math.ceil(3 * size / 4) - 1,
+            ]
+        elif num_agents == 4:
+            starting_positions = [
+                size * (size // 4 + 1) + size // 4 - 1,
+                size * (size // 4 - 1) + 3 * size // 4 - 1,
+                size * (3 * size // 4 + 1) + size // 4 + 1,
+                size * (3 * size // 4 - 1) + 3 * size // 4 + 1,
+            ]
+        else:
+            raise ValueError(f"{num_agents} is not a valid number of agents.")
+
+        for pos in starting_positions:
+            kore[pos] = 0
+
+        players = [
+            [STARTING_KORE, {f"0-{i + 1}": [pos, 0, 0]}, {}] for i, pos in enumerate(starting_positions)
+        ]
+        return {"kore": kore, "players": players, "step": 0}
+
+    def _set_observation(self, obs: Dict[str, Any]):
+        n = self._size ** 2
+        self.step_number = obs["step"]
+        self._kore = np.array(obs["kore"], dtype=float)
+        self._players: List[EnginePlayer] = []
+        for player_id, (kore, shipyards, fleets) in enumerate(obs["players"]):
+            player = EnginePlayer(player_id, kore)
+            for k, (position, kore, ship_count, direction, flight_plan) in fleets.items():
+                player.fleets[k] = EngineFleet(k, player_id, position, kore, ship_count, direction, flight_plan)
+            for k, (position, ship_count, turns_controlled) in shipyards.items():
+                player.shipyards[k] = EngineShipyard(k, player_id, position, ship_count, turns_controlled)
+            self._players.append(player)
+
+        # position -> shipyard, the kore is cleared under the shipyards
+        self._shipyard_at: List[Optional[EngineShipyard]] = [None] * n
+        for player in self._players:
+            for shipyard in player.shipyards.values():
+                self._shipyard_at[shipyard.position] = shipyard
+                self._kore[shipyard.position] = 0
+
+    def shared_observation(self) -> Dict[str, Any]:
+        return {
+            "kore": self._kore.tolist(),
+            "players": [x.observation() for x in self._players],
+            "step": self.step_number,
+        }
+
+    def observation(self, player_id: int) -> Observation:
+        """
+        what the agent of the player gets
+        """
+        obs = Observation(self.shared_observation())
+        obs["player"] = player_id
+        obs["remainingOverageTime"] = self.remaining_overage_time[player_id]
+        return obs
+
+    def _record_state(self, actions: List[Optional[Dict[str, str]]]) -> List[Dict[str, Any]]:
+        """
+        the agent states of the step in the format of the replays,
+        only the first agent has the shared part of the observation
+        """
+        state = []
+        for i in range(self.num_agents):
+            obs = {"remainingOverageTime": self.remaining_overage_time[i], "player": i}
+            if i == 0:
+                obs.update(self.shared_observation())
+            state.append({
+                "action": actions[i],
+                "reward": self.rewards[i],
+                "info": {},
+                "observation": obs,
+                "status": self.statuses[i],
+            })
+        return state
+
+    def step(self, actions: List[Any], durations: Optional[List[Optional[float]]] = None):
+        """
+        applies the actions of the agents, like Environment.step,
+        an active agent whose action is not a dict is INVALID
+        and the agents that are not active have no action
+        """
+        if self.done:
+            raise RuntimeError("The game is over.")
+        if len(actions) != self.num_agents:
+            raise ValueError(f"{self.num_agents} actions required.")
+
+        for i, x in enumerate(actions):
+            if self.statuses[i] == ACTIVE and not isinstance(x, dict):
+                self.fail(i, INVALID)
+        actions = [x if status == ACTIVE else None for x, status in zip(actions, self.statuses)]
+
+        self._next(actions)
+        self._update_statuses()
+
+        self.durations.append(list(durations) if durations else [None] * self.num_agents)
+        if durations:
+            act_timeout = self.configuration["actTimeout"]
+            for i, duration in enumerate(durations):
+                if duration is not None:
+                    self.remaining_overage_time[i] -= max(0, duration - act_timeout)
+
+        if self.step_number >= self.configuration["episodeSteps"] - 1:
+            self.statuses = [DONE if x == ACTIVE else x for x in self.statuses]
+
+        self.steps.append(self._record_state(actions))
+
+    def fail(self, player_id: int, status: str):
+        """
+        the agent of the player failed to act, it is marked before the step like Environment.step does
+        """
+        self.statuses[player_id] = status
+
+    def _update_statuses(self):
+        """
+        the end of the interpreter: eliminated players, the end of the game and the rewards
+        """
+        config = self.configuration
+        for i, player in enumerate(self._players):
+            status = self.statuses[i]
+            if status == ACTIVE and not player.shipyards and not player.fleets:
+                self.statuses[i] = DONE
+                self.rewards[i] = self.step_number - config["episodeSteps"] - 1
+            if self.statuses[i] not in (ACTIVE, DONE):
+                self._remove_player(player)
+
+        if self.num_agents > 1 and sum(1 for x in self.statuses if x == ACTIVE) < 2:
+            self.statuses = [DONE if x == ACTIVE else x for x in self.statuses]
+
+        for i, player in enumerate(self._players):
+            if self.statuses[i] == ACTIVE:
+                self.rewards[i] = player.kore
+            elif self.statuses[i] != DONE:
+                self.rewards[i] = None
+
+    def _remove_player(self, player: EnginePlayer):
+        for shipyard in player.shipyards.values():
+            if self._shipyard_at[shipyard.position] is shipyard:
+                self._shipyard_at[shipyard.position] = None
+        player.kore = 0
+        player.shipyards = {}
+        player.fleets = {}
+
+    def _next(self, actions: List[Optional[Dict[str, str]]]):
+        """
+        Board.next of kaggle_environments
+        """
+        config = self.configuration
+        convert_cost = config["convertCost"]
+        spawn_cost = config["spawnCost"]
+        next_position = self._next_position
+        kore = self._kore
+        players = self._players
+        shipyard_at = self._shipyard_at
+        step = self.step_number
+        uid_counter = 0
+
+        def create_uid():
+            nonlocal uid_counter
+            uid_counter += 1
+            return f"{step + 1}-{uid_counter}"
+
+        # all fleets and shipyards in the order of the interpreter
+        fleets: Dict[str, EngineFleet] = {}
+        shipyards: Dict[str, EngineShipyard] = {}
+        for player in players:
+            fleets.update(player.fleets)
+            shipyards.update(player.shipyards)
+
+        def add_fleet(fleet: EngineFleet):
+            players[fleet.player_id].fleets[fleet.game_id] = fleet
+            fleets[fleet.game_id] = fleet
+
+        def delete_fleet(fleet: EngineFleet):
+            del players[fleet.player_id].fleets[fleet.game_id]
+            del fleets[fleet.game_id]
+            if fleet_at[fleet.position] is fleet:
+                fleet_at[fleet.position] = None
+
+        def add_shipyard(shipyard: EngineShipyard):
+            players[shipyard.player_id].shipyards[shipyard.game_id] = shipyard
+            shipyards[shipyard.game_id] = shipyard
+            shipyard_at[shipyard.position] = shipyard
+            kore[shipyard.position] = 0
+
+        def delete_shipyard(shipyard: EngineShipyard):
+            del players[shipyard.player_id].shipyards[shipyard.game_id]
+            del shipyards[shipyard.game_id]
+            if shipyard_at[shipyard.position] is shipyard:
+                shipyard_at[shipyard.position] = None
+
+        # position -> fleet, only the fleets that survived the collisions are marked
+        fleet_at: List[Optional[EngineFleet]] = [None] * len(kore)
+
+        for player in players:
+            player_actions = actions[player.game_id] or {}
+            for shipyard in player.shipyards.values():
+                action = ShipyardAction.from_str(player_actions.get(shipyard.game_id))
+                if action is None or action.num_ships == 0:
+                    continue
+                num_ships = action.num_ships
+                if action.action_type == SPAWN:
+                    if player.kore >= spawn_cost * num_ships and num_ships <= max_spawn(shipyard.turns_controlled):
+                        player.kore -= spawn_cost * num_ships
+                        shipyard.ship_count += num_ships
+                elif shipyard.ship_count >= num_ships:
+                    flight_plan = action.flight_plan
+                    shipyard.ship_count -= num_ships
+                    direction = CHAR_TO_DIRECTION[flight_plan[0]]
+                    max_flight_plan_len = max_flight_plan_len_for_ship_count(num_ships)
+                    if len(flight_plan) > max_flight_plan_len:
+                        flight_plan = flight_plan[:max_flight_plan_len]
+                    add_fleet(EngineFleet(
+                        create_uid(), player.game_id, shipyard.position, 0, num_ships, direction, flight_plan
+                    ))
+
+            for shipyard in player.shipyards.values():
+                shipyard.turns_controlled += 1
+
+            for fleet in list(player.fleets.values()):
+                flight_plan = fleet.flight_plan.lstrip("0")
+                if flight_plan and flight_plan[0] == "C" and fleet.ship_count >= convert_cost \
+                        and shipyard_at[fleet.position] is None:
+                    player.kore += fleet.kore
+                    kore[fleet.position] = 0
+                    add_shipyard(EngineShipyard(
+                        create_uid(), player.game_id, fleet.position, fleet.ship_count - convert_cost, 0
+                    ))
+                    delete_fleet(fleet)
+                    continue
+
+                # couldn't build, the convert is skipped
+                flight_plan = flight_plan.lstrip("C")
+
+                if flight_plan and flight_plan[0].isalpha():
+                    fleet.direction = CHAR_TO_DIRECTION[flight_plan[0]]
+                    flight_plan = flight_plan[1:]
+                elif flight_plan:
+                    i = 0
+                    while i < len(flight_plan) and flight_plan[i].isdigit():
+                        i += 1
+                    num_steps = int(flight_plan[:i]) - 1
+                    flight_plan = (str(num_steps) if num_steps > 0 else "") + flight_plan[i:]
+                fleet.flight_plan = flight_plan
+                fleet.position = next_position[fleet.direction][fleet.position]
+
+            # allied fleets in the same position are combined
+            position_to_fleets = defaultdict(list)
+            for fleet in player.fleets.values():
+                position_to_fleets[fleet.position].append(fleet)
+            for group in position_to_fleets.values():
+                if len(group) < 2:
+                    continue
+                group.sort(key=lambda x: (x.ship_count, x.kore, -x.direction), reverse=True)
+                winner = group[0]
+                for fleet in group[1:]:
+                    if winner.less_than_other_allied_fleet(fleet):
+                        winner, fleet = fleet, winner
+                    winner.kore += fleet.kore
+                    winner.ship_count += fleet.ship_count
+                    delete_fleet(fleet)
+
+            assert player.kore >= 0
+
+        # fleet to fleet collisions
+        position_to_fleets = defaultdict(list)
+        for fleet in fleets.values():
+            position_to_fleets[fleet.position].append(fleet)
+        for position, group in position_to_fleets.items():
+            if len(group) == 1:
+                fleet_at[position] = group[0]
+                continue
+
+            most_ships = max(x.ship_count for x in group)
+            largest = [x for x in group if x.ship_count == most_ships]
+            if len(largest) == 1:
+                winner = largest[0]
+                deleted = [x for x in group if x is not winner]
+                fleet_at[position] = winner
+                winner.ship_count -= max(x.ship_count for x in deleted)
+            else:
+                winner = None
+                deleted = group
+
+            shipyard = shipyard_at[position]
+            for fleet in deleted:
+                delete_fleet(fleet)
+                if winner is not None:
+                    winner.kore += fleet.kore
+                elif shipyard is not None:
+                    players[shipyard.player_id].kore += fleet.kore
+                else:
+                    kore[position] += fleet.kore
+
+        # fleet to shipyard collisions
+        for shipyard in list(shipyards.values()):
+            fleet = fleet_at[shipyard.position]
+            if fleet is None or fleet.player_id == shipyard.player_id:
+                continue
+            if fleet.ship_count > shipyard.ship_count:
+                delete_shipyard(shipyard)
+                add_shipyard(EngineShipyard(
+                    create_uid(), fleet.player_id, shipyard.position, fleet.ship_count - shipyard.ship_count, 1
+                ))
+                players[fleet.player_id].kore += fleet.kore
+            else:
+                shipyard.ship_count -= fleet.ship_count
+                players[shipyard.player_id].kore += fleet.kore
+            delete_fleet(fleet)
+
+        # allied fleets deposit kore and ships into shipyards
+        for shipyard in list(shipyards.values()):
+            fleet = fleet_at[shipyard.position]
+            if fleet is not None and fleet.player_id == shipyard.player_id:
+                players[shipyard.player_id].kore += fleet.kore
+                shipyard.ship_count += fleet.ship_count
+                delete_fleet(fleet)
+
+        # fleet to fleet damage on all orthogonally adjacent cells
+        incoming_fleet_dmg: Dict[str, Dict[str, int]] = {}
+        for fleet in fleets.values():
+            for positions in next_position:
+                other = fleet_at[positions[fleet.position]]
+                if other is not None and other.player_id != fleet.player_id:
+                    incoming_fleet_dmg.setdefault(other.game_id, {})[fleet.game_id] = fleet.ship_count
+
+        # half of the kore of killed fleets goes to the cell, the other half to the attackers
+        to_distribute: Dict[str, Dict[int, float]] = {}
+        for fleet_id, fleet_dmg in incoming_fleet_dmg.items():
+            fleet = fleets[fleet_id]
+            damage = sum(fleet_dmg.values())
+            if damage >= fleet.ship_count:
+                kore[fleet.position] += fleet.kore / 2
+                to_split = fleet.kore / 2
+                for attacker_id, dmg in fleet_dmg.items():
+                    to_distribute.setdefault(attacker_id, {})[fleet.position] = to_split * dmg / damage
+                delete_fleet(fleet)
+            else:
+                fleet.ship_count -= damage
+
+        for fleet_id, position_to_kore in to_distribute.items():
+            fleet = fleets.get(fleet_id)
+            if fleet is not None:
+                fleet.kore += sum(position_to_kore.values())
+            else:
+                for position, x in position_to_kore.items():
+                    kore[position] += x
+
+        # mining
+        if fleets:
+            fleet_list = list(fleets.values())
+            positions = np.array([x.position for x in fleet_list], dtype=int)
+            rates = np.array([collection_rate_for_ship_count(x.ship_count) for x in fleet_list])
+            deltas = round3(kore[positions] * np.minimum(rates, 0.99))
+            for fleet, delta in zip(fleet_list, deltas.tolist()):
+                if delta > 0:
+                    fleet.kore += delta
+            is_mined = deltas > 0
+            kore[positions[is_mined]] -= deltas[is_mined]
+
+        # regeneration
+        is_free = np.array([x is None for x in fleet_at], dtype=bool)
+        is_free &= np.array([x is None for x in shipyard_at], dtype=bool)
+        is_free &= kore < config["maxRegenCellKore"]
+        kore[is_free] = round3(kore[is_free] * (1 + config["regenRate"]))
+
+        self.step_number += 1
+
+    def run(self, agents: List[Callable]) -> List[List[Dict[str, Any]]]:
+        """
+        plays the game to the end, like Environment.run,
+        agent(obs, conf) returns the dict of the shipyard actions
+        """
+        start = time.perf_counter()
+        while not self.done and time.perf_counter() - start < self.configuration["runTimeout"]:
+            actions = []
+            durations = []
+            for i, agent in enumerate(agents):
+                if self.statuses[i] != ACTIVE:
+                    actions.append(None)
+                    durations.append(None)
+                    continue
+                action, duration = self._act(i, agent)
+                actions.append(action)
+                durations.append(duration)
+            self.step(actions, durations)
+        return self.steps
+
+    def _act(self, player_id: int, agent: Callable):
+        """
+        the action of the agent and how long it took, the output of the agent is dropped unless debugging
+        """
+        obs = self.observation(player_id)
+        conf = Observation(self.configuration)
+        t = time.perf_counter()
+        try:
+            if self.debug:
+                action = agent(obs, conf)
+            else:
+                with contextlib.redirect_stdout(_DEVNULL), contextlib.redirect_stderr(_DEVNULL):
+                    action = agent(obs, conf)
+        except KeyboardInterrupt:
+            raise
+        except BaseException:
+            # exit() of an agent is its error too, like in the subprocess of kaggle_environments
+            if self.debug:
+                traceback.print_exc()
+            action = None
+            self.fail(player_id, ERROR)
+        duration = time.perf_counter() - t
+
+        if duration - self.configuration["actTimeout"] > self.remaining_overage_time[player_id]:
+            action = None
+            self.fail(player_id, TIMEOUT)
+        return action, duration
+
+    def toJSON(self) -> Dict[str, Any]:
+        """
+        the replay in the format of Environment.toJSON
+        """
+        return {
+            "name": "kore_fleets",
+            "configuration": dict(self.configuration),
+            "steps": self.steps,
+            "rewards": list(self.rewards),
+            "statuses": list(self.statuses),
+        }
+
+
+def run_match(agents: List[Callable], configuration: Optional[Dict[str, Any]] = None, debug: bool = False) -> KoreEngine:
+    engine = KoreEngine(configuration, len(agents), debug=debug)
+    engine.run(agents)
+    return engine
+
+
+def render_html(engine: KoreEngine) -> str:
+    """
+    the replay of the game in the html player of kaggle_environments
+    """
+    from kaggle_environments import make
+
+    env = make("kore_fleets", configuration=dict(engine.configuration), steps=engine.steps)
+    return env.render(mode="html")
+
+
+def validate_replay(replay: Dict[str, Any], max_errors: int = 10) -> List[str]:
+    """
+    every step of the replay is played from the recorded state before it with the recorded actions,
+    returns the differences, the remaining overage time is not compared
+    """
+    configuration = replay["configuration"]
+    steps = replay["steps"]
+    errors = []
+
+    if configuration.get("randomSeed") is not None:
+        engine = KoreEngine(configuration, len(steps[0]))
+        obs = engine.shared_observation()
+        if obs != {k: steps[0][0]["observation"][k] for k in obs}:
+            errors.append("step 0: the map differs")
+
+    for t in range(1, len(steps)):
+        engine = KoreEngine(configuration, state=steps[t - 1])
+        for i, x in enumerate(steps[t]):
+            if x["status"] in (ERROR, INVALID, TIMEOUT) and engine.statuses[i] == ACTIVE:
+                engine.fail(i, x["status"])
+        engine.step([x["action"] for x in steps[t]])
+        errors += [f"step {t}: {x}" for x in _state_differences(engine.steps[-1], steps[t])]
+        if len(errors) >= max_errors:
+            break
+    return errors
+
+
+def validate_agent_failure(exit_step: int = 5) -> List[str]:
+    """
+    an agent that calls exit() during the game fails with ERROR and no reward and the game still finishes,
+    returns the differences
+    """
+
+    def failing_agent(obs, conf):
+        if obs["step"] == exit_step:
+            exit()
+        return {}
+
+    def idle_agent(obs, conf):
+        return {}
+
+    engine = run_match([failing_agent, idle_agent])
+    errors = []
+    if not engine.done:
+        errors.append("the game did not finish")
+    if engine.statuses != [ERROR, DONE]:
+        errors.append(f"statuses {engine.statuses} != {[ERROR, DONE]}")
+    if engine.rewards[0] is not None:
+        errors.append(f"reward {engine.rewards[0]} of the failed agent != None")
+    if len(engine.steps) - 1 != exit_step + 1:
+        errors.append(f"{len(engine.steps) - 1} steps != {exit_step + 1}")
+    return errors
+
+
+def _state_differences(state: List[Dict[str, Any]], expected: List[Dict[str, Any]]) -> List[str]:
+    differences = []
+    for i, (x, y) in enumerate(zip(state, expected)):
+        for key in ("status", "reward"):
+            if x[key] != y[key]:
+                differences.append(f"agent {i} {key} {x[key]} != {y[key]}")
+
+    obs, expected_obs = state[0]["observation"], expected[0]["observation"]
+    if obs["step"] != expected_obs["step"]:
+        differences.append(f"step {obs['step']} != {expected_obs['step']}")
+    cells = [i for i, (a, b) in enumerate(zip(obs["kore"], expected_obs["kore"])) if a != b]
+    if cells:
+        differences.append(f"kore differs at {len(cells)} cells, first {cells[0]}")
+    for i, (a, b) in enumerate(zip(obs["players"], expected_obs["players"])):
+        if a != b:
+            differences.append(f"player {i} {a} != {b}")
+    return differences
+
+
+def _replay_agent(replay: Dict[str, Any], player_id: int) -> Callable:
+    """
+    the agent that repeats the recorded actions of the player
+    """
+    steps = replay["steps"]
+
+    def agent(obs, conf):
+        return steps[obs["step"] + 1][player_id]["action"] or {}
+
+    return agent
+
+
+def _benchmark(replay: Dict[str, Any]):
+    """
+    steps per second of kaggle_environments and of the engine with the recorded actions
+    """
+    from kaggle_environments import make
+
+    num_agents = len(replay["steps"][0])
+    configuration = dict(replay["configuration"])
+
+    env = make("kore_fleets", configuration=configuration)
+    t = time.perf_counter()
+    env.run([_replay_agent(replay, i) for i in range(num_agents)])
+    kaggle_time = time.perf_counter() - t
+
+    engine = KoreEngine(configuration, num_agents)
+    t = time.perf_counter()
+    engine.run([_replay_agent(replay, i) for i in range(num_agents)])
+    engine_time = time.perf_counter() - t
+
+    num_steps = len(engine.steps) - 1
+    same = engine.rewards == [x["reward"] for x in env.steps[-1]]
+    print(
+        f"{num_steps} steps: kaggle_environments {num_steps / kaggle_time:.0f} steps/s, "
+        f"engine {num_steps / engine_time:.0f} steps/s, same rewards: {same}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Checks the headless engine against replays of kaggle_environments step by step."
+    )
+    parser.add_argument("replays", nargs="*", help="'*.json' or '*.html' replays")
+    parser.add_argument("--benchmark", action="store_true", help="also compare the speed with kaggle_environments")
+    parser.add_argument("--agent-failure", action="store_true", help="also check an agent that exits mid-game")
+    args = parser.parse_args()
+
+    # compact_replay imports the engine
+    from compact_replay import read_json_replay
+
+    num_failed = 0
+    if args.agent_failure:
+        errors = validate_agent_failure()
+        print(f"agent failure: {'OK' if not errors else 'FAILED'}")
+        for x in errors:
+            print(f"  {x}")
+        num_failed += bool(errors)
+    for file_name in args.replays:
+        replay = read_json_replay(file_name)
+        errors = validate_replay(replay)
+        print(f"{file_name}: {len(replay['steps']) - 1} steps, {'OK' if not errors else 'FAILED'}")
+        for x in errors:
+            print(f"  {x}")
+        num_failed += bool(errors)
+        if args.benchmark:
+            _benchmark(replay)
+    sys.exit(1 if num_failed else 0)
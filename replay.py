@@ -1,33 +1,28 @@
 #!/usr/bin/env python
 
-import json
 import cProfile
 import pstats
 from pstats import SortKey
 from src.Alpha.main import agent
+from compact_replay import EXTENSION, CompactReplay, read_json_replay
 
 FROM, TO = 273, 280    # Replay steps range
 PLAYER = 0                 # Player number
-FILE="games/42197321.json"          # replay file name, can be '*.json' or '*.html'
+FILE="games/42197321.json"          # replay file name, can be '*.json', '*.html' or '*.kreplay'
 
-with open(FILE, "r") as cin:
-    f = cin.read()
+if FILE.endswith(EXTENSION):
+    # only the steps in the range are read
+    replay = CompactReplay(FILE)
+    conf = replay.configuration
+    get_observation = replay.observation
+else:
+    env = read_json_replay(FILE)
 
-if FILE.endswith('.html'):
-    start = 'window.kaggle = '
-    end = 'window.kaggle.renderer = '
-    n_start = f.find(start) + len(start)
-    n_end = f.find(end) - 4
-    f = f[n_start:n_end]
-
-r = json.loads(f)
-
-env = r.get('environment', r)
-
-conf = env['configuration']
+    conf = env['configuration']
+    get_observation = lambda step: env['steps'][step][0]['observation']
 
 for step in range(FROM-1, TO):
-    obs = env['steps'][step][0]['observation']
+    obs = get_observation(step)
     # print(obs)
     obs["player"] = PLAYER
 
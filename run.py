@@ -6,13 +6,12 @@ from src.KoreBeta.main import agent as KoreBeta
 from src.Miner.main import agent as Miner
 
 from datetime import datetime
-from kaggle_environments import make
+from engine import run_match, render_html
 
-env = make("kore_fleets")
-env.run([Alpha, Beta])
+game = run_match([Alpha, Beta])
 
 now = datetime.now()
 file_name = now.strftime("games/game_%m-%d_%H:%M:%S.html")
-game_out = env.render(mode="html")
+game_out = render_html(game)
 with open(file_name, "w") as f:
     f.write(game_out)
@@ -1,8 +1,9 @@
 import itertools
+import math
 import numpy as np
 import os
 import time
-from typing import Dict, List, Union, Optional, Generator
+from typing import Dict, List, Set, Tuple, Union, Optional, Generator
 from collections import defaultdict
 from kaggle_environments.envs.kore_fleets.helpers import Configuration
 
@@ -30,9 +31,19 @@ if IS_KAGGLE:
         PlanPath,
         PlanRoute,
         GAME_ID_TO_ACTION,
+        COMMAND_TO_ACTION,
         get_opposite_action,
     )
     from logger import logger
+    from risk import BoardRisk
+    from occupancy import OccupancyIndex, route_cells
+    from catalogue import RouteCatalogue, get_route_catalogue
+    from forecast import KoreForecast
+    from kore_index import KoreIndex
+    from timing import timer
+    from scheduler import TurnScheduler
+    from economy import EconomyTimeline
+    from nearest import NearestShipyards
 else:
     from .basic import (
         Obj,
@@ -53,9 +64,19 @@ else:
         PlanPath,
         PlanRoute,
         GAME_ID_TO_ACTION,
+        COMMAND_TO_ACTION,
         get_opposite_action,
     )
     from .logger import logger
+    from .risk import BoardRisk
+    from .occupancy import OccupancyIndex, route_cells
+    from .catalogue import RouteCatalogue, get_route_catalogue
+    from .forecast import KoreForecast
+    from .kore_index import KoreIndex
+    from .timing import timer
+    from .scheduler import TurnScheduler
+    from .economy import EconomyTimeline
+    from .nearest import NearestShipyards
 
 # <--->
 
@@ -138,14 +159,21 @@ class HailMary(DoNothing):
 class BoardPath:
     max_length = 32
 
-    def __init__(self, start: "Point", plan: PlanPath):
+    def __init__(self, start: "Point", plan: PlanPath, track: Optional[List["Point"]] = None):
         assert plan.num_steps > 0 or plan.direction == Convert
 
         self._plan = plan
 
+        if track is not None:
+            self._track = track
+            self._start = start
+            self._end = track[-1]
+            self._build_shipyard = False
+            return
+
         field = start.field
         x, y = start.x, start.y
-        if np.isfinite(plan.num_steps):
+        if math.isfinite(plan.num_steps):
             n = plan.num_steps + 1
         else:
             n = self.max_length
@@ -158,12 +186,14 @@ class BoardPath:
             self._build_shipyard = True
             return
 
-        if action in (North, South):
-            track = field.get_column(x, start=y, size=n * action.dy)
+        if n - 1 <= RouteCatalogue.ray_length:
+            track = get_route_catalogue(field).track(start, action, n - 1)
+        elif action in (North, South):
+            track = field.get_column(x, start=y, size=n * action.dy)[1:]
         else:
-            track = field.get_row(y, start=x, size=n * action.dx)
+            track = field.get_row(y, start=x, size=n * action.dx)[1:]
 
-        self._track = track[1:]
+        self._track = track
         self._start = start
         self._end = track[-1]
         self._build_shipyard = False
@@ -193,12 +223,22 @@ class BoardPath:
 
 
 class BoardRoute:
-    def __init__(self, start: "Point", plan: "PlanRoute", start_time: int = 0):
-        paths = []
-        for p in plan.paths:
-            path = BoardPath(start, p)
-            start = path.end
-            paths.append(path)
+    def __init__(
+        self,
+        start: "Point",
+        plan: "PlanRoute",
+        start_time: int = 0,
+        paths: Optional[List[BoardPath]] = None,
+    ):
+        if timer.enabled:
+            timer.count("board_routes")
+
+        if paths is None:
+            paths = []
+            for p in plan.paths:
+                path = BoardPath(start, p)
+                start = path.end
+                paths.append(path)
 
         self._plan = plan
         self._paths = paths
@@ -252,6 +292,30 @@ class BoardRoute:
     def command_length(self) -> int:
         return len(self.command())
 
+    def advance(self) -> Optional["BoardRoute"]:
+        """
+        the same route one step later, only the first path is rebuilt
+        """
+        first_path = self._paths[0]
+        plan = first_path.plan
+        if plan.direction == Convert:
+            return None
+
+        paths = self._paths[1:]
+        if plan.num_steps > 1:
+            start = first_path.points[0]
+            paths = [BoardPath(start, PlanPath(plan.direction, plan.num_steps - 1))] + paths
+
+        if not paths:
+            return None
+
+        return BoardRoute(
+            paths[0].start,
+            PlanRoute([x.plan for x in paths]),
+            start_time=self._start_time,
+            paths=paths,
+        )
+
     def first_action(self):
         return self.paths[0].plan.direction
 
@@ -259,48 +323,10 @@ class BoardRoute:
         return self.paths[-1].plan.direction
 
     def expected_kore(self, board: "Board", ship_count: int):
-        rate = collection_rate_for_ship_count(ship_count)
-        if rate <= 0:
-            return 0
-
-        point_to_time = {}
-        point_to_kore = {}
-        for t, p in enumerate(self):
-            point_to_time[p] = t + self._start_time
-            point_to_kore[p] = p.kore
-
-        for f in board.fleets:
-            for t, p in enumerate(f.route):
-                if p in point_to_time and t < point_to_time[p]:
-                    point_to_kore[p] *= (1 - f.collection_rate)
-
-        res = 0
-        for p in self:
-            res += point_to_kore[p] * rate
-            point_to_kore[p] *= (1 - rate)
-        return res
+        return board.kore_forecast.expected_kore(self, ship_count)
 
     def expected_kore_mining(self, board: "Board", ship_count: int):
-        rate = collection_rate_for_ship_count(ship_count)
-        if rate <= 0:
-            return 0
-
-        point_to_time = {}
-        point_to_kore = {}
-        for t, p in enumerate(self):
-            point_to_time[p] = t + self._start_time
-            point_to_kore[p] = p.kore
-
-        for f in board.fleets:
-            for t, p in enumerate(f.route):
-                if p in point_to_time and t < point_to_time[p]:
-                    point_to_kore[p] *= (1 - f.collection_rate)
-
-        res = 0
-        for p in self:
-            res += point_to_kore[p]
-            point_to_kore[p] *= (1 - rate)
-        return res
+        return board.kore_forecast.expected_kore(self, ship_count, mining=True)
 
 
 class MiningRoute(BoardRoute):
@@ -338,8 +364,8 @@ class PositionObj(Obj):
         if len(obj) == 0:
             return []
         if isinstance(obj[0], Point):
-            return self._point.get_plans_through(obj)
-        return self._point.get_plans_through([o.point for o in obj])
+            return self._board.catalogue.plans_through(self._point, obj)
+        return self._board.catalogue.plans_through(self._point, [o.point for o in obj])
 
     def distance_from(self, obj: Union["PositionObj", Point]) -> int:
         if isinstance(obj, Point):
@@ -421,36 +447,8 @@ class Shipyard(PositionObj):
         return fleets
 
     @cached_property
-    def future_ship_count(self):
-        player = self.player
-        board = self.board
-
-        time_to_fleet_kore = defaultdict(int)
-        for sh in player.all_shipyards:
-            for f in sh.incoming_allied_fleets:
-                time_to_fleet_kore[f.eta] += f.expected_kore()
-
-        shipyard_reinforcements = defaultdict(int)
-        for f in self.incoming_allied_fleets:
-            shipyard_reinforcements[f.eta] += f.ship_count
-        for f in self.incoming_hostile_fleets:
-            shipyard_reinforcements[f.eta] -= f.ship_count
-
-        spawn_cost = board.spawn_cost
-        player_kore = player.kore
-        ship_count = self.ship_count
-        ship_counts = []
-        for t in range(0, board.size + 1):
-            ship_count += shipyard_reinforcements[t]
-            ship_counts.append(ship_count)
-            player_kore += time_to_fleet_kore[t]
-
-            can_spawn = max_ships_to_spawn(self.turns_controlled + t)
-            spawn_count = min(int(player_kore // spawn_cost), can_spawn)
-            player_kore -= spawn_count * spawn_cost
-            ship_count += spawn_count
-
-        return ship_counts
+    def future_ship_count(self) -> List[int]:
+        return self.player.economy.future_ship_count(self)
 
     def estimate_shipyard_power(self, time):
         if time < 0:
@@ -469,7 +467,7 @@ class Shipyard(PositionObj):
     def can_launch_to_at_time(self, point: Point, time: int) -> bool:
         if self._blocked_dirs_at_time is None:
             self._blocked_dirs_at_time = self._get_blocked_dirs_at_time()
-        plans = self.point.get_plans_through([point])
+        plans = self.board.catalogue.plans_through(self.point, [point])
         for p in plans:
             if len(p.paths) == 0:
                 continue
@@ -486,34 +484,7 @@ class Shipyard(PositionObj):
     # Assumes an idle turn if it can't spawn and it didn't just get a fleet
     @cached_property
     def idle_turns(self) -> List[int]:
-        player = self.player
-        board = self.board
-
-        time_to_fleet_kore = defaultdict(int)
-        for sh in player.all_shipyards:
-            for f in sh.incoming_allied_fleets:
-                time_to_fleet_kore[f.eta] += f.expected_kore()
-
-        shipyard_reinforcements = defaultdict(int)
-        for f in self.incoming_allied_fleets:
-            shipyard_reinforcements[f.eta] += f.ship_count
-
-        idle_count = 0
-        spawn_cost = board.spawn_cost
-        player_kore = player.kore
-        idle_turns = [idle_count]
-        for t in range(1, 2 * board.size + 1):
-            player_kore += time_to_fleet_kore[t]
-
-            can_spawn = max_ships_to_spawn(self.turns_controlled + t)
-            spawn_count = min(int(player_kore // spawn_cost), can_spawn)
-            if shipyard_reinforcements[t] == 0 and spawn_count == 0:
-                idle_count += 1
-
-            player_kore -= spawn_count * spawn_cost
-            idle_turns.append(idle_count)
-
-        return idle_turns
+        return self.player.economy.idle_turns(self)
 
     def get_idle_turns_before(self, turn: int) -> int:
         if turn < 0:
@@ -562,42 +533,8 @@ class FutureShipyard(PositionObj):
         return fleets
 
     @cached_property
-    def future_ship_count(self):
-        player = self.player
-        board = self.board
-
-        time_to_fleet_kore = defaultdict(int)
-        for sh in player.all_shipyards:
-            for f in sh.incoming_allied_fleets:
-                time_to_fleet_kore[f.eta] += f.expected_kore()
-
-        shipyard_reinforcements = defaultdict(int)
-        for f in self.incoming_allied_fleets:
-            # FutureShipyard considers its own fleet as incoming
-            if f.game_id != self.game_id:
-                shipyard_reinforcements[f.eta] += f.ship_count
-        for f in self.incoming_hostile_fleets:
-            shipyard_reinforcements[f.eta] -= f.ship_count
-
-        spawn_cost = board.spawn_cost
-        player_kore = player.kore
-        ship_count = self.ship_count
-        ship_counts = []
-        for t in range(0, board.size + 1):
-            if t < self.time_to_build:
-                ship_counts.append(0)
-                continue
-
-            ship_count += shipyard_reinforcements[t]
-            ship_counts.append(ship_count)
-            player_kore += time_to_fleet_kore[t]
- 
-            can_spawn = max_ships_to_spawn(t + self.turns_controlled)
-            spawn_count = min(int(player_kore // spawn_cost), can_spawn)
-            player_kore -= spawn_count * spawn_cost
-            ship_count += spawn_count
-
-        return ship_counts
+    def future_ship_count(self) -> List[int]:
+        return self.player.economy.future_ship_count(self)
 
     def estimate_shipyard_power(self, time):
         if time < 0:
@@ -722,6 +659,265 @@ class FleetPointer:
     def build_shipyard(self):
         return self._build_shipyard
 
+
+class FleetSimulator:
+    """
+    Moves all fleets along their routes and stops them when they
+    reach a shipyard, join an allied fleet, lose a collision or die from adjacent damage,
+    the same rules as in the FleetPointer loop.
+
+    Fleets are kept as parallel arrays. When a fleet reaches a shipyard is known in advance,
+    so only the steps where fleets can meet each other or a fleet converts are simulated.
+    Ship counts don't change during the simulation.
+    The tracks of the routes can be passed if they are already known.
+    """
+
+    def __init__(
+        self,
+        field: Field,
+        fleets: List[Fleet],
+        shipyard_points: Set[Point],
+        tracks: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ):
+        self._field = field
+        self._fleets = fleets
+
+        size = field.size
+        num_fleets = len(fleets)
+
+        self._path_lengths = [[len(x) for x in f.route.paths] for f in fleets]
+        if tracks is None:
+            tracks = route_cells([f.route for f in fleets], size)
+        self._tracks, self._lengths = tracks
+        self._max_time = self._tracks.shape[1]
+        self._adjacent_cells = field.tables.adjacent_cells()
+
+        self._start = np.array([f.point.x * size + f.point.y for f in fleets], dtype=int)
+        self._player = np.array([f.player_id for f in fleets], dtype=int)
+        self._ship_count = np.array([f.ship_count for f in fleets], dtype=int)
+        self._build_shipyard = np.array([f.route.last_action() == Convert for f in fleets], dtype=bool)
+
+        # the same order as sorted(fleets), ties are resolved by the position in the list
+        order = sorted(
+            range(num_fleets),
+            key=lambda i: (fleets[i].ship_count, fleets[i].kore, fleets[i].direction.game_id, i),
+        )
+        self._rank = np.empty(num_fleets, dtype=int)
+        self._rank[order] = np.arange(num_fleets)
+        self._by_rank = np.array(order, dtype=int)
+
+        self._shipyards = np.zeros(size * size, dtype=bool)
+        for p in shipyard_points:
+            self._shipyards[p.x * size + p.y] = True
+
+        self._shipyard_times = self._times_to_reach(self._shipyards, 1)
+        self._stop_times = np.full(num_fleets, self._max_time + 1, dtype=int)
+        self._leader = np.full(num_fleets, -1, dtype=int)
+        self._converted = np.zeros(num_fleets, dtype=bool)
+
+        self._simulate()
+
+    def _times_to_reach(self, cells: np.ndarray, start_time: int) -> np.ndarray:
+        """
+        the first time >= start_time when the fleet is on one of the cells
+        """
+        tracks = self._tracks[:, start_time - 1:]
+        is_reached = cells[tracks] & (tracks >= 0)
+        return np.where(
+            is_reached.any(axis=1), is_reached.argmax(axis=1) + start_time, self._max_time + 1
+        )
+
+    def _event_times(self) -> np.ndarray:
+        """
+        times when fleets can meet each other or a fleet converts
+        """
+        size = self._field.size
+        n = size ** 2
+        num_fleets, max_time = len(self._fleets), self._max_time
+
+        events = np.zeros(max_time + 1, dtype=bool)
+        is_converting = self._build_shipyard & (self._shipyard_times > self._lengths)
+        events[self._lengths[is_converting] + 1] = True
+
+        if num_fleets < 2:
+            return events
+
+        # fleets don't meet anyone on a shipyard
+        steps = np.arange(1, max_time)
+        is_flying = (steps <= self._lengths[:, None]) & (steps < self._shipyard_times[:, None])
+        times = np.broadcast_to(steps, is_flying.shape)[is_flying]
+        cells = self._tracks[:, :-1][is_flying]
+        players = np.broadcast_to(self._player[:, None], is_flying.shape)[is_flying]
+
+        # player -> time -> cell -> number of fleets
+        num_players = self._player.max() + 1
+        counts = np.bincount(
+            (players * max_time + times) * n + cells, minlength=num_players * max_time * n
+        ).reshape((num_players, max_time, n))
+        total_counts = counts.sum(axis=0)
+        events[:max_time] |= (total_counts > 1).any(axis=1)
+
+        adjacent_cells = self._adjacent_cells[cells]
+        enemy_counts = (
+            total_counts[times[:, None], adjacent_cells]
+            - counts[players[:, None], times[:, None], adjacent_cells]
+        )
+        events[times[(enemy_counts > 0).any(axis=1)]] = True
+
+        return events
+
+    def _winners(self, fleets: np.ndarray, groups: np.ndarray, num_groups: int) -> np.ndarray:
+        """
+        the strongest fleet of the group for every fleet
+        """
+        best = np.full(num_groups, -1, dtype=int)
+        np.maximum.at(best, groups, self._rank[fleets])
+        return self._by_rank[best[groups]]
+
+    def _adjacent_damage(self, fleets: np.ndarray, cells: np.ndarray) -> np.ndarray:
+        n = self._field.size ** 2
+        player = self._player[fleets]
+
+        cell_to_player = np.full(n, -1, dtype=int)
+        cell_to_player[cells] = player
+        cell_to_ship_count = np.zeros(n, dtype=int)
+        cell_to_ship_count[cells] = self._ship_count[fleets]
+
+        adjacent_cells = self._adjacent_cells[cells]
+        adjacent_player = cell_to_player[adjacent_cells]
+        is_enemy = (adjacent_player >= 0) & (adjacent_player != player[:, None])
+        return (cell_to_ship_count[adjacent_cells] * is_enemy).sum(axis=1)
+
+    def _simulate(self):
+        n = self._field.size ** 2
+        is_active = np.ones(len(self._fleets), dtype=bool)
+        cells = self._start.copy()
+
+        events = self._event_times()
+        for time in range(1, len(events)):
+            if not events[time]:
+                continue
+
+            # shipyard conversions
+            converted = (
+                is_active
+                & self._build_shipyard
+                & (self._lengths == time - 1)
+                & (self._shipyard_times > self._lengths)
+            )
+            if converted.any():
+                self._converted |= converted
+                new_shipyards = np.zeros(n, dtype=bool)
+                new_shipyards[
+                    np.where(
+                        self._lengths[converted] > 0,
+                        self._tracks[converted, self._lengths[converted] - 1],
+                        self._start[converted],
+                    )
+                ] = True
+                self._shipyards |= new_shipyards
+                self._shipyard_times = np.minimum(
+                    self._shipyard_times, self._times_to_reach(new_shipyards, time)
+                )
+
+            # fleets at the end of the route or at a shipyard
+            is_active &= (self._lengths >= time) & (self._shipyard_times >= time)
+
+            fleets = np.nonzero(is_active & (self._shipyard_times > time))[0]
+            if len(fleets) < 2:
+                continue
+            cells[fleets] = self._tracks[fleets, time - 1]
+
+            if len(np.unique(cells[fleets])) < len(fleets):
+                # allied fleets
+                groups = self._player[fleets] * n + cells[fleets]
+                winners = self._winners(fleets, groups, (self._player.max() + 1) * n)
+                joined = fleets[winners != fleets]
+                self._leader[joined] = winners[winners != fleets]
+                self._stop_times[joined] = time
+                is_active[joined] = False
+
+                # fleet to fleet
+                fleets = np.nonzero(is_active & (self._shipyard_times > time))[0]
+                winners = self._winners(fleets, cells[fleets], n)
+                self._stop_times[fleets[winners != fleets]] = time
+                is_active[fleets[winners != fleets]] = False
+
+            # adjacent damage
+            fleets = np.nonzero(is_active & (self._shipyard_times > time))[0]
+            if len(fleets) > 1:
+                dmg = self._adjacent_damage(fleets, cells[fleets])
+                killed = fleets[self._ship_count[fleets] <= dmg]
+                self._stop_times[killed] = time
+                is_active[killed] = False
+
+        self._num_steps = np.minimum(
+            self._lengths, np.minimum(self._shipyard_times, self._stop_times)
+        )
+
+    def reaches_shipyard(self) -> np.ndarray:
+        """
+        the fleet flies its own route up to a shipyard
+        """
+        return (self._leader < 0) & ~self._converted & (self._shipyard_times == self._num_steps)
+
+    def _segments(self, fleet: int, start: int, stop: int) -> List[Tuple[BoardPath, int, int]]:
+        """
+        the paths that cover the points [start, stop) of the fleet route
+        """
+        segments = []
+        t = 0
+        for path, num_steps in zip(self._fleets[fleet].route.paths, self._path_lengths[fleet]):
+            if t >= stop:
+                break
+            if t + num_steps > start:
+                segments.append((path, max(t, start) - t, min(t + num_steps, stop) - t))
+            t += num_steps
+        return segments
+
+    def routes(self) -> List[BoardRoute]:
+        """
+        the part of every route that the fleet is expected to fly,
+        a fleet that joined an allied fleet follows its route
+        """
+        routes = []
+        for i, f in enumerate(self._fleets):
+            leader = self._leader[i]
+            if leader < 0 and self._converted[i]:
+                # the whole route
+                routes.append(f.route)
+                continue
+
+            num_steps = self._num_steps[i]
+            segments = self._segments(i, 0, num_steps)
+            converted = self._converted[i]
+            if leader >= 0:
+                segments += self._segments(leader, num_steps, self._num_steps[leader])
+                converted = self._converted[leader]
+
+            paths = []
+            start = f.point
+            last_direction = None
+            for path, lo, hi in segments:
+                direction = path.plan.direction
+                if direction == last_direction:
+                    # the fleet continues in the same direction after joining
+                    track = paths.pop().points + path.points[lo:hi]
+                    start = paths[-1].end if paths else f.point
+                    path = BoardPath(start, PlanPath(direction, len(track)), track=track)
+                elif lo > 0 or hi < len(path) or not np.isfinite(path.plan.num_steps):
+                    path = BoardPath(start, PlanPath(direction, hi - lo), track=path.points[lo:hi])
+                paths.append(path)
+                start = path.end
+                last_direction = direction
+
+            if converted:
+                paths.append(BoardPath(start, PlanPath(Convert)))
+
+            routes.append(BoardRoute(f.point, PlanRoute([x.plan for x in paths]), paths=paths))
+        return routes
+
+
 class Player(Obj):
     def __init__(self, *args, kore: float, board: "Board", **kwargs):
         super().__init__(*args, **kwargs)
@@ -729,10 +925,7 @@ class Player(Obj):
         self._kore_reserve = 0
         self._board = board
         self._start_time = time.time()
-        self._board_risk = None
-        self._board_risk_not_adj = None
-        self._optimistic_board_risk = None
-        self._optimistic_board_risk_not_adj = None
+        self._board_risk: Optional[BoardRisk] = None
         self.state = None
         self.memory = None
 
@@ -906,71 +1099,116 @@ class Player(Obj):
             return num_ships > risk * 0.75
         return True
 
-    def estimate_board_risk(self, p: Point, time: int, max_time: int = 40, pessimistic: bool = True) -> int:
+    @cached_property
+    def economy(self) -> EconomyTimeline:
+        return EconomyTimeline(self)
+
+    @cached_property
+    def nearest_shipyards(self) -> NearestShipyards:
+        """
+        the nearest shipyards of every point, future shipyards included
+        """
+        return NearestShipyards(self.board.field, self.board.all_shipyards, self.game_id)
+
+    @cached_property
+    def nearest_built_shipyards(self) -> NearestShipyards:
+        return NearestShipyards(self.board.field, self.board.shipyards, self.game_id)
+
+    @property
+    def board_risk(self) -> BoardRisk:
         if self._board_risk is None:
-            self._board_risk, self._board_risk_not_adj = self._estimate_board_risk()
-            self._optimistic_board_risk, self._optimistic_board_risk_not_adj = self._estimate_board_risk(pessimistic=False)
+            opps = self.opponents
+            shipyards = list(opps[0].all_shipyards) if opps else []
+            self._board_risk = BoardRisk(self.board.field, shipyards)
+        return self._board_risk
+
+    def estimate_board_risk(self, p: Point, time: int, max_time: int = 40, pessimistic: bool = True) -> int:
         if time < 0:
             return 0
-        time = min(time, max_time)
-        return self._board_risk[p][time] if pessimistic else self._optimistic_board_risk[p][time]
+        time = min(time, max_time, self.board_risk.max_time)
+        return self.board_risk.risk(p, time, pessimistic)
 
     def estimate_board_risk_not_adj(self, p: Point, time: int, max_time: int = 40, pessimistic: bool = True) -> int:
-        if self._board_risk is None:
-            self._board_risk, self._board_risk_not_adj = self._estimate_board_risk()
-            self._optimistic_board_risk, self._optimistic_board_risk_not_adj = self._estimate_board_risk(pessimistic=False)
         if time < 0:
             return 0
-        time = min(time, max_time)
-        return self._board_risk_not_adj[p][time] if pessimistic else self._optimistic_board_risk_not_adj[p][time]
-
-    def _estimate_board_risk(self, max_time: int = 40, pessimistic: bool = True) -> Dict[Point, Dict[int, int]]:
-        board = self.board
-        opps = self.opponents
-        if len(opps) < 1:
-            return {}
-        opp = opps[0]
-        if pessimistic:
-            func = lambda p, dt: opp.estimate_power_for_point_at_time(p, dt)
-        else:
-            func = lambda p, dt: opp.estimate_optimistic_power_for_point_at_time(p, dt)
-
-        point_to_time_to_score = defaultdict(dict)
-        for p in board:
-            for dt in range(max_time + 1):
-                point_to_time_to_score[p][dt] = func(p, dt)
-
-        adj_point_to_time_to_score = defaultdict(dict)
-        for p in board:
-            for dt in range(max_time + 1):
-                adj_point_to_time_to_score[p][dt] = max(
-                    point_to_time_to_score[adj_p][dt]
-                    for adj_p in p.adjacent_points
-                )
-
-        return adj_point_to_time_to_score, point_to_time_to_score
+        time = min(time, max_time, self.board_risk.max_time)
+        return self.board_risk.risk_not_adj(p, time, pessimistic)
 
 
 _FIELD = None
 
+# fleet id -> (step, observed fleet state, route, build_shipyard)
+_FLEET_ROUTES = {}
+
+# fleet id -> (step, simulated route, the route can be carried to the next step)
+_SIMULATED_ROUTES = {}
+# step, shipyard cells of the last simulation
+_SIMULATED_SHIPYARDS = (None, None)
+# compare the carried routes with the simulation of all fleets
+CHECK_FLEET_PREDICTIONS = False
+
+
+def reset_game_state():
+    """
+    forgets the fleets of the last game, the field is kept for the next game of the same size
+    """
+    global _FLEET_ROUTES, _SIMULATED_ROUTES, _SIMULATED_SHIPYARDS
+    _FLEET_ROUTES = {}
+    _SIMULATED_ROUTES = {}
+    _SIMULATED_SHIPYARDS = (None, None)
+
+
+def _next_fleet_state(field: Field, fleet_state: tuple, convert_cost: int) -> Optional[tuple]:
+    """
+    the fleet state after one step if nothing happens to the fleet,
+    follows the kore_fleets interpreter
+    """
+    point_id, ship_count, direction, flight_plan = fleet_state
+
+    flight_plan = flight_plan.lstrip("0")
+    if flight_plan.startswith(Convert.command) and ship_count >= convert_cost:
+        return None
+    flight_plan = flight_plan.lstrip(Convert.command)
+
+    if flight_plan and flight_plan[0].isalpha():
+        direction = COMMAND_TO_ACTION[flight_plan[0]].game_id
+        flight_plan = flight_plan[1:]
+    elif flight_plan:
+        i = 0
+        while i < len(flight_plan) and flight_plan[i].isdigit():
+            i += 1
+        num_steps = int(flight_plan[:i]) - 1
+        flight_plan = (str(num_steps) if num_steps > 0 else "") + flight_plan[i:]
+
+    point = field.get_point_by_id(point_id).apply(GAME_ID_TO_ACTION[direction])
+    return point.game_id, ship_count, direction, flight_plan
+
 
 class Board:
     def __init__(self, obs, conf):
         self._conf = Configuration(conf)
         self._step = obs["step"]
+        self._scheduler = TurnScheduler(
+            self._conf.act_timeout, obs.get("remainingOverageTime", 0), self.steps_left
+        )
 
+        # the points only keep the kore, which is set below, so the field and its caches
+        # are shared by all the games of the same size
         global _FIELD
-        if _FIELD is None or self._step == 0:
+        if _FIELD is None or _FIELD.size != self._conf.size:
             _FIELD = Field(self._conf.size)
-        else:
-            assert _FIELD.size == self._conf.size
 
         self._field: Field = _FIELD
 
-        id_to_point = {x.game_id: x for x in self._field}
+        global _FLEET_ROUTES
+        if self._step == 0:
+            _FLEET_ROUTES = {}
+        fleet_routes = {}
+        # fleets that did exactly what their flight plans said
+        self._predicted_fleets = set()
 
         for point_id, kore in enumerate(obs["kore"]):
-            point = id_to_point[point_id]
+            point = self._field.get_point_by_id(point_id)
             point.set_kore(kore)
 
         self._players = []
@@ -984,21 +1222,14 @@ class Board:
 
             for fleet_id, fleet_data in player_fleets.items():
                 point_id, kore, ship_count, direction, flight_plan = fleet_data
-                position = id_to_point[point_id]
+                position = self._field.get_point_by_id(point_id)
+                route, build_shipyard = self._get_fleet_route(
+                    fleet_id, (point_id, ship_count, direction, flight_plan)
+                )
+                fleet_routes[fleet_id] = (
+                    self._step, (point_id, ship_count, direction, flight_plan), route, build_shipyard
+                )
                 direction = GAME_ID_TO_ACTION[direction]
-                build_shipyard = False
-                if Convert.command in flight_plan:
-                    if ship_count < self.shipyard_cost:
-                        # can't convert
-                        flight_plan = "".join(
-                            [x for x in flight_plan if x != Convert.command]
-                        )
-                    else:
-                        # Delete everything after the convert command
-                        flight_plan = flight_plan[:flight_plan.index(Convert.command) + 1]
-                        build_shipyard = True
-                plan = PlanRoute.from_str(flight_plan, direction)
-                route = BoardRoute(position, plan)
                 fleet = Fleet(
                     game_id=fleet_id,
                     point=position,
@@ -1024,7 +1255,7 @@ class Board:
 
             for shipyard_id, shipyard_data in player_shipyards.items():
                 point_id, ship_count, turns_controlled = shipyard_data
-                position = id_to_point[point_id]
+                position = self._field.get_point_by_id(point_id)
                 shipyard = Shipyard(
                     game_id=shipyard_id,
                     point=position,
@@ -1037,8 +1268,44 @@ class Board:
 
         self._players = [x for x in self._players if x.is_active()]
 
+        _FLEET_ROUTES = fleet_routes
+
         self._update_fleets_destination()
 
+    def _get_fleet_route(self, fleet_id: str, fleet_state: tuple) -> Tuple[BoardRoute, bool]:
+        """
+        the route from the last observation is reused
+        if the fleet did exactly what its flight plan said
+        """
+        if fleet_id in _FLEET_ROUTES:
+            step, last_state, route, build_shipyard = _FLEET_ROUTES[fleet_id]
+            if step == self._step and last_state == fleet_state:
+                return route, build_shipyard
+            if step == self._step - 1:
+                next_state = _next_fleet_state(self._field, last_state, self.shipyard_cost)
+                if next_state == fleet_state:
+                    route = route.advance()
+                    if route is not None:
+                        self._predicted_fleets.add(fleet_id)
+                        return route, build_shipyard
+
+        point_id, ship_count, direction, flight_plan = fleet_state
+        position = self._field.get_point_by_id(point_id)
+        direction = GAME_ID_TO_ACTION[direction]
+        build_shipyard = False
+        if Convert.command in flight_plan:
+            if ship_count < self.shipyard_cost:
+                # can't convert
+                flight_plan = "".join(
+                    [x for x in flight_plan if x != Convert.command]
+                )
+            else:
+                # Delete everything after the convert command
+                flight_plan = flight_plan[:flight_plan.index(Convert.command) + 1]
+                build_shipyard = True
+        plan = PlanRoute.from_str(flight_plan, direction)
+        return BoardRoute(position, plan), build_shipyard
+
     def __getitem__(self, item):
         return self._field[item]
 
@@ -1105,6 +1372,26 @@ class Board:
     def total_kore(self) -> int:
         return sum(x.kore for x in self)
 
+    @property
+    def scheduler(self) -> TurnScheduler:
+        return self._scheduler
+
+    @property
+    def catalogue(self) -> RouteCatalogue:
+        return get_route_catalogue(self._field)
+
+    @cached_property
+    def occupancy(self) -> OccupancyIndex:
+        return OccupancyIndex(self)
+
+    @cached_property
+    def kore_forecast(self) -> KoreForecast:
+        return KoreForecast(self)
+
+    @cached_property
+    def kore_index(self) -> KoreIndex:
+        return KoreIndex(self)
+
     def get_player(self, game_id) -> Player:
         for p in self._players:
             if p.game_id == game_id:
@@ -1120,68 +1407,94 @@ class Board:
         """
         trying to predict future positions
         very inaccurate
+
+        A fleet that flies alone to a shipyard keeps the simulated route of the last step
+        if it did what its flight plan said, only the other fleets are simulated again.
         """
+        global _SIMULATED_ROUTES, _SIMULATED_SHIPYARDS
+        if self._step == 0:
+            _SIMULATED_ROUTES = {}
 
+        fleets = self.fleets
         shipyard_positions = {x.point for x in self.shipyards}
+        shipyard_cells = frozenset(p.cell for p in shipyard_positions)
+        tracks, lengths = route_cells([f.route for f in fleets], self._field.size)
+        is_alone = self._fleets_alone(tracks, shipyard_cells)
+
+        carried = {}
+        if _SIMULATED_SHIPYARDS == (self._step - 1, shipyard_cells):
+            for i, f in enumerate(fleets):
+                if not is_alone[i] or f.game_id not in self._predicted_fleets:
+                    continue
+                step, route, can_carry = _SIMULATED_ROUTES.get(f.game_id, (None, None, False))
+                if step == self._step - 1 and can_carry:
+                    route = route.advance()
+                    if route is not None:
+                        carried[i] = route
+
+        simulated = [i for i in range(len(fleets)) if i not in carried]
+        max_length = lengths[simulated].max(initial=0)
+        simulator = FleetSimulator(
+            self._field,
+            [fleets[i] for i in simulated],
+            shipyard_positions,
+            tracks=(tracks[simulated, :max_length + 1], lengths[simulated]),
+        )
+        routes = dict(carried)
+        routes.update(zip(simulated, simulator.routes()))
+        can_carry = dict.fromkeys(carried, True)
+        can_carry.update(zip(simulated, simulator.reaches_shipyard().tolist()))
+
+        if timer.enabled:
+            timer.count("carried_fleet_routes", len(carried))
+
+        if CHECK_FLEET_PREDICTIONS and carried:
+            full_routes = FleetSimulator(
+                self._field, fleets, shipyard_positions, tracks=(tracks, lengths)
+            ).routes()
+            for i in carried:
+                route, full_route = routes[i], full_routes[i]
+                if route.points() != full_route.points() or route.plan.to_str() != full_route.plan.to_str():
+                    logger.error(
+                        f"Carried route of fleet {fleets[i].game_id} {route.plan.to_str()} "
+                        f"differs from the simulation {full_route.plan.to_str()}"
+                    )
+            routes = dict(enumerate(full_routes))
 
-        fleets = [FleetPointer(f) for f in self.fleets]
-
-        while any(x.is_active for x in fleets):
-            for f in fleets:
-                f.update()
-
-                # fleet shipyard conversions
-                if f.build_shipyard:
-                    shipyard_positions.add(f.build_shipyard)
-
-            # fleet to shipyard
-            for f in fleets:
-                if f.point in shipyard_positions:
-                    f.is_active = False
-
-            # allied fleets
-            for player in self.players:
-                point_to_fleets = defaultdict(list)
-                for f in fleets:
-                    if f.is_active and f.obj.player_id == player.game_id:
-                        point_to_fleets[f.point].append(f)
-                for point_fleets in point_to_fleets.values():
-                    if len(point_fleets) > 1:
-                        sorted_fleets = sorted(point_fleets, key=lambda x: x.obj)
-                        last_fleet = sorted_fleets[-1]
-                        for f in sorted_fleets[:-1]:
-                            f.is_active = False
-                            last_fleet.coalesced_fleets.append(f)
-                            f._paths.append([last_fleet._paths[-1][0], 0])
-
-            # fleet to fleet
-            point_to_fleets = defaultdict(list)
-            for f in fleets:
-                if f.is_active:
-                    point_to_fleets[f.point].append(f)
-            for point_fleets in point_to_fleets.values():
-                if len(point_fleets) > 1:
-                    for f in sorted(point_fleets, key=lambda x: x.obj)[:-1]:
-                        f.is_active = False
+        _SIMULATED_ROUTES = {
+            f.game_id: (self._step, routes[i], bool(is_alone[i] and can_carry[i]))
+            for i, f in enumerate(fleets)
+        }
+        _SIMULATED_SHIPYARDS = (self._step, shipyard_cells)
 
-            # adjacent damage
-            point_to_fleet = {}
-            for f in fleets:
-                if f.is_active:
-                    point_to_fleet[f.point] = f
-
-            point_to_dmg = defaultdict(int)
-            for point, fleet in point_to_fleet.items():
-                for p in point.adjacent_points:
-                    if p in point_to_fleet:
-                        adjacent_fleet = point_to_fleet[p]
-                        if adjacent_fleet.obj.player_id != fleet.obj.player_id:
-                            point_to_dmg[p] += fleet.obj.ship_count
-
-            for point, fleet in point_to_fleet.items():
-                dmg = point_to_dmg[point]
-                if fleet.obj.ship_count <= dmg:
-                    fleet.is_active = False
-
-        for f in fleets:
-            f.obj.set_route(f.current_route())
+        for i, f in enumerate(fleets):
+            f.set_route(routes[i])
+
+    def _fleets_alone(self, tracks: np.ndarray, shipyard_cells: Set[int]) -> np.ndarray:
+        """
+        the fleet is never on the same or an adjacent point with another fleet
+        before it reaches a shipyard and doesn't fly through a new shipyard,
+        whoever the fleets belong to, so the other fleets can't change its route
+        """
+        fleets = self.fleets
+        n = self._field.size ** 2
+
+        # fleets don't meet anyone on a shipyard
+        shipyards = np.zeros(n, dtype=bool)
+        shipyards[list(shipyard_cells)] = True
+        is_flying = (np.cumsum(shipyards[tracks] & (tracks >= 0), axis=1) == 0) & (tracks >= 0)
+        fleet_index, times = np.nonzero(is_flying)
+        cells = tracks[fleet_index, times]
+
+        # time -> cell -> number of fleets
+        counts = np.bincount(times * n + cells, minlength=tracks.shape[1] * n).reshape((-1, n))
+        adjacent_cells = self._field.tables.adjacent_cells()[cells]
+        is_crowded = counts[times, cells] + counts[times[:, None], adjacent_cells].sum(axis=1) > 1
+
+        is_converting = np.array([f.route.last_action() == Convert for f in fleets], dtype=bool)
+        new_shipyards = np.zeros(n, dtype=bool)
+        new_shipyards[[f.route.end.cell for f, x in zip(fleets, is_converting) if x]] = True
+        is_crowded |= new_shipyards[cells]
+
+        num_crowded = np.bincount(fleet_index, weights=is_crowded, minlength=len(fleets))
+        return (num_crowded == 0) & ~is_converting
@@ -0,0 +1,103 @@
+import itertools
+import os
+from typing import Dict, List, Tuple
+
+IS_KAGGLE = os.path.exists("/kaggle_simulations")
+
+# <--->
+if IS_KAGGLE:
+    from geometry import Field, Point, PlanRoute, Action
+else:
+    from .geometry import Field, Point, PlanRoute, Action
+
+# <--->
+
+_CATALOGUE = None
+
+
+def get_route_catalogue(field: Field) -> "RouteCatalogue":
+    global _CATALOGUE
+    if _CATALOGUE is None or _CATALOGUE.field is not field:
+        _CATALOGUE = RouteCatalogue(field)
+    return _CATALOGUE
+
+
+class RouteCatalogue:
+    """
+    Plans and point tracks that depend only on the geometry of the field.
+
+    On a torus the plans between two points depend only on the offset between them,
+    so the plans through the same sequence of offsets are built once
+    and shared by all the points and all the turns.
+    The plans are never changed after they are built,
+    so their strings and min fleet sizes are computed once as well.
+    """
+
+    # the same length as the track of BoardPath with an infinite number of steps
+    ray_length = 31
+
+    def __init__(self, field: Field):
+        self._field = field
+        size = field.size
+        self._size = size
+
+        # offset -> L-shaped plans, the same as Point.dirs_to
+        origin = field[0, 0]
+        self._legs = [
+            [PlanRoute(path) for path in origin.dirs_to(field[x, y])]
+            for x in range(size)
+            for y in range(size)
+        ]
+
+        # offsets -> plans through the points
+        self._plans: Dict[Tuple[int, ...], List[PlanRoute]] = {}
+
+        # cell -> direction -> the next points in the direction
+        points = field.points.reshape(-1)
+        self._rays = [
+            [list(points[cells]) for cells in directions]
+            for directions in field.tables.rays()[:, :, :self.ray_length]
+        ]
+
+    @property
+    def field(self) -> Field:
+        return self._field
+
+    def offset(self, start: Point, end: Point) -> int:
+        size = self._size
+        return ((end.x - start.x) % size) * size + (end.y - start.y) % size
+
+    def plans_through(self, start: Point, points: List[Point]) -> List[PlanRoute]:
+        """
+        the same plans as Point.get_plans_through
+        """
+        if self._size % 2 == 0:
+            # the half-way offset can go either way, it depends on the coordinates
+            return start.get_plans_through(points)
+
+        key = []
+        last = start
+        for p in points:
+            if p == last:
+                continue
+            key.append(self.offset(last, p))
+            last = p
+        key = tuple(key)
+
+        plans = self._plans.get(key)
+        if plans is None:
+            plans = []
+            for legs in itertools.product(*[self._legs[o] for o in key]):
+                curr_plan = PlanRoute([])
+                for leg in legs:
+                    curr_plan += leg
+                plans.append(curr_plan)
+            self._plans[key] = plans
+        return list(plans)
+
+    def track(self, start: Point, action: Action, num_steps: int) -> List[Point]:
+        """
+        the next num_steps points from the start in the direction,
+        num_steps must be less or equal to ray_length
+        """
+        return self._rays[start.x * self._size + start.y][action.game_id][:num_steps]
@@ -6,12 +6,12 @@ IS_KAGGLE = os.path.exists("/kaggle_simulations")
 if IS_KAGGLE:
     from geometry import PlanRoute
     from board import Player, Launch, Spawn, Fleet, FleetPointer, BoardRoute, DontLaunch, Shipyard, DirectAttack
-    from helpers import is_inevitable_victory, find_shortcut_routes, find_closest_shipyards, _spawn
+    from helpers import is_inevitable_victory, find_best_shortcut_route, _spawn
     from logger import logger
 else:
     from .geometry import PlanRoute
     from .board import Player, Launch, Spawn, Fleet, FleetPointer, BoardRoute, DontLaunch, Shipyard, DirectAttack
-    from .helpers import is_inevitable_victory, find_shortcut_routes, find_closest_shipyards, _spawn
+    from .helpers import is_inevitable_victory, find_best_shortcut_route, _spawn
     from .logger import logger
 
 # <--->
@@ -40,10 +40,7 @@ def direct_attack(agent: Player, max_distance: int = 10, max_time_to_wait: int =
     if not shipyards:
         return
 
-    point_to_closest_shipyard = {}
-    for p in board:
-        (closest_friendly_sy, _, _, _) = find_closest_shipyards(agent, p)
-        point_to_closest_shipyard[p] = closest_friendly_sy.point
+    nearest_shipyards = agent.nearest_built_shipyards
 
     opponent_shipyard_points = {x.point for x in board.all_shipyards if x.player_id != agent.game_id}
     adjacent_attacks = []
@@ -78,8 +75,8 @@ def direct_attack(agent: Player, max_distance: int = 10, max_time_to_wait: int =
                         time_diff < best_candidate_time and \
                         power >= min_ships_to_send:
                         found_route = False
-                        destination = point_to_closest_shipyard[target_point]
-                        plans = sy.point.get_plans_through([target_point, destination])
+                        destination = nearest_shipyards.closest_friendly(target_point).point
+                        plans = board.catalogue.plans_through(sy.point, [target_point, destination])
                         routes = [BoardRoute(sy.point, plan) for plan in plans]
                         routes.sort(key=lambda route: route.expected_kore(board, num_ships_to_launch))
                         for route in routes:
@@ -110,8 +107,8 @@ def direct_attack(agent: Player, max_distance: int = 10, max_time_to_wait: int =
                 if sy.available_ship_count < min_ships_to_send:
                     continue
 
-                destination = point_to_closest_shipyard[target_point]
-                plans = sy.point.get_plans_through([target_point, destination])
+                destination = nearest_shipyards.closest_friendly(target_point).point
+                plans = board.catalogue.plans_through(sy.point, [target_point, destination])
                 routes = [BoardRoute(sy.point, plan) for plan in plans]
                 routes.sort(key=lambda route: route.expected_kore(board, num_ships_to_launch))
                 for route in routes:
@@ -227,21 +224,21 @@ def adjacent_attack(agent: Player, max_distance: int = 10):
             min_ship_count = min(x.ship_count for x in target_fleets)
             num_ships_to_send = min(sy.available_ship_count, min_ship_count)
 
-            routes = find_shortcut_routes(
+            best_route = find_best_shortcut_route(
                 board,
                 sy.point,
                 target_point,
                 agent,
                 num_ships_to_send,
+                lowest=True,
                 route_distance=target_time,
             )
-            if not routes:
+            if best_route is None:
                 continue
 
             logger.info(
                 f"Adjacent attack {sy.point}->{target_point}, distance={distance}, target_time={target_time}"
             )
-            best_route = min(routes, key=lambda route: route.expected_kore(board, num_ships_to_send))
             score = 20 * num_ships_to_send
             sy.action = DirectAttack(num_ships_to_send, best_route, score)
 
@@ -8,13 +8,13 @@ IS_KAGGLE = os.path.exists("/kaggle_simulations")
 if IS_KAGGLE:
     from basic import max_ships_to_spawn
     from board import Player, Launch, Shipyard, Spawn, AllowMine, HailMary
-    from helpers import find_shortcut_routes, _spawn
+    from helpers import find_best_shortcut_route, _spawn
     from logger import logger
     from state import Expansion, State
 else:
     from .basic import max_ships_to_spawn
     from .board import Player, Launch, Shipyard, Spawn, AllowMine, HailMary
-    from .helpers import find_shortcut_routes, _spawn
+    from .helpers import find_best_shortcut_route, _spawn
     from .logger import logger
     from .state import Expansion, State
 
@@ -141,20 +141,17 @@ def defend_shipyards(agent: Player, self_built_sys: Set[Shipyard]):
                 (len(agent.all_shipyards) < 5 and help_sy.point in self_built_sys):
                 if len(agent.all_shipyards) < 5:
                     logger.info(f"Not many shipyards. Save shipyard at all costs")
-                routes = find_shortcut_routes(
-                    board, sy.point, help_sy.point, agent, sy.ship_count, allow_join=True
+                num_ships_to_launch = sy.available_ship_count
+                best_route = find_best_shortcut_route(
+                    board, sy.point, help_sy.point, agent, sy.ship_count, ship_count=num_ships_to_launch,
+                    lowest=distance != incoming_hostile_time - 1, allow_join=True
                 )
 
-                if not routes:
+                if best_route is None:
                     logger.error(f"No routes to send reinforcements {sy.point}->{help_sy.point}")
                     _spawn(agent, sy)
                     continue
 
-                num_ships_to_launch = sy.available_ship_count
-                if distance == incoming_hostile_time - 1:
-                    best_route = max(routes, key=lambda route: route.expected_kore(board, num_ships_to_launch))
-                else:
-                    best_route = min(routes, key=lambda route: route.expected_kore(board, num_ships_to_launch))
                 logger.info(f"Send reinforcements {sy.point}->{help_sy.point}. Size: {num_ships_to_launch}")
                 sy.action = Launch(num_ships_to_launch, best_route)
             else:
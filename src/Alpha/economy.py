@@ -0,0 +1,180 @@
+import numpy as np
+from typing import List, Union
+
+from kaggle_environments.envs.kore_fleets.helpers import SPAWN_VALUES
+
+_SPAWN_VALUES = np.array(SPAWN_VALUES)
+
+
+def _max_ships_to_spawn(turns_controlled: np.ndarray) -> np.ndarray:
+    """
+    basic.max_ships_to_spawn for many shipyards at once
+    """
+    return np.searchsorted(_SPAWN_VALUES, turns_controlled, side="right") + 1
+
+
+class EconomyTimeline:
+    """
+    Kore income of a player and ship counts of all its shipyards on the next turns,
+    computed once per turn.
+
+    Every shipyard is simulated on its own, as if it could spend all the kore of the player:
+    - power: ships at the shipyard at the step, with reinforcements, attacks and spawns
+    - idle turns: the number of steps before the step without a fleet arriving or a spawn
+    - defence power: ships that can defend the shipyard from an attack at the step,
+      its own ships and spawns and the help from the other shipyards
+    """
+
+    def __init__(self, player: "Player"):
+        board = player.board
+        size = board.size
+        self._power_steps = size + 1
+        num_steps = 2 * size + 1
+
+        shipyards = list(player.all_shipyards)
+        self._shipyards = shipyards
+        self._shipyard_index = {sy: i for i, sy in enumerate(shipyards)}
+
+        # time -> kore brought by the fleets returning to the shipyards
+        income = np.zeros(num_steps)
+        for sy in shipyards:
+            for f in sy.incoming_allied_fleets:
+                if f.eta < num_steps:
+                    income[f.eta] += f.expected_kore()
+        self._income = income
+
+        # shipyard -> time -> ships
+        allied = np.zeros((len(shipyards), num_steps), dtype=int)
+        own_fleet = np.zeros((len(shipyards), num_steps), dtype=int)
+        hostile = np.zeros((len(shipyards), num_steps), dtype=int)
+        time_to_build = np.zeros(len(shipyards), dtype=int)
+        for i, sy in enumerate(shipyards):
+            time_to_build[i] = getattr(sy, "time_to_build", 0)
+            for f in sy.incoming_allied_fleets:
+                if f.eta >= num_steps:
+                    continue
+                # FutureShipyard considers its own fleet as incoming
+                if f.game_id == sy.game_id:
+                    own_fleet[i, f.eta] += f.ship_count
+                else:
+                    allied[i, f.eta] += f.ship_count
+            for f in sy.incoming_hostile_fleets:
+                if f.eta < num_steps:
+                    hostile[i, f.eta] += f.ship_count
+
+        turns_controlled = np.array([sy.turns_controlled for sy in shipyards], dtype=int)
+        spawn_cost = board.spawn_cost
+
+        # shipyard -> time -> ships that can be spawned
+        can_spawn = _max_ships_to_spawn(turns_controlled[:, None] + np.arange(num_steps))
+
+        self._kore = float(player.kore)
+        self._spawn_cost = spawn_cost
+        self._ship_count = [sy.ship_count for sy in shipyards]
+        self._can_spawn = can_spawn
+        self._time_to_build = time_to_build.tolist()
+        self._is_future = [hasattr(sy, "time_to_build") for sy in shipyards]
+        self._defence_reinforcements = allied + own_fleet - hostile
+        # shipyard -> attack time -> ships
+        self._defence_power = {}
+        # a future shipyard does nothing until it is built
+        is_built = np.arange(self._power_steps) >= time_to_build[:, None]
+        power_can_spawn = np.where(is_built, can_spawn[:, :self._power_steps], 0)
+        power_income = np.where(is_built, income[:self._power_steps], 0)
+        power_reinforcements = np.where(is_built, (allied - hostile)[:, :self._power_steps], 0)
+
+        self._power = np.zeros((len(shipyards), self._power_steps), dtype=int)
+        ship_count = np.array([sy.ship_count for sy in shipyards], dtype=float)
+        kore = np.full(len(shipyards), float(player.kore))
+        for t in range(self._power_steps):
+            ship_count += power_reinforcements[:, t]
+            self._power[:, t] = ship_count
+            kore += power_income[:, t]
+            spawn_count = np.minimum(kore // spawn_cost, power_can_spawn[:, t])
+            kore -= spawn_count * spawn_cost
+            ship_count += spawn_count
+        self._power *= is_built
+
+        is_idle = np.zeros((len(shipyards), num_steps), dtype=bool)
+        kore = np.full(len(shipyards), float(player.kore))
+        for t in range(1, num_steps):
+            kore += income[t]
+            spawn_count = np.minimum(kore // spawn_cost, can_spawn[:, t])
+            is_idle[:, t] = (allied[:, t] == 0) & (spawn_count == 0)
+            kore -= spawn_count * spawn_cost
+        self._idle_turns = np.cumsum(is_idle, axis=1)
+
+    @property
+    def income(self) -> np.ndarray:
+        """
+        time -> kore
+        """
+        return self._income
+
+    def future_ship_count(self, shipyard: Union["Shipyard", "FutureShipyard"]) -> List[int]:
+        return self._power[self._shipyard_index[shipyard]].tolist()
+
+    def idle_turns(self, shipyard: "Shipyard") -> List[int]:
+        return self._idle_turns[self._shipyard_index[shipyard]].tolist()
+
+    def defence_power(self, shipyard: Union["Shipyard", "FutureShipyard"], time: int) -> int:
+        """
+        ships at the shipyard and in the allied shipyards that can reach it in time,
+        if it is attacked at the time
+        """
+        time = max(time, 0)
+        curve = self._defence_power.get(shipyard)
+        if curve is None or len(curve) <= time:
+            # the attacks within the size of the field first, they are the usual ones
+            num_steps = self._power_steps if curve is None and time < self._power_steps else len(self._income)
+            curve = self._defence_power[shipyard] = self._get_defence_power(shipyard, num_steps)
+        return curve[min(time, len(curve) - 1)]
+
+    def _get_defence_power(self, target: Union["Shipyard", "FutureShipyard"], num_steps: int) -> List[int]:
+        """
+        The spawns are shared by all attack times at once: every step is simulated
+        for all the attacks that come after it, a suffix of the attack times.
+        The target spawns first, then the other shipyards that can still reach it before the attack.
+        """
+        i = self._shipyard_index[target]
+        spawn_cost = self._spawn_cost
+        can_spawn = self._can_spawn
+        reinforcements = self._defence_reinforcements
+
+        helpers = []
+        for j, sy in enumerate(self._shipyards):
+            if j != i:
+                helpers.append((j, max(sy.distance_from(target), 1)))
+
+        # attack time -> ...
+        kore = np.full(num_steps, self._kore)
+        own_power = np.full(num_steps, float(self._ship_count[i]))
+        help_power = np.zeros(num_steps)
+        for t in range(num_steps - 1):
+            # the attacks after the step
+            k = t + 1
+            kore[k:] += self._income[t]
+            own_power[k:] += reinforcements[i, t]
+            spawn_count = np.minimum(kore[k:] // spawn_cost, can_spawn[i, t])
+            kore[k:] -= spawn_count * spawn_cost
+            own_power[k:] += spawn_count
+
+            for j, help_time in helpers:
+                if self._is_future[j] and self._time_to_build[j] < t:
+                    continue
+                # the attacks the shipyard can reach in time
+                k = t + help_time
+                if k >= num_steps:
+                    continue
+
+                help_count = reinforcements[j, t]
+                if t == 0 or (self._is_future[j] and self._time_to_build[j] == t):
+                    help_count += self._ship_count[j]
+                help_power[k:] += help_count
+
+                spawn_count = np.minimum(kore[k:] // spawn_cost, can_spawn[j, t])
+                kore[k:] -= spawn_count * spawn_cost
+                # ships spawned just before the attack don't have time to arrive
+                help_power[k + 1:] += spawn_count[1:]
+
+        return (own_power + help_power).astype(int).tolist()
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 import os
 from typing import Dict, Set
 from collections import defaultdict
@@ -10,13 +11,13 @@ if IS_KAGGLE:
     from geometry import Convert, Point
     from board import Player, Shipyard
     from logger import logger
-    from helpers import find_closest_shipyards, create_scorer
+    from helpers import gaussian
     from state import Expansion, PrepCoordinatedAttack, State
 else:
     from .geometry import Convert, Point
     from .board import Player, Shipyard
     from .logger import logger
-    from .helpers import find_closest_shipyards, create_scorer
+    from .helpers import gaussian
     from .state import Expansion, PrepCoordinatedAttack, State
 
 # <--->
@@ -88,42 +89,49 @@ def find_best_shipyard(available_sys: Set[Shipyard], p: Point) -> Shipyard:
     return best_sy
 
 
+def _estimate_board_risk(player: Player, times: np.ndarray, max_time: int = 40) -> np.ndarray:
+    """
+    Player.estimate_board_risk for all cells at once, cell -> time to cell -> risk
+    """
+    board_risk = player.board_risk
+    grid = board_risk.grid().reshape(board_risk.max_time + 1, -1)
+    clipped = np.clip(times, 0, min(max_time, board_risk.max_time))
+    return np.where(times < 0, 0, grid[clipped, np.arange(len(times))])
+
+
 def find_best_position_for_shipyards(player: Player) -> Dict[Shipyard, Point]:
+    """
+    All the terms of the score are computed for the whole board at once,
+    cell = x * size + y, the same order as the points of the board.
+    """
     board = player.board
+    field = board.field
+    size = field.size
+    points = field.points.reshape(-1)
+    kore = board.kore_index.kore.reshape(-1)
 
     kore_sigma = 4
-    g = create_scorer(kore_sigma)
-
-    def closer_bonus(point_to_closest_sy, x, p):
-        f_dist = point_to_closest_sy[x][2]
-        e_dist = point_to_closest_sy[x][3]
-        new_dist = min(x.distance_from(p), f_dist)
-
-        old_diff = max(e_dist - f_dist, 1)
-        new_diff = max(e_dist - new_dist, 1)
-        if new_diff <= old_diff:
-            return 1
-        div = new_diff / old_diff
-        return 1 + 2 * div / kore_sigma
+    nearby_radius = 10
+    # distance -> gaussian weight, the same for all pairs of points
+    weights = np.array([gaussian(d, 0, kore_sigma) for d in range(size + 1)]) / gaussian(0, 0, kore_sigma)
+
+    nearest_shipyards = player.nearest_shipyards
+    shipyards = nearest_shipyards.shipyards
+    is_friendly = nearest_shipyards.is_friendly
+    # cell -> cell -> distance
+    distances = field.tables.distances.astype(int)
+    # cell -> shipyard -> distance
+    sy_distances = nearest_shipyards.distances
+
+    closest_friendly_sy = nearest_shipyards.friendly_indexes
+    min_friendly_distance = nearest_shipyards.friendly_distances
+    min_enemy_distance = nearest_shipyards.enemy_distances
 
     # Penalize kore based on how close it is to another shipyard
-    point_to_kore = {}
-    for p in board:
-        (closest_friendly_sy,
-         closest_enemy_sy,
-         min_friendly_distance,
-         min_enemy_distance) = find_closest_shipyards(player, p, board.all_shipyards)
-
-        closest_sy = closest_friendly_sy if min_friendly_distance < min_enemy_distance else closest_enemy_sy
-        min_distance = min(min_friendly_distance, min_enemy_distance)
-        if closest_friendly_sy is None:
-            point_to_kore[p] = p.kore
-        else:
-            point_to_kore[p] = p.kore * min((0.1 + 0.2 * min_friendly_distance, 1))
-
-    point_to_closest_sy = {}
-    for p in board:
-        point_to_closest_sy[p] = find_closest_shipyards(player, p, board.all_shipyards)
+    if is_friendly.any():
+        point_to_kore = kore * np.minimum(0.1 + 0.2 * min_friendly_distance, 1)
+    else:
+        point_to_kore = kore
 
     op_shipyard_positions = {
         x.point for x in board.all_shipyards if x.player_id != player.game_id
@@ -142,61 +150,73 @@ def find_best_position_for_shipyards(player: Player) -> Dict[Shipyard, Point]:
     first_expansion_behind = op_sy_count == 2 and my_sy_count == 1
 
     num_sys = len(player.all_shipyards)
-    shipyard_to_scores = defaultdict(list)
-    for p in board:
-        if p.kore > 100 or p.kore > board.total_kore * 0.01:
-            continue
-        # Dont form 3 shipyards in a line.
-        # We can't send reinforcements in this case because
-        # find_shortcut_routes chooses only routes along the line.
-        if len(player.all_shipyards) == 2 and \
-            (all(sy.point.x == p.x for sy in player.all_shipyards) or all(sy.point.y == p.y for sy in player.all_shipyards)):
-            continue
+    cells = np.arange(size * size)
+    xs, ys = np.divmod(cells, size)
+
+    is_candidate = (kore <= 100) & (kore <= board.total_kore * 0.01)
+    # Dont form 3 shipyards in a line.
+    # We can't send reinforcements in this case because
+    # find_shortcut_routes chooses only routes along the line.
+    if len(player.all_shipyards) == 2:
+        sy_xs = {sy.point.x for sy in player.all_shipyards}
+        sy_ys = {sy.point.y for sy in player.all_shipyards}
+        if len(sy_xs) == 1:
+            is_candidate &= xs != sy_xs.pop()
+        if len(sy_ys) == 1:
+            is_candidate &= ys != sy_ys.pop()
+
+    # the closest shipyard must be ours
+    min_distance = min_friendly_distance
+    is_candidate &= (min_friendly_distance < min_enemy_distance) & (min_distance >= 4) & (min_distance <= max_exp)
+    candidates = np.flatnonzero(is_candidate)
+    if not candidates.size:
+        return {}
+
+    f_dist = min_friendly_distance
+    e_dist = min_enemy_distance
+    dist_diff = e_dist - f_dist
+
+    # candidate -> cell -> bonus for the kore that gets closer to us than to the enemy
+    candidate_distances = distances[candidates]
+    new_dist = np.minimum(candidate_distances, f_dist[None, :])
+    old_diff = np.maximum(e_dist - f_dist, 1)[None, :]
+    new_diff = np.maximum(e_dist[None, :] - new_dist, 1)
+    closer_bonus = np.where(new_diff <= old_diff, 1, 1 + 2 * (new_diff / old_diff) / kore_sigma)
+
+    is_nearby = (candidate_distances > 0) & (candidate_distances <= nearby_radius)
+    nearby_kore = np.where(
+        is_nearby, (point_to_kore ** 1.1)[None, :] * weights[candidate_distances] * closer_bonus, 0
+    ).sum(axis=1)
+
+    nearby_shipyards = (sy_distances < 5).sum(axis=1)
+    shipyard_penalty = 100 * nearby_shipyards
+    distance_penalty = 50 * min_distance
+    enemy_penalty = np.where(
+        dist_diff >= 9, 0, 3 * _estimate_board_risk(player, f_dist + 3 + e_dist // 2) * (9 - dist_diff)
+    )
 
-        (closest_friendly_sy,
-         closest_enemy_sy,
-         min_friendly_distance,
-         min_enemy_distance) = point_to_closest_sy[p]
-
-        closest_sy = closest_friendly_sy if min_friendly_distance < min_enemy_distance else closest_enemy_sy
-        min_distance = min(min_friendly_distance, min_enemy_distance)
-        dist_diff = min_enemy_distance - min_friendly_distance
-
-        if (
-            not closest_sy
-            or closest_sy.player_id != player.game_id
-            or min_distance < 4
-            or min_distance > max_exp
-        ):
-            continue
+    if num_sys:
+        avg_dist_penalty = 10 * (sy_distances[:, is_friendly] ** 1.5).sum(axis=1) / num_sys
+    else:
+        avg_dist_penalty = np.zeros(size * size)
+    risk = _estimate_board_risk(player, f_dist + e_dist + 3)
+    help = _estimate_board_risk(player.opponents[0], f_dist + e_dist // 2) - 50
+    # enemy_penalty = max(3 * (risk - help // 2) * 16 / math.sqrt(dist_diff + 1), 0)
+    if not first_expansion_behind:
+        enemy_penalty = np.where(risk > help * 1.5, enemy_penalty + np.maximum(1000, enemy_penalty), enemy_penalty)
 
-        nearby_kore = sum(
-            (point_to_kore[x] ** 1.1) * g(p, x) * closer_bonus(point_to_closest_sy, x, p)
-            for x in p.nearby_points(10)
-        )
-        nearby_shipyards = sum(1 for x in board.all_shipyards if x.distance_from(p) < 5)
-        shipyard_penalty = 100 * nearby_shipyards
-        distance_penalty = 50 * min_distance
-        enemy_penalty = 0 if dist_diff >= 9 else \
-            3 * player.estimate_board_risk(p, min_friendly_distance + 3 + min_enemy_distance // 2) * (9 - dist_diff)
-
-        avg_dist_penalty = 10 * sum(x.distance_from(p) ** 1.5 for x in player.all_shipyards) / num_sys if num_sys else 0
-        risk = player.estimate_board_risk(p, min_friendly_distance + min_enemy_distance + 3)
-        help = player.opponents[0].estimate_board_risk(p, min_friendly_distance + min_enemy_distance // 2) - 50
-        # enemy_penalty = max(3 * (risk - help // 2) * 16 / math.sqrt(dist_diff + 1), 0)
-        if risk > help * 1.5 and not first_expansion_behind:
-            enemy_penalty += max(1000, enemy_penalty)
-        # logger.error(f"{p}, {risk}, {help}, {enemy_penalty}")
-
-        score = nearby_kore - shipyard_penalty - distance_penalty - enemy_penalty - avg_dist_penalty
-        shipyard_to_scores[closest_sy].append({
-            "score": score,
-            "point": p,
-            "nearby_kore": nearby_kore,
-            "shipyard_penalty": shipyard_penalty,
-            "distance_penalty": distance_penalty,
-            "enemy_penalty": enemy_penalty,
-            "avg_dist_penalty": avg_dist_penalty,
+    score = nearby_kore - (shipyard_penalty + distance_penalty + enemy_penalty + avg_dist_penalty)[candidates]
+
+    shipyard_to_scores = defaultdict(list)
+    for i, c in enumerate(candidates.tolist()):
+        shipyard_to_scores[shipyards[closest_friendly_sy.item(c)]].append({
+            "score": score.item(i),
+            "point": points[c],
+            "nearby_kore": nearby_kore.item(i),
+            "shipyard_penalty": shipyard_penalty.item(c),
+            "distance_penalty": distance_penalty.item(c),
+            "enemy_penalty": enemy_penalty.item(c),
+            "avg_dist_penalty": avg_dist_penalty.item(c),
         })
 
     max_kore_score = 1
@@ -222,7 +242,11 @@ def find_best_position_for_shipyards(player: Player) -> Dict[Shipyard, Point]:
                 scores.sort(key=lambda x: x["score"], reverse=True)
                 for i in range(0, min(NUM_SHOW_EXPANSIONS, len(scores))):
                     pose = scores[i]
-                    logger.info(f"Expansion {shipyard.point}->{pose['point']} Score: {pose['score']:.2f} Nearby kore: {pose['nearby_kore']:.2f} Shipyard: {pose['shipyard_penalty']}, Distance: {pose['distance_penalty']}, Enemy: {pose['enemy_penalty']:.2f}, Avg dist: {pose['avg_dist_penalty']:.2f}")
+                    logger.info(
+                        "Expansion %s->%s Score: %.2f Nearby kore: %.2f Shipyard: %s, Distance: %s, Enemy: %.2f, Avg dist: %.2f",
+                        shipyard.point, pose["point"], pose["score"], pose["nearby_kore"], pose["shipyard_penalty"],
+                        pose["distance_penalty"], pose["enemy_penalty"], pose["avg_dist_penalty"]
+                    )
 
     return shipyard_to_point
 
@@ -0,0 +1,134 @@
+import numpy as np
+import os
+from typing import List
+
+IS_KAGGLE = os.path.exists("/kaggle_simulations")
+
+# <--->
+if IS_KAGGLE:
+    from basic import collection_rate_for_ship_count
+    from occupancy import route_cells
+    from timing import timer
+else:
+    from .basic import collection_rate_for_ship_count
+    from .occupancy import route_cells
+    from .timing import timer
+
+# <--->
+
+
+class KoreForecast:
+    """
+    Expected kore at every point at every future step,
+    after the fleets that are already on the board have mined it.
+
+    Kore regeneration is not taken into account.
+    """
+
+    def __init__(self, board: "Board"):
+        size = board.size
+        n = size ** 2
+        self._size = size
+
+        fleets = board.fleets
+        tracks, _ = route_cells([f.route for f in fleets], size)
+        max_time = tracks.shape[1]
+        self._max_time = max_time
+
+        # time -> cell -> share of kore left after the fleets visiting the cell at this time
+        factors = np.ones((max_time, n))
+        if fleets:
+            rates = np.array([f.collection_rate for f in fleets])
+            fleet_index, times = np.nonzero(tracks >= 0)
+            np.multiply.at(factors, (times, tracks[fleet_index, times]), 1 - rates[fleet_index])
+
+        # time -> cell -> share of kore left before the step
+        depletion = np.ones((max_time + 1, n))
+        depletion[1:] = np.cumprod(factors, axis=0)
+
+        kore = np.array([p.kore for p in board.field.points.reshape(-1)])
+        self._grid = kore[None, :] * depletion
+
+    @property
+    def max_time(self) -> int:
+        return self._max_time
+
+    def grid(self) -> np.ndarray:
+        """
+        time -> x -> y -> kore, the last step is used for all later times
+        """
+        return self._grid.reshape(-1, self._size, self._size)
+
+    def expected_kore(self, route: "BoardRoute", ship_count: int, mining: bool = False) -> float:
+        """
+        kore collected by a fleet of the given size,
+        or the kore at the points of the route if mining is True
+        """
+        if timer.enabled:
+            timer.count("expected_kore")
+
+        rate = collection_rate_for_ship_count(ship_count)
+        if rate <= 0:
+            return 0
+
+        size = self._size
+        points = route.points()
+        point_to_time = {}
+        for t, p in enumerate(points):
+            point_to_time[p] = min(t + route.start_time, self._max_time)
+
+        point_to_kore = {}
+        for p, t in point_to_time.items():
+            point_to_kore[p] = self._grid.item(t, p.x * size + p.y)
+
+        res = 0
+        for p in points:
+            res += point_to_kore[p] if mining else point_to_kore[p] * rate
+            point_to_kore[p] *= (1 - rate)
+        return res
+
+    def expected_kore_many(
+        self, routes: List["BoardRoute"], ship_counts: List[int], mining: bool = False
+    ) -> np.ndarray:
+        """
+        the same as expected_kore for many routes at once
+        """
+        if not routes:
+            return np.zeros(0)
+
+        if timer.enabled:
+            timer.count("expected_kore", len(routes))
+
+        n = self._size ** 2
+        rates = np.array([collection_rate_for_ship_count(x) for x in ship_counts])
+        start_times = np.array([x.start_time for x in routes], dtype=int)
+
+        tracks, _ = route_cells(routes, self._size)
+        route_index, steps = np.nonzero(tracks >= 0)
+        cells = tracks[route_index, steps]
+        times = steps + start_times[route_index]
+
+        # the visits of the same cell by the same route are grouped in time order
+        keys = route_index * n + cells
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        is_first = np.ones(len(keys), dtype=bool)
+        is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        is_last = np.ones(len(keys), dtype=bool)
+        is_last[:-1] = is_first[1:]
+        group = np.cumsum(is_first) - 1
+
+        # the kore at the last visit is used, the earlier visits of the route mine it as well
+        num_visits = np.empty(len(keys), dtype=int)
+        num_visits[order] = np.arange(len(keys)) - np.flatnonzero(is_first)[group]
+        last_times = np.empty(len(keys), dtype=int)
+        last_times[order] = times[order][is_last][group]
+
+        kore = self._grid[np.minimum(last_times, self._max_time), cells]
+        kore = kore * (1 - rates[route_index]) ** num_visits
+        if not mining:
+            kore = kore * rates[route_index]
+
+        res = np.bincount(route_index, weights=kore, minlength=len(routes))
+        res[rates <= 0] = 0
+        return res
@@ -9,9 +9,11 @@ IS_KAGGLE = os.path.exists("/kaggle_simulations")
 if IS_KAGGLE:
     from basic import Obj, cached_call, cached_property, min_ship_count_for_flight_plan_len
     from logger import logger
+    from tables import GeometryTables, get_geometry_tables
 else:
     from .basic import Obj, cached_call, cached_property, min_ship_count_for_flight_plan_len
     from .logger import logger
+    from .tables import GeometryTables, get_geometry_tables
 
 # <--->
 
@@ -98,6 +100,7 @@ class Point(Obj):
         super().__init__(game_id=(field.size - y - 1) * field.size + x)
         self._x = x
         self._y = y
+        self._cell = x * field.size + y
         self._kore = kore
         self._field = field
 
@@ -129,9 +132,15 @@ class Point(Obj):
     def apply(self, action: Action) -> "Point":
         return self._field[(self.x + action.dx, self.y + action.dy)]
 
-    @cached_call
+    @property
+    def cell(self) -> int:
+        """
+        x * size + y, the index in GeometryTables
+        """
+        return self._cell
+
     def distance_from(self, point: "Point") -> int:
-        return sum(p.num_steps for p in self.dirs_to_h(point))
+        return self._field.tables.distance(self._cell, point._cell)
 
     @cached_property
     def adjacent_points(self) -> List["Point"]:
@@ -148,12 +157,8 @@ class Point(Obj):
     @cached_call
     def nearby_points(self, r: int) -> List["Point"]:
         if r > 1:
-            points = []
-            for p in self._field:
-                distance = self.distance_from(p)
-                if 0 < distance <= r:
-                    points.append(p)
-            return points
+            cells = self._field.tables.nearby_cells(self._cell, r)
+            return list(self._field.points.reshape(-1)[cells])
         elif r == 1:
             return self.adjacent_points
 
@@ -213,7 +218,9 @@ class Point(Obj):
 class Field:
     def __init__(self, size: int):
         self._size = size
+        self._tables = get_geometry_tables(size)
         self._points = self.create_array(size)
+        self._id_to_point = self.create_id_to_point()
 
     def __iter__(self) -> Generator[Point, None, None]:
         for row in self._points:
@@ -227,10 +234,23 @@ class Field:
                 ar[x, y] = point
         return ar
 
+    def create_id_to_point(self) -> List[Point]:
+        id_to_point = [None] * self._size ** 2
+        for p in self:
+            id_to_point[p.game_id] = p
+        return id_to_point
+
     @property
     def points(self) -> np.ndarray:
         return self._points
 
+    @property
+    def tables(self) -> GeometryTables:
+        return self._tables
+
+    def get_point_by_id(self, game_id: int) -> Point:
+        return self._id_to_point[game_id]
+
     def get_row(self, y: int, start: int, size: int) -> List[Point]:
         if size < 0:
             return self.get_row(y, start=start + size + 1, size=-size)[::-1]
@@ -353,6 +373,10 @@ class PlanRoute:
         return len(self.to_str())
 
     def min_fleet_size(self):
+        return self._min_fleet_size
+
+    @cached_property
+    def _min_fleet_size(self) -> int:
         return min_ship_count_for_flight_plan_len(self.command_length())
 
     def reverse(self) -> "PlanRoute":
@@ -416,6 +440,10 @@ class PlanRoute:
         return PlanRoute(paths)
 
     def to_str(self) -> str:
+        return self._str
+
+    @cached_property
+    def _str(self) -> str:
         if len(self.paths) == 0:
             return ""
         s = ""
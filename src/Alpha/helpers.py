@@ -1,5 +1,5 @@
 import os
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from math import pi, exp
 
 IS_KAGGLE = os.path.exists("/kaggle_simulations")
@@ -9,10 +9,12 @@ if IS_KAGGLE:
     from geometry import Point
     from board import Board, Player, BoardRoute, Shipyard, Spawn, DontLaunch
     from logger import logger
+    from shortcuts import get_shortcut_routes
 else:
     from .geometry import Point
     from .board import Board, Player, BoardRoute, Shipyard, Spawn, DontLaunch
     from .logger import logger
+    from .shortcuts import get_shortcut_routes
 
 # <--->
 
@@ -20,34 +22,27 @@ else:
 def is_intercept_route(
     route: BoardRoute, player: Player, safety=True, allow_shipyard_intercept=False, allowed_join_point=None
 ):
-    board = player.board
-
-    if not allow_shipyard_intercept:
-        shipyard_points = {x.point for x in board.shipyards}
-        future_sy_point_to_times = {x.point: x.time_to_build for x in board.future_shipyards}
-    else:
-        shipyard_points = {}
-        future_sy_point_to_times = {}
-
-    for time, point in enumerate(route.points()[:-1]):
-        if point in shipyard_points:
-            return True
-        if point in future_sy_point_to_times and \
-            future_sy_point_to_times[point] <= time:
-            return True
-
-        for pl in board.players:
-            is_enemy = pl != player
-
-            if point in pl.expected_fleets_positions[time]:
-                if allowed_join_point is None or pl.expected_fleets_positions[time][point].route.end != allowed_join_point:
-                    return True
+    return bool(
+        player.board.occupancy.intercepted(
+            [route], player, safety, allow_shipyard_intercept, allowed_join_point
+        )[0]
+    )
 
-            if safety and is_enemy:
-                if point in pl.expected_dmg_positions[time]:
-                    return True
 
-    return False
+def filter_intercept_routes(
+    routes: List[BoardRoute],
+    player: Player,
+    safety=True,
+    allow_shipyard_intercept=False,
+    allowed_join_point=None,
+) -> List[BoardRoute]:
+    """
+    the routes that are not intercepted, checked all at once
+    """
+    is_intercepted = player.board.occupancy.intercepted(
+        routes, player, safety, allow_shipyard_intercept, allowed_join_point
+    )
+    return [route for route, x in zip(routes, is_intercepted) if not x]
 
 
 def find_shortcut_routes(
@@ -62,37 +57,50 @@ def find_shortcut_routes(
     max_route_distance=None,
     allow_join=False,
 ) -> List[BoardRoute]:
-    if route_distance is None:
-        route_distance = start.distance_from(end)
-    routes = []
-    for p in board:
-        distance = start.distance_from(p) + p.distance_from(end)
-        if max_route_distance is None:
-            if distance != route_distance:
-                continue
-        elif distance > max_route_distance:
-            continue
-
-        plans = start.get_plans_through([p, end])
-
-        for plan in plans:
-            if num_ships < plan.min_fleet_size():
-                continue
-
-            route = BoardRoute(start, plan)
-
-            if is_intercept_route(
-                route,
-                player,
-                safety=safety,
-                allow_shipyard_intercept=allow_shipyard_intercept,
-                allowed_join_point=end if allow_join else None,
-            ):
-                continue
+    return get_shortcut_routes(board).routes(
+        start,
+        end,
+        player,
+        num_ships,
+        safety=safety,
+        allow_shipyard_intercept=allow_shipyard_intercept,
+        route_distance=route_distance,
+        max_route_distance=max_route_distance,
+        allow_join=allow_join,
+    )
 
-            routes.append(route)
 
-    return routes
+def find_best_shortcut_route(
+    board: Board,
+    start: Point,
+    end: Point,
+    player: Player,
+    num_ships: int,
+    ship_count: Optional[int] = None,
+    lowest: bool = False,
+    safety: bool = True,
+    allow_shipyard_intercept=False,
+    route_distance=None,
+    max_route_distance=None,
+    allow_join=False,
+) -> Optional[BoardRoute]:
+    """
+    the shortcut route with the most expected kore,
+    or with the least expected kore and then the shortest one if lowest is True
+    """
+    return get_shortcut_routes(board).best_route(
+        start,
+        end,
+        player,
+        num_ships,
+        ship_count=ship_count,
+        lowest=lowest,
+        safety=safety,
+        allow_shipyard_intercept=allow_shipyard_intercept,
+        route_distance=route_distance,
+        max_route_distance=max_route_distance,
+        allow_join=allow_join,
+    )
 
 
 def is_inevitable_victory(player: Player):
@@ -111,14 +119,14 @@ def is_inevitable_victory(player: Player):
 
 
 def find_closest_shipyards(player: Player, p: Point, shipyards=None) -> Tuple[Shipyard, Shipyard, int, int]:
-    board = player.board
+    if shipyards is None:
+        return player.nearest_built_shipyards.closest(p)
+
     closest_friendly_sy = None
     closest_enemy_sy = None
     min_friendly_distance = 100000
     min_enemy_distance = 100000
 
-    if shipyards is None:
-        shipyards = board.shipyards
     for shipyard in shipyards:
         distance = shipyard.distance_from(p)
         if shipyard.player_id != player.game_id:
@@ -174,21 +182,6 @@ def gaussian(x: float, mu: float, sigma: float):
     return 1 / (sigma * (2 * pi) ** 0.5) * exp(-0.5 * (x - mu) ** 2 / sigma ** 2)
 
 
-def create_scorer(sigma: float, mu: float = 0):
-    mid = gaussian(0, 0, sigma)
-    mid1 = gaussian(0, 0, 2 * sigma)
-    mid2 = gaussian(0, 0, 3 * sigma)
-    def g(p: Point, x: Point) -> float:
-        dx = abs(p.x - x.x)
-        dy = abs(p.y - x.y)
-        # if dx == 0 or dy == 0:
-        #     return gaussian(x.distance_from(p), 0, 3 * sigma) / mid2
-        # if dx == 1 or dy == 1:
-        #     return gaussian(x.distance_from(p), 0, 2 * sigma) / mid1
-        return gaussian(x.distance_from(p), mu, sigma) / mid
-    return g
-
-
 def _spawn(agent: Player, shipyard: Shipyard, dont_launch: bool = True):
     num_ships_to_spawn = min(
         int(agent.available_kore() // agent.board.spawn_cost),
@@ -0,0 +1,111 @@
+import math
+import numpy as np
+import os
+from typing import Generator, Optional, Tuple
+
+IS_KAGGLE = os.path.exists("/kaggle_simulations")
+
+# <--->
+if IS_KAGGLE:
+    from basic import collection_rate_for_ship_count
+    from geometry import Point, PlanRoute
+else:
+    from .basic import collection_rate_for_ship_count
+    from .geometry import Point, PlanRoute
+
+# <--->
+
+
+class KoreIndex:
+    """
+    Cyclic prefix sums of the kore along the rows and the columns of the board,
+    the kore of any straight segment comes back in O(1)
+    and the kore of a plan in O(number of paths).
+
+    The kore is taken as it is now, so it is an upper bound of what a fleet
+    can mine later on the same points. With a ship count the kore is weighted
+    by the collection rate of the fleet, an upper bound of what it collects.
+    """
+
+    # the length of a path with an infinite number of steps, the same as BoardPath
+    max_path_length = 31
+
+    def __init__(self, board: "Board"):
+        field = board.field
+        size = field.size
+        self._size = size
+        self._field = field
+
+        kore = np.array([p.kore for p in field.points.reshape(-1)]).reshape(size, size)
+        self._kore = kore
+        # y -> kore of the row
+        self._row_totals = kore.sum(axis=0).tolist()
+        # x -> kore of the column
+        self._column_totals = kore.sum(axis=1).tolist()
+        # y -> i -> kore of the cells x < i of the row y, the row is repeated twice
+        twice = np.concatenate([kore, kore], axis=0)
+        self._row_sums = np.concatenate([np.zeros((1, size)), np.cumsum(twice, axis=0)]).T.tolist()
+        # x -> i -> kore of the cells y < i of the column x, the column is repeated twice
+        twice = np.concatenate([kore, kore], axis=1)
+        self._column_sums = np.concatenate([np.zeros((size, 1)), np.cumsum(twice, axis=1)], axis=1).tolist()
+
+    @property
+    def kore(self) -> np.ndarray:
+        """
+        x -> y -> kore
+        """
+        return self._kore
+
+    def segment_kore(self, x: int, y: int, dx: int, dy: int, num_steps: int) -> float:
+        """
+        kore of the points the fleet passes moving num_steps from (x, y),
+        the start point is not included
+        """
+        size = self._size
+        num_loops, num_steps = divmod(num_steps, size)
+        if dx:
+            sums, total = self._row_sums[y], self._row_totals[y]
+            start = (x + 1) % size if dx > 0 else (x - num_steps) % size
+        else:
+            sums, total = self._column_sums[x], self._column_totals[x]
+            start = (y + 1) % size if dy > 0 else (y - num_steps) % size
+        return num_loops * total + sums[start + num_steps] - sums[start]
+
+    def _iter_segments(self, start: Point, plan: PlanRoute) -> Generator[Tuple[int, int, int, int, int], None, None]:
+        """
+        x, y, dx, dy, num_steps of every straight segment of the plan
+        """
+        size = self._size
+        x, y = start.x, start.y
+        for path in plan.paths:
+            num_steps = path.num_steps
+            if not num_steps:
+                continue
+            if num_steps == math.inf:
+                num_steps = self.max_path_length
+            direction = path.direction
+            dx, dy = direction.dx, direction.dy
+            yield x, y, dx, dy, num_steps
+            x = (x + dx * num_steps) % size
+            y = (y + dy * num_steps) % size
+
+    def plan_kore(self, start: Point, plan: PlanRoute, ship_count: Optional[int] = None) -> float:
+        """
+        kore of all the points of the route, a point visited twice is counted twice
+        """
+        segment_kore = self.segment_kore
+        kore = sum(segment_kore(*x) for x in self._iter_segments(start, plan))
+        if ship_count is not None:
+            kore *= collection_rate_for_ship_count(ship_count)
+        return kore
+
+    def route_kore(self, route: "BoardRoute", ship_count: Optional[int] = None) -> float:
+        return self.plan_kore(route.start, route.plan, ship_count)
+
+    def plan_end(self, start: Point, plan: PlanRoute) -> Point:
+        size = self._size
+        x, y = start.x, start.y
+        for _, _, dx, dy, num_steps in self._iter_segments(start, plan):
+            x = (x + dx * num_steps) % size
+            y = (y + dy * num_steps) % size
+        return self._field[x, y]
@@ -1,11 +1,32 @@
+import atexit
 import os
 import logging
+import logging.handlers
+import queue
+from collections import deque
 
+# {pid} is replaced by the id of the process, for the games played in parallel
 FILE = "game.log"
 IS_KAGGLE = os.path.exists("/kaggle_simulations")
 LEVEL = logging.DEBUG if not IS_KAGGLE else logging.INFO
 LOGGING_ENABLED = True
 
+# how the records are written:
+# SYNC - printed and written to the file by the agent itself
+# QUEUE - printed and written to the file by a background thread
+# RING - kept in memory for the last RING_BUFFER_TURNS turns and written only by dump_log,
+#        the agent calls it when a turn fails
+SYNC = "sync"
+QUEUE = "queue"
+RING = "ring"
+# the output of the agent on Kaggle is collected per turn, so it has to be written in time
+MODE = SYNC if IS_KAGGLE else QUEUE
+RING_BUFFER_TURNS = 10
+
+_listener = None
+_ring_buffer = None
+_file_handler = None
+
 
 class _FileHandler(logging.FileHandler):
     def emit(self, record):
@@ -17,25 +38,110 @@ class _FileHandler(logging.FileHandler):
             super().emit(record)
 
 
+class _RingBufferHandler(logging.Handler):
+    """
+    Keeps the records of the last turns in memory and passes them
+    to the target handler when dumped, like MemoryHandler.
+    The messages are formatted only then.
+    """
+
+    def __init__(self, num_turns: int, target: logging.Handler):
+        super().__init__()
+        self._turns = deque([[]], maxlen=num_turns)
+        self._target = target
+
+    def start_turn(self):
+        self._turns.append([])
+
+    def emit(self, record):
+        if not LOGGING_ENABLED:
+            return
+
+        self._turns[-1].append(record)
+
+    def dump(self):
+        for records in self._turns:
+            for record in records:
+                self._target.handle(record)
+        self._turns.clear()
+        self._turns.append([])
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def log_file() -> str:
+    """
+    the log file of this process
+    """
+    return FILE.format(pid=os.getpid())
+
+
 def init_logger(_logger):
+    global _listener
+    global _ring_buffer
+    global _file_handler
+
     if not LOGGING_ENABLED:
         return
 
-    if not IS_KAGGLE:
-        if os.path.exists(FILE):
-            os.remove(FILE)
-
     while _logger.hasHandlers():
         _logger.removeHandler(_logger.handlers[0])
+    _stop_listener()
+    _ring_buffer = None
+    if _file_handler is not None:
+        _file_handler.close()
+
+    file_name = log_file()
+    if not IS_KAGGLE:
+        if os.path.exists(file_name):
+            os.remove(file_name)
 
     _logger.setLevel(LEVEL)
-    ch = _FileHandler(FILE)
+    ch = _FileHandler(file_name)
+    _file_handler = ch
     ch.setLevel(LEVEL)
     formatter = logging.Formatter(
         "%(levelname)s - %(message)s", datefmt="%H-%M-%S"
     )
     ch.setFormatter(formatter)
-    _logger.addHandler(ch)
+
+    if MODE == QUEUE:
+        records = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, ch)
+        _listener.start()
+        handler = logging.handlers.QueueHandler(records)
+    elif MODE == RING:
+        _ring_buffer = _RingBufferHandler(RING_BUFFER_TURNS, ch)
+        handler = _ring_buffer
+    else:
+        handler = ch
+
+    handler.setLevel(LEVEL)
+    _logger.addHandler(handler)
+
+
+def start_log_turn():
+    """
+    starts a new turn in the ring buffer
+    """
+    if _ring_buffer is not None:
+        _ring_buffer.start_turn()
+
+
+def dump_log():
+    """
+    writes the records of the ring buffer
+    """
+    if _ring_buffer is not None:
+        _ring_buffer.dump()
 
 
 if IS_KAGGLE:
@@ -8,23 +8,25 @@ IS_KAGGLE = os.path.exists("/kaggle_simulations")
 if IS_KAGGLE:
     from board import Board
     from geometry import Point
-    from logger import logger, init_logger
+    from logger import logger, init_logger, start_log_turn, dump_log
     from offence import capture_shipyards, coordinate_shipyard_capture, whittle_attack
     from defence import defend_shipyards
     from expansion import expand
     from mining import mine
     from control import spawn, greedy_spawn, adjacent_attack, direct_attack, save_kore, conservative_save_kore
     from state import State, Memory
+    from timing import timer
 else:
     from .board import Board
     from .geometry import Point
-    from .logger import logger, init_logger
+    from .logger import logger, init_logger, start_log_turn, dump_log
     from .offence import capture_shipyards, coordinate_shipyard_capture, whittle_attack
     from .defence import defend_shipyards
     from .expansion import expand
     from .mining import mine
     from .control import spawn, greedy_spawn, adjacent_attack, direct_attack, save_kore, conservative_save_kore
     from .state import State, Memory
+    from .timing import timer
 # <--->
 
 prev_state: State = State()
@@ -42,7 +44,10 @@ def agent(obs, conf):
     if not initialized:
         init_logger(logger)
 
-    board = Board(obs, conf)
+    timer.start_turn(obs["step"])
+    start_log_turn()
+    with timer.phase("board"):
+        board = Board(obs, conf)
     step = board.step
     my_id = obs["player"]
     remaining_time = obs["remainingOverageTime"]
@@ -71,27 +76,41 @@ def agent(obs, conf):
             logger.info(f"State: {prev_state}")
         a.state = prev_state
 
-        memory.update_memory(a)
+        with timer.phase("update_memory"):
+            memory.update_memory(a)
         a.memory = memory
         # logger.info(f"Memory: {memory}")
 
-        conservative_save_kore(a)
-        defend_shipyards(a, self_built_sys)
-        save_kore(a)
-        coordinate_shipyard_capture(a)
-        capture_shipyards(a)
-        expand(a, step, self_built_sys, lost_sys)
-        whittle_attack(a, step)
-        adjacent_attack(a)
-        direct_attack(a)
-        greedy_spawn(a)
-        mine(a, remaining_time)
-        spawn(a)
+        with timer.phase("conservative_save_kore"):
+            conservative_save_kore(a)
+        with timer.phase("defend_shipyards"):
+            defend_shipyards(a, self_built_sys)
+        with timer.phase("save_kore"):
+            save_kore(a)
+        with timer.phase("coordinate_shipyard_capture"):
+            coordinate_shipyard_capture(a)
+        with timer.phase("capture_shipyards"):
+            capture_shipyards(a)
+        with timer.phase("expand"):
+            expand(a, step, self_built_sys, lost_sys)
+        with timer.phase("whittle_attack"):
+            whittle_attack(a, step)
+        with timer.phase("adjacent_attack"):
+            adjacent_attack(a)
+        with timer.phase("direct_attack"):
+            direct_attack(a)
+        with timer.phase("greedy_spawn"):
+            greedy_spawn(a)
+        with timer.phase("mine"):
+            mine(a)
+        with timer.phase("spawn"):
+            spawn(a)
 
         prev_state = a.state
         memory = a.memory
     except:
         logger.error(traceback.format_exc())
+        dump_log()
         prev_state = State()
         memory = Memory()
         if not IS_KAGGLE:
@@ -100,4 +119,7 @@ def agent(obs, conf):
     if not initialized:
         initialized = True
 
+    if timer.enabled and board.steps_left <= 1:
+        logger.info(f"Timings:\n{timer.table()}")
+
     return a.actions()
@@ -2,7 +2,8 @@ import random
 import itertools
 import numpy as np
 import os
-from typing import List, Dict
+import time
+from typing import Callable, Generator, List, Optional, Tuple
 from collections import defaultdict
 
 IS_KAGGLE = os.path.exists("/kaggle_simulations")
@@ -11,24 +12,33 @@ IS_KAGGLE = os.path.exists("/kaggle_simulations")
 if IS_KAGGLE:
     from geometry import PlanRoute, Point, ACTION_TO_ORTH_ACTIONS, PlanPath, ACTION_TO_OPPOSITE_ACTION, ALL_DIRECTIONS
     from board import Player, BoardRoute, Launch, Shipyard, MiningRoute, Board, AllowMine, HailMary, DirectAttack
-    from helpers import is_intercept_route, find_closest_shipyards, _spawn
+    from helpers import filter_intercept_routes, _spawn
     from logger import logger
+    from plan_cache import get_mining_plan_cache
+    from scheduler import is_expired
 else:
     from .geometry import PlanRoute, Point, ACTION_TO_ORTH_ACTIONS, PlanPath, ACTION_TO_OPPOSITE_ACTION, ALL_DIRECTIONS
     from .board import Player, BoardRoute, Launch, Shipyard, MiningRoute, Board, AllowMine, HailMary, DirectAttack
-    from .helpers import is_intercept_route, find_closest_shipyards, _spawn
+    from .helpers import filter_intercept_routes, _spawn
     from .logger import logger
+    from .plan_cache import get_mining_plan_cache
+    from .scheduler import is_expired
 
 # <--->
 
 SHOW_ROUTES = False
 NUM_SHOW_ROUTES = 5
+# the mining routes through a second point when there is overage time to spare,
+# off until a tournament.py run shows that the change of play is an improvement
+USE_SECOND_POINTS = False
 
-def mine(agent: Player, remaining_time: float):
+def mine(agent: Player):
     board = agent.board
     if not agent.opponents:
         return
 
+    deadline = board.scheduler.deadline("mine")
+
     safety = False
     my_ship_count = agent.ship_count
 
@@ -59,8 +69,7 @@ def mine(agent: Player, remaining_time: float):
     shipyard_production_capacity = agent.shipyard_production_capacity
     num_turns_to_deplete_kore = agent.kore / (board.spawn_cost * shipyard_production_capacity) if shipyard_production_capacity > 0 else 500
     can_deplete_kore_fast = num_turns_to_deplete_kore < 5
-    # use_second_points = len(agent.all_shipyards) < 10 and remaining_time > 30
-    use_second_points = False
+    use_second_points = USE_SECOND_POINTS and len(agent.all_shipyards) < 10 and board.scheduler.has_surplus()
 
     fleet_distance = []
     for sy in agent.all_shipyards:
@@ -71,29 +80,18 @@ def mine(agent: Player, remaining_time: float):
     mean_fleet_distance = sum(fleet_distance) / len(fleet_distance)
     target_mean_distance = 10
 
-    def get_best_plan_through_points(p1: Point, p2: Point, cache: Dict[Point, Dict[Point, PlanRoute]]={}):
-        if p1 in cache:
-            if p2 in cache[p1]:
-                return cache[p1][p2]
-        else:
-            cache[p1] = {}
-
-        plans = p1.dirs_to(p2)
-        paths = [PlanRoute(plan) for plan in plans]
-        best_route = max(
-            (BoardRoute(p1, path) for path in paths),
-            key=lambda x: x.expected_kore(board, 20)
-        )
+    plan_cache = get_mining_plan_cache(board.field)
 
-        cache[p1][p2] = best_route.plan
-        return best_route.plan
+    def get_best_plan_through_points(p1: Point, p2: Point) -> PlanRoute:
+        return plan_cache.best_plan(board, p1, p2, 20)
 
-    def score_route(route: BoardRoute, num_ships_to_launch: int, board_risk: int, free_ships: int) -> float:
+    def score_route(
+        route: BoardRoute, exp_kore: float, num_ships_to_launch: int, board_risk: int, free_ships: int
+    ) -> float:
         # Don't do short routes if we need to spawn
         if num_turns_to_deplete_kore > 1 and len(route) == 2:
             return 0
 
-        exp_kore = route.expected_kore_mining(board, num_ships_to_launch)
         if my_ship_count < 50:
             if exp_kore < 10:
                 return 0
@@ -108,7 +106,15 @@ def mine(agent: Player, remaining_time: float):
     def is_short_route(route):
         return len(route) < 6
 
-    for sy in agent.shipyards:
+    for sy_index, sy in enumerate(agent.shipyards):
+        num_shipyards_left = len(agent.shipyards) - sy_index
+        if is_expired(deadline):
+            logger.info("No time left for mining from %d shipyards", num_shipyards_left)
+            break
+        # the time left is shared by the shipyards that are left
+        now = time.perf_counter()
+        sy_deadline = now + (deadline - now) / num_shipyards_left
+
         sy_max_dist = max_distance
         forced_destination = None
         max_time = max_distance * 2
@@ -132,15 +138,44 @@ def mine(agent: Player, remaining_time: float):
         (closest_friendly_sy,
          closest_enemy_sy,
          min_friendly_distance,
-         min_enemy_distance) = find_closest_shipyards(agent, sy.point, board.all_shipyards)
+         min_enemy_distance) = agent.nearest_shipyards.closest(sy.point)
 
-        routes = find_shipyard_mining_routes(
+        search = find_shipyard_mining_routes(
             sy, get_best_plan_through_points, safety=safety, max_distance=sy_max_dist, use_second_points=use_second_points,
-            forced_destination=forced_destination, max_time=max_time
+            forced_destination=forced_destination, max_time=max_time, deadline=sy_deadline
         )
 
+        def upper_bound(plan: PlanRoute, wait_time: int, kore: float) -> float:
+            # the mined kore is at most the kore at the points of the route now,
+            # and the fleet is at most max(free_ships, my_ship_count // 5, min_fleet_size) ships
+            num_ships = max(free_ships, my_ship_count // 5, plan.min_fleet_size())
+            return (kore * (1 + 1e-9) + 1e-9) / (plan.num_steps + wait_time) + num_ships / free_ships
+
         route_to_info = {}
-        for route in routes:
+        route_to_position = {}
+        candidates = []
+
+        def score_candidates():
+            exp_kores = board.kore_forecast.expected_kore_many(
+                [x[0] for x in candidates], [x[1] for x in candidates], mining=True
+            ).tolist()
+            for (route, num_ships_to_launch, board_risk, optimistic_board_risk), exp_kore in zip(candidates, exp_kores):
+                score = score_route(route, exp_kore, num_ships_to_launch, board_risk, free_ships)
+                route_to_info[route] = (score, num_ships_to_launch, board_risk, optimistic_board_risk)
+            candidates.clear()
+
+        # branch and bound: the routes come in the order of the upper bound of the score,
+        # the search stops when the bound is below the best score
+        best_score = None
+        for bound, position, route in search.iter_routes(upper_bound):
+            if is_expired(sy_deadline):
+                break
+            if len(candidates) >= search.batch_size:
+                score_candidates()
+                best_score = max(x[0] for x in route_to_info.values()) if route_to_info else None
+            if best_score is not None and bound < best_score:
+                break
+
             route_points = route.points()
             if len(route_points) > 6:
                 route_points = route_points[:-3]
@@ -180,19 +215,23 @@ def mine(agent: Player, remaining_time: float):
                 if min_enemy_distance < 10 and sy.estimate_shipyard_power(min_enemy_distance) - dec < closest_enemy_sy.ship_count:
                     continue
 
-            score = score_route(route, num_ships_to_launch, board_risk, free_ships)
-            route_to_info[route] = (score, num_ships_to_launch, board_risk, optimistic_board_risk)
+            candidates.append((route, num_ships_to_launch, board_risk, optimistic_board_risk))
+            route_to_position[route] = position
+
+        score_candidates()
 
         if not route_to_info:
-            logger.info(f"No mining routes for {sy.point}")
+            logger.info("No mining routes for %s", sy.point)
             continue
 
-        items = sorted(route_to_info.items(), key=lambda x: x[1], reverse=True)
+        # the routes with the same info in the order of the plans
+        items = sorted(route_to_info.items(), key=lambda x: route_to_position[x[0]])
+        items.sort(key=lambda x: x[1], reverse=True)
         if SHOW_ROUTES:
             for i in range(0, min(len(items), NUM_SHOW_ROUTES)):
                 route = items[i][0]
                 score, num_ships_to_launch, board_risk, optimistic_board_risk = route_to_info[route]
-                logger.info(f"{sy.point} Mining Route: {route.plan}, {score}, {board_risk}")
+                logger.info("%s Mining Route: %s, %s, %s", sy.point, route.plan, score, board_risk)
 
         for i in range(min(1, len(items))):
             # best_route = max(route_to_info, key=lambda x: route_to_info[x][0])
@@ -204,24 +243,32 @@ def mine(agent: Player, remaining_time: float):
                 agent, best_route, can_deplete_kore_fast, num_ships_to_launch,
                 sy, mean_fleet_distance
             ):
-                logger.info(f"{sy.point} should spawn not launch small fleet. {best_route.plan} {num_ships_to_launch}")
+                logger.info("%s should spawn not launch small fleet. %s %s", sy.point, best_route.plan, num_ships_to_launch)
                 _spawn(agent, sy)
                 continue
             if best_route.can_execute():
-                logger.info(f"{sy.point} Mining Route: {best_route.plan}, {score:.2f}, {num_ships_to_launch} > {board_risk}. {optimistic_board_risk}")
+                logger.info(
+                    "%s Mining Route: %s, %.2f, %s > %s. %s",
+                    sy.point, best_route.plan, score, num_ships_to_launch, board_risk, optimistic_board_risk
+                )
                 if isinstance(sy.action, DirectAttack):
                     attack_score = sy.action.score
                     if score < attack_score:
-                        logger.info(f"Mining route worse than current attack. {score} < {attack_score}")
+                        logger.info("Mining route worse than current attack. %s < %s", score, attack_score)
                         continue
                     else:
-                        logger.info(f"Overriding attack with mining route {best_route.plan}")
+                        logger.info("Overriding attack with mining route %s", best_route.plan)
                 sy.action = Launch(num_ships_to_launch, best_route)
                 break
             else:
-                logger.info(f"{sy.point} Waiting for Route: {best_route.plan}, {score:.2f}, {num_ships_to_launch} > {board_risk}. {optimistic_board_risk} in {best_route.time_to_mine}")
+                logger.info(
+                    "%s Waiting for Route: %s, %.2f, %s > %s. %s in %s",
+                    sy.point, best_route.plan, score, num_ships_to_launch, board_risk, optimistic_board_risk,
+                    best_route.time_to_mine
+                )
                 break
 
+    logger.debug("Mining plan cache: %s", plan_cache.stats)
 
 
 def should_not_launch_small_fleet(
@@ -251,10 +298,10 @@ def should_not_launch_small_fleet(
 
 def find_shipyard_mining_routes(
     sy: Shipyard, get_best_plan_through_points, safety=True, max_distance: int = 15, use_second_points: int = False,
-    forced_destination: Point = None, max_time: int = 30
-) -> List[BoardRoute]:
+    forced_destination: Point = None, max_time: int = 30, deadline: float = float("inf")
+) -> "MiningSearch":
     if max_distance < 1:
-        return []
+        return MiningSearch(sy, safety)
 
     departure = sy.point
     player = sy.player
@@ -272,12 +319,12 @@ def find_shipyard_mining_routes(
         incoming_allied_power = sum(x.ship_count for x in choice_sy.incoming_allied_fleets)
         future_power = choice_sy.ship_count + incoming_allied_power - incoming_hostile_power
         if future_power <= 0:
-            logger.debug(f"Forced dest is sieged {choice_sy.point}")
+            logger.debug("Forced dest is sieged %s", choice_sy.point)
             return
 
         avg_ships = player.ship_count / max(len(player.all_shipyards), 1)
         if future_power > avg_ships:
-            logger.debug(f"Forced dest has enough ships {choice_sy.point}")
+            logger.debug("Forced dest has enough ships %s", choice_sy.point)
             return
 
         sorted_sys = sorted(sy.player.shipyards, key=lambda x: x.distance_from(choice_sy))
@@ -294,7 +341,7 @@ def find_shipyard_mining_routes(
     force_destination_to(young_sys, 2)
 
     if forced_destination:
-        logger.info(f"{sy.point} Forcing mining to {forced_destination}")
+        logger.info("%s Forcing mining to %s", sy.point, forced_destination)
 
     def get_destinations(shipyards):
         destinations = set()
@@ -313,10 +360,11 @@ def find_shipyard_mining_routes(
     destinations = get_destinations(sy.player.shipyards)
     future_destinations = get_destinations(sy.player.future_shipyards)
 
-    routes = []
-    route_set = set()
+    search = MiningSearch(sy, safety)
     if use_second_points:
         for c in sy.point.nearby_points(max_distance):
+            if is_expired(deadline):
+                break
             if c == departure or any(c == x.point for x in destinations):
                 continue
 
@@ -341,21 +389,15 @@ def find_shipyard_mining_routes(
                     points = [departure] + cs + [destination]
                     best_plan = get_greedy_mining_plan_through(points, board, get_best_plan_through_points)
                     wait_time = sy.calc_time_for_ships_for_action(best_plan.min_fleet_size())
-                    route = MiningRoute(departure, best_plan, wait_time)
 
-                    if len(route) > max_time:
+                    if best_plan.num_steps + wait_time > max_time:
                         continue
 
-                    if route.plan.to_str() in route_set:
-                        continue
-
-                    if is_intercept_route(route, player, safety):
-                        continue
-
-                    routes.append(route)
-                    route_set.add(route.plan.to_str())
+                    search.add_plan(best_plan, wait_time)
     else:
         for c in sy.point.nearby_points(max_distance):
+            if is_expired(deadline):
+                break
             if c == departure or any(c == x.point for x in destinations):
                 continue
 
@@ -369,77 +411,80 @@ def find_shipyard_mining_routes(
             dest_sy = min(temp_dests, key=lambda x: c.distance_from(x.point))
 
             destination = dest_sy.point
-            plans = departure.get_plans_through([c, destination])
+            plans = board.catalogue.plans_through(departure, [c, destination])
 
             for plan in plans:
                 wait_time = sy.calc_time_for_ships_for_action(plan.min_fleet_size())
-                route = MiningRoute(departure, plan, wait_time)
 
-                if len(route) > max_time:
-                    continue
-
-                if route.plan.to_str() in route_set:
-                    continue
-
-                if is_intercept_route(route, player, safety):
+                if plan.num_steps + wait_time > max_time:
                     continue
 
                 # if wait_time > 2:
                 #     continue
 
-                routes.append(route)
-                route_set.add(route.plan.to_str())
+                search.add_plan(plan, wait_time)
 
-    def is_yoyo(route):
-        return len(route.plan.paths) == 2 and route.plan.paths[0].num_steps > 1 and route.start == route.end
-    
-    def is_flat_rectangle(route):
-        return len(route.plan.paths) == 4 and \
-            route.plan.paths[0].num_steps > 1 and \
-            route.plan.paths[1].num_steps == 1 and \
-            route.plan.paths[2].num_steps > 1 and route.start == route.end
-
-    orig_len = len(routes)
-    new_plans = []
-    for i in range(orig_len):
-        route = routes[i]
-        if is_yoyo(route):
-            first_action = route.first_action()
-            last_action = route.last_action()
+    kore_index = board.kore_index
+
+    def is_round_trip(plan):
+        return kore_index.plan_end(departure, plan) == departure
+
+    def is_yoyo(plan):
+        return len(plan.paths) == 2 and plan.paths[0].num_steps > 1 and is_round_trip(plan)
+
+    def is_flat_rectangle(plan):
+        return len(plan.paths) == 4 and \
+            plan.paths[0].num_steps > 1 and \
+            plan.paths[1].num_steps == 1 and \
+            plan.paths[2].num_steps > 1 and is_round_trip(plan)
+
+    def add_variant(plan, parent=None):
+        if not is_round_trip(plan):
+            return
+        wait_time = sy.calc_time_for_ships_for_action(plan.min_fleet_size())
+        search.add_variant(plan, wait_time, parent)
+
+    # the variants of a plan are only used if the plan passes the interception check,
+    # the search checks it when it gets to the variant
+    for base_plan in list(search.plans):
+        paths = base_plan.paths
+        if is_yoyo(base_plan):
+            first_action = paths[0].direction
+            last_action = paths[-1].direction
             for orth in ACTION_TO_ORTH_ACTIONS[first_action]:
                 opp_orth = ACTION_TO_OPPOSITE_ACTION[orth]
                 # E8W -> NE8W(X)SW
-                for n in range(1, route.plan.paths[0].num_steps):
-                    plan = PlanRoute([PlanPath(orth, 1), route.plan.paths[0], PlanPath(route.plan.paths[1].direction, n), PlanPath(opp_orth, 1), PlanPath(last_action, route.plan.paths[0].num_steps - n)])
-                    new_plans.append(plan)
+                for n in range(1, paths[0].num_steps):
+                    plan = PlanRoute([PlanPath(orth, 1), paths[0], PlanPath(paths[1].direction, n), PlanPath(opp_orth, 1), PlanPath(last_action, paths[0].num_steps - n)])
+                    add_variant(plan, base_plan)
                 # E8W -> E8WSNW
-                plan = PlanRoute([route.plan.paths[0], PlanPath(route.plan.paths[1].direction, 1), PlanPath(orth, 1), PlanPath(opp_orth, 1), PlanPath(last_action, route.plan.paths[0].num_steps - 1)])
-                new_plans.append(plan)
-        elif is_flat_rectangle(route):
+                plan = PlanRoute([paths[0], PlanPath(paths[1].direction, 1), PlanPath(orth, 1), PlanPath(opp_orth, 1), PlanPath(last_action, paths[0].num_steps - 1)])
+                add_variant(plan, base_plan)
+        elif is_flat_rectangle(base_plan):
             # E4NW4S -> E4NW2SW
-            for n in range(1, route.plan.paths[0].num_steps):
-                opp_dir = ACTION_TO_OPPOSITE_ACTION[route.plan.paths[1].direction]
-                plan = PlanRoute([route.plan.paths[0], route.plan.paths[1], PlanPath(route.plan.paths[2].direction, n), PlanPath(opp_dir, 1), PlanPath(route.plan.paths[2].direction, route.plan.paths[0].num_steps - n)])
-                new_plans.append(plan)
+            for n in range(1, paths[0].num_steps):
+                opp_dir = ACTION_TO_OPPOSITE_ACTION[paths[1].direction]
+                plan = PlanRoute([paths[0], paths[1], PlanPath(paths[2].direction, n), PlanPath(opp_dir, 1), PlanPath(paths[2].direction, paths[0].num_steps - n)])
+                add_variant(plan, base_plan)
 
             # E4NW4S -> NE4NW4S
-            last_action = route.last_action()
+            last_action = paths[-1].direction
             opp_orth = ACTION_TO_OPPOSITE_ACTION[last_action]
-            plan = PlanRoute([PlanPath(opp_orth, 1)] + route.plan.paths[:-1] + [PlanPath(last_action, route.plan.paths[-1].num_steps + 1)])
-            new_plans.append(plan)
+            plan = PlanRoute([PlanPath(opp_orth, 1)] + paths[:-1] + [PlanPath(last_action, paths[-1].num_steps + 1)])
+            add_variant(plan, base_plan)
 
             # E4NW4S -> E4NWESW
-            opp_dir = ACTION_TO_OPPOSITE_ACTION[route.plan.paths[1].direction]
-            plan = PlanRoute([route.plan.paths[0], route.plan.paths[1], PlanPath(route.plan.paths[2].direction, 1), PlanPath(route.plan.paths[0].direction, 1), PlanPath(opp_dir, 1), PlanPath(route.plan.paths[2].direction, route.plan.paths[0].num_steps)])
-            new_plans.append(plan)
-    
+            opp_dir = ACTION_TO_OPPOSITE_ACTION[paths[1].direction]
+            plan = PlanRoute([paths[0], paths[1], PlanPath(paths[2].direction, 1), PlanPath(paths[0].direction, 1), PlanPath(opp_dir, 1), PlanPath(paths[2].direction, paths[0].num_steps)])
+            add_variant(plan, base_plan)
+
     # N2W20S
     for dir in ALL_DIRECTIONS:
         opp_dir = ACTION_TO_OPPOSITE_ACTION[dir]
         for orth_dir in ACTION_TO_ORTH_ACTIONS[dir]:
             for n in range(1,6):
                 plan = PlanRoute([PlanPath(dir, n), PlanPath(orth_dir, 21), PlanPath(opp_dir, n)])
-                new_plans.append(plan)
+                add_variant(plan)
 
     # N4WEN
     for dir in ALL_DIRECTIONS:
@@ -447,25 +492,105 @@ def find_shipyard_mining_routes(
             opp_orth = ACTION_TO_OPPOSITE_ACTION[orth_dir]
             for n in range(1,10):
                 plan = PlanRoute([PlanPath(dir, n), PlanPath(orth_dir, 1), PlanPath(opp_orth, 1), PlanPath(dir, n)])
-                new_plans.append(plan)
-
-    for plan in new_plans:
-        wait_time = sy.calc_time_for_ships_for_action(plan.min_fleet_size())
-        new_route = MiningRoute(departure, plan, wait_time)
-
-        if new_route.plan.to_str() in route_set:
-            continue
-
-        if is_intercept_route(new_route, player, safety):
-            continue
-
-        if new_route.start != new_route.end:
-            continue
-
-        routes.append(new_route)
-        route_set.add(new_route.plan.to_str())
+                add_variant(plan)
+
+    return search
+
+
+class MiningSearch:
+    """
+    Mining plans of a shipyard, the routes are built and checked for interception
+    lazily, in the order of an upper bound of their score.
+
+    Every plan keeps its position in the list of all the plans,
+    so the ties between the routes are broken the same way as if all of them were scored.
+    A variant is derived from one or more plans and is only used if one of them
+    passes the interception check, its position is the one of the first such plan.
+    """
+
+    batch_size = 32
+
+    def __init__(self, sy: Shipyard, safety: bool):
+        self._sy = sy
+        self._safety = safety
+        # plan str -> plan, wait time, [(position, parent plan str or None), ...]
+        self._plans = {}
+        self._num_plans = 0
+        self._num_variants = 0
+        # plan str -> route, None if the route can be intercepted
+        self._routes = {}
+
+    def __len__(self):
+        return len(self._plans)
+
+    @property
+    def plans(self) -> List[PlanRoute]:
+        return [plan for plan, _, _ in self._plans.values()]
+
+    def add_plan(self, plan: PlanRoute, wait_time: int):
+        s = plan.to_str()
+        if s not in self._plans:
+            self._plans[s] = (plan, wait_time, [((0, self._num_plans), None)])
+            self._num_plans += 1
+
+    def add_variant(self, plan: PlanRoute, wait_time: int, parent: Optional[PlanRoute] = None):
+        s = plan.to_str()
+        position = (1, self._num_variants)
+        self._num_variants += 1
+        parent = parent.to_str() if parent is not None else None
+        if s not in self._plans:
+            self._plans[s] = (plan, wait_time, [(position, parent)])
+        else:
+            positions = self._plans[s][2]
+            if positions[0][1] is not None:
+                positions.append((position, parent))
 
-    return routes
+    def _check_interception(self, plans: List[str]):
+        plans = [s for s in plans if s not in self._routes]
+        if not plans:
+            return
+        sy = self._sy
+        routes = []
+        for s in plans:
+            plan, wait_time, _ = self._plans[s]
+            routes.append(MiningRoute(sy.point, plan, wait_time))
+        safe_routes = set(filter_intercept_routes(routes, sy.player, self._safety))
+        for s, route in zip(plans, routes):
+            self._routes[s] = route if route in safe_routes else None
+
+    def _get_position(self, s: str) -> Optional[Tuple[int, int]]:
+        for position, parent in self._plans[s][2]:
+            if parent is None or self._routes[parent] is not None:
+                return position
+
+    def iter_routes(
+        self, upper_bound: Callable[[PlanRoute, int, float], float]
+    ) -> Generator[Tuple[float, Tuple[int, int], MiningRoute], None, None]:
+        """
+        upper bound of the score, position, route,
+        upper_bound gets the plan, the wait time and the kore at the points of the route
+        """
+        sy = self._sy
+        kore_index = sy.board.kore_index
+        items = []
+        for s, (plan, wait_time, positions) in self._plans.items():
+            bound = upper_bound(plan, wait_time, kore_index.plan_kore(sy.point, plan))
+            items.append((-bound, positions[0][0], s))
+        items.sort()
+
+        for i in range(0, len(items), self.batch_size):
+            batch = items[i:i + self.batch_size]
+            parents = [p for _, _, s in batch for _, p in self._plans[s][2] if p is not None]
+            self._check_interception(parents)
+            self._check_interception([s for _, _, s in batch])
+            for bound, _, s in batch:
+                route = self._routes[s]
+                if route is None:
+                    continue
+                position = self._get_position(s)
+                if position is None:
+                    continue
+                yield -bound, position, route
 
 
 def get_greedy_mining_plan_through(points: List["Point"], board: Board, get_best_plan_through_points) -> PlanRoute:
@@ -0,0 +1,101 @@
+import numpy as np
+import os
+from typing import List, Optional, Tuple, Union
+
+IS_KAGGLE = os.path.exists("/kaggle_simulations")
+
+# <--->
+if IS_KAGGLE:
+    from geometry import Field, Point
+else:
+    from .geometry import Field, Point
+
+# <--->
+
+
+class NearestShipyards:
+    """
+    The nearest friendly and the nearest enemy shipyard of every cell of the board,
+    cell = x * size + y.
+
+    Built once per turn from the distance table of the field.
+    Ties are broken by the order of the shipyards, the same as a linear scan.
+    The index is -1 and the distance is 100000 if there are no such shipyards.
+    """
+
+    def __init__(self, field: Field, shipyards: List[Union["Shipyard", "FutureShipyard"]], player_id: int):
+        self._shipyards = list(shipyards)
+        num_cells = field.size ** 2
+        self._is_friendly = np.array([sy.player_id == player_id for sy in self._shipyards], dtype=bool)
+
+        # cell -> shipyard -> distance
+        cells = [sy.point.cell for sy in self._shipyards]
+        self._distances = field.tables.distances[:, cells].astype(int).reshape(num_cells, len(cells))
+
+        res = []
+        for mask in (self._is_friendly, ~self._is_friendly):
+            if not mask.any():
+                res.append((np.full(num_cells, -1), np.full(num_cells, 100000)))
+                continue
+            indexes = np.flatnonzero(mask)
+            closest = indexes[self._distances[:, indexes].argmin(axis=1)]
+            res.append((closest, self._distances[np.arange(num_cells), closest]))
+        (self._friendly_indexes, self._friendly_distances), (self._enemy_indexes, self._enemy_distances) = res
+
+    @property
+    def shipyards(self) -> List[Union["Shipyard", "FutureShipyard"]]:
+        return self._shipyards
+
+    @property
+    def is_friendly(self) -> np.ndarray:
+        """
+        shipyard -> is friendly
+        """
+        return self._is_friendly
+
+    @property
+    def distances(self) -> np.ndarray:
+        """
+        cell -> shipyard -> distance
+        """
+        return self._distances
+
+    @property
+    def friendly_indexes(self) -> np.ndarray:
+        return self._friendly_indexes
+
+    @property
+    def enemy_indexes(self) -> np.ndarray:
+        return self._enemy_indexes
+
+    @property
+    def friendly_distances(self) -> np.ndarray:
+        return self._friendly_distances
+
+    @property
+    def enemy_distances(self) -> np.ndarray:
+        return self._enemy_distances
+
+    def _get_shipyard(self, index: int) -> Optional[Union["Shipyard", "FutureShipyard"]]:
+        return self._shipyards[index] if index >= 0 else None
+
+    def closest_friendly(self, p: Point) -> Optional[Union["Shipyard", "FutureShipyard"]]:
+        return self._get_shipyard(self._friendly_indexes.item(p.cell))
+
+    def closest_enemy(self, p: Point) -> Optional[Union["Shipyard", "FutureShipyard"]]:
+        return self._get_shipyard(self._enemy_indexes.item(p.cell))
+
+    def closest(self, p: Point) -> Tuple[
+        Optional[Union["Shipyard", "FutureShipyard"]], Optional[Union["Shipyard", "FutureShipyard"]], int, int
+    ]:
+        """
+        the same as helpers.find_closest_shipyards:
+        closest friendly shipyard, closest enemy shipyard, friendly distance, enemy distance
+        """
+        cell = p.cell
+        return (
+            self._get_shipyard(self._friendly_indexes.item(cell)),
+            self._get_shipyard(self._enemy_indexes.item(cell)),
+            self._friendly_distances.item(cell),
+            self._enemy_distances.item(cell),
+        )
@@ -0,0 +1,175 @@
+import numpy as np
+import os
+from typing import List, Optional, Tuple
+
+IS_KAGGLE = os.path.exists("/kaggle_simulations")
+
+# <--->
+if IS_KAGGLE:
+    from geometry import Point
+    from timing import timer
+else:
+    from .geometry import Point
+    from .timing import timer
+
+# <--->
+
+
+def route_cells(routes: List["BoardRoute"], size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    route -> time -> cell (-1 after the end of the route), cell = x * size + y
+    and the lengths of the routes
+    """
+    # route, time, x, y, dx, dy, num_steps for every path
+    paths = []
+    lengths = []
+    for i, route in enumerate(routes):
+        time = 0
+        for path in route.paths:
+            num_steps = len(path)
+            if num_steps:
+                action = path.plan.direction
+                paths.append((i, time, path.start.x, path.start.y, action.dx, action.dy, num_steps))
+                time += num_steps
+        lengths.append(time)
+
+    lengths = np.array(lengths, dtype=int)
+    cells = np.full((len(routes), max(lengths, default=0) + 1), -1, dtype=int)
+    if paths:
+        route, time, x, y, dx, dy, num_steps = np.array(paths, dtype=int).T
+        steps = np.arange(num_steps.sum()) - np.repeat(np.cumsum(num_steps) - num_steps, num_steps) + 1
+        x = (np.repeat(x, num_steps) + np.repeat(dx, num_steps) * steps) % size
+        y = (np.repeat(y, num_steps) + np.repeat(dy, num_steps) * steps) % size
+        cells[np.repeat(route, num_steps), np.repeat(time, num_steps) + steps - 1] = x * size + y
+    return cells, lengths
+
+
+def adjacent_cells(size: int) -> np.ndarray:
+    """
+    cell -> 4 adjacent cells
+    """
+    x, y = np.divmod(np.arange(size * size), size)
+    return np.stack(
+        [
+            ((x + 1) % size) * size + y,
+            ((x - 1) % size) * size + y,
+            x * size + (y + 1) % size,
+            x * size + (y - 1) % size,
+        ],
+        axis=1,
+    )
+
+
+class OccupancyIndex:
+    """
+    Expected positions of all fleets and the points they can damage,
+    as dense time -> cell arrays, built once per turn.
+
+    The same checks as the old Player.expected_fleets_positions
+    and Player.expected_dmg_positions dicts, but for many routes at once.
+    """
+
+    def __init__(self, board: "Board"):
+        size = board.size
+        n = size ** 2
+        self._size = size
+
+        players = board.players
+        self._player_index = {pl.game_id: i for i, pl in enumerate(players)}
+
+        fleets = [f for pl in players for f in pl.fleets]
+        tracks, lengths = route_cells([f.route for f in fleets], size)
+        tracks = tracks[:, :-1]
+        max_time = tracks.shape[1]
+        self._max_time = max_time
+
+        # the last row is empty, it is used for the times after the end of all routes
+        shape = (len(players), max_time + 1, n)
+
+        # player -> time -> cell -> route end of the fleet, -1 if there is no fleet
+        # if there are several fleets the last one is used
+        self._fleet_ends = np.full(shape, -1, dtype=int)
+        # player -> time -> cell -> there is an adjacent fleet
+        self._dmg = np.zeros(shape, dtype=bool)
+
+        self._shipyards = np.zeros(n, dtype=bool)
+        for sy in board.shipyards:
+            self._shipyards[sy.point.x * size + sy.point.y] = True
+
+        # cell -> time to build, the last future shipyard at the point is used
+        self._future_shipyard_times = np.full(n, np.iinfo(int).max, dtype=int)
+        for sy in board.future_shipyards:
+            self._future_shipyard_times[sy.point.x * size + sy.point.y] = sy.time_to_build
+
+        if fleets:
+            is_on_route = np.arange(max_time)[None, :] < lengths[:, None]
+            fleet_players = np.array([self._player_index[f.player_id] for f in fleets], dtype=int)
+            fleet_ends = np.array([f.route.end.x * size + f.route.end.y for f in fleets], dtype=int)
+
+            players = np.broadcast_to(fleet_players[:, None], tracks.shape)[is_on_route]
+            times = np.broadcast_to(np.arange(max_time), tracks.shape)[is_on_route]
+            ends = np.broadcast_to(fleet_ends[:, None], tracks.shape)[is_on_route]
+            cells = tracks[is_on_route]
+
+            # the last fleet wins, fleets are ordered by players
+            keys = (players * (max_time + 1) + times) * n + cells
+            _, last = np.unique(keys[::-1], return_index=True)
+            last = len(keys) - 1 - last
+            self._fleet_ends.reshape(-1)[keys[last]] = ends[last]
+
+            is_free = ~self._shipyards[cells]
+            adjacent = adjacent_cells(size)[cells[is_free]]
+            self._dmg[players[is_free, None], times[is_free, None], adjacent] = True
+
+        self._any_fleet = (self._fleet_ends >= 0).any(axis=0)
+        self._enemy_dmg = {}
+
+    def _get_enemy_dmg(self, player_id: int) -> np.ndarray:
+        if player_id not in self._enemy_dmg:
+            others = [i for pid, i in self._player_index.items() if pid != player_id]
+            self._enemy_dmg[player_id] = self._dmg[others].any(axis=0)
+        return self._enemy_dmg[player_id]
+
+    def intercepted(
+        self,
+        routes: List["BoardRoute"],
+        player: "Player",
+        safety: bool = True,
+        allow_shipyard_intercept: bool = False,
+        allowed_join_point: Optional[Point] = None,
+    ) -> np.ndarray:
+        """
+        route -> the route meets a shipyard, a fleet or enemy damage on its way
+        (the last point of the route is not checked)
+        """
+        if not routes:
+            return np.zeros(0, dtype=bool)
+
+        if timer.enabled:
+            timer.count("intercept_checks", len(routes))
+
+        tracks, lengths = route_cells(routes, self._size)
+        num_times = tracks.shape[1]
+        times = np.arange(num_times)[None, :]
+        is_checked = times < lengths[:, None] - 1
+        cells = np.where(is_checked, tracks, 0)
+
+        is_blocked = np.zeros(cells.shape, dtype=bool)
+
+        if not allow_shipyard_intercept:
+            is_blocked |= self._shipyards[cells]
+            is_blocked |= self._future_shipyard_times[cells] <= times
+
+        times = np.broadcast_to(np.minimum(times, self._max_time), cells.shape)
+
+        if allowed_join_point is None:
+            is_blocked |= self._any_fleet[times, cells]
+        else:
+            join_cell = allowed_join_point.x * self._size + allowed_join_point.y
+            fleet_ends = self._fleet_ends[:, times, cells]
+            is_blocked |= ((fleet_ends >= 0) & (fleet_ends != join_cell)).any(axis=0)
+
+        if safety:
+            is_blocked |= self._get_enemy_dmg(player.game_id)[times, cells]
+
+        return (is_blocked & is_checked).any(axis=1)
@@ -1,4 +1,3 @@
-from collections import defaultdict
 from math import floor
 import numpy as np
 import os
@@ -7,18 +6,18 @@ IS_KAGGLE = os.path.exists("/kaggle_simulations")
 
 # <--->
 if IS_KAGGLE:
-    from basic import max_ships_to_spawn
-    from board import Player, Shipyard, Launch, FutureShipyard
+    from board import Player, Shipyard, Launch
     from geometry import Point
-    from helpers import find_shortcut_routes, _spawn
+    from helpers import find_shortcut_routes, find_best_shortcut_route, _spawn
     from logger import logger
+    from scheduler import is_expired
     from state import CoordinatedAttack, PrepCoordinatedAttack, State
 else:
-    from .basic import max_ships_to_spawn
-    from .board import Player, Shipyard, Launch, FutureShipyard
+    from .board import Player, Shipyard, Launch
     from .geometry import Point
-    from .helpers import find_shortcut_routes, _spawn
+    from .helpers import find_shortcut_routes, find_best_shortcut_route, _spawn
     from .logger import logger
+    from .scheduler import is_expired
     from .state import CoordinatedAttack, PrepCoordinatedAttack, State
 
 # <--->
@@ -40,54 +39,7 @@ class _ShipyardTarget:
         return 1
 
     def estimate_shipyard_power(self, time):
-        help_power = 0
-        board = self.shipyard.board
-        player_id = self.shipyard.player_id
-        player = board.get_player(player_id)
-
-        time_to_fleet_kore = defaultdict(int)
-        shipyard_reinforcements = defaultdict(lambda: defaultdict(int))
-        for sy in player.all_shipyards:
-            for f in sy.incoming_allied_fleets:
-                time_to_fleet_kore[f.eta] += f.expected_kore()
-                shipyard_reinforcements[sy][f.eta] += f.ship_count
-            for f in sy.incoming_hostile_fleets:
-                shipyard_reinforcements[sy][f.eta] -= f.ship_count
-
-        spawn_cost = board.spawn_cost
-        player_kore = player.kore
-        own_power = self.shipyard.ship_count
-        help_power = 0
-        for t in range(0, time):
-            # Prioritize spawning at the target
-            player_kore += time_to_fleet_kore[t]
-            own_power += shipyard_reinforcements[self.shipyard][t]
-            can_spawn = max_ships_to_spawn(self.shipyard.turns_controlled + t)
-            spawn_count = min(int(player_kore // spawn_cost), can_spawn)
-            player_kore -= spawn_count * spawn_cost
-            own_power += spawn_count
-
-            for sy in player.all_shipyards:
-                if sy == self.shipyard:
-                    continue
-                if isinstance(sy, FutureShipyard) and sy.time_to_build < t:
-                    continue
-
-                help_time = sy.distance_from(self.shipyard)
-                if time - t < help_time:
-                    continue
-                if t == 0 or (isinstance(sy, FutureShipyard) and sy.time_to_build == t):
-                    help_power += sy.ship_count
-
-                can_spawn = max_ships_to_spawn(sy.turns_controlled + t)
-                spawn_count = min(int(player_kore // spawn_cost), can_spawn)
-                player_kore -= spawn_count * spawn_cost
-                help_power += shipyard_reinforcements[sy][t]
-                if time - t != help_time:
-                    help_power += spawn_count
-
-        # logger.error(f"{self.shipyard.point}, Time: {time} Own power: {own_power}, Help power: {help_power}")
-        return own_power + help_power
+        return self.shipyard.player.economy.defence_power(self.shipyard, time)
 
     def can_attack_from(self, point: Point) -> bool:
         if isinstance(self.shipyard, Shipyard):
@@ -154,15 +106,14 @@ def capture_shipyards(agent: Player, max_attack_distance: int = 10, max_time_to_
 
             num_ships_to_launch = min(sy.available_ship_count, max(int(power * 1.2), 21))
 
-            routes = find_shortcut_routes(
+            best_route = find_best_shortcut_route(
                 board,
                 sy.point,
                 t.point,
                 agent,
                 num_ships_to_launch,
             )
-            if routes:
-                best_route = max(routes, key=lambda route: route.expected_kore(board, num_ships_to_launch))
+            if best_route is not None:
                 logger.info(
                     f"Attack shipyard {sy.point}->{t.point} with {num_ships_to_launch} > {power}"
                 )
@@ -186,6 +137,7 @@ def coordinate_shipyard_capture(agent: Player, max_attack_distance: int = 10, se
         return
 
     board = agent.board
+    deadline = board.scheduler.deadline("coordinate_shipyard_capture")
     agent_shipyards = [
         x for x in agent.shipyards if x.available_ship_count >= 3 and not x.action
     ]
@@ -240,6 +192,9 @@ def coordinate_shipyard_capture(agent: Player, max_attack_distance: int = 10, se
     #         was_prepping = isinstance(agent.state, State)
 
     for t in targets:
+        if is_expired(deadline):
+            logger.info("No time left for coordinated attacks")
+            break
         shipyards = filter(
             lambda x: x.point.distance_from(t.point) <= max_attack_distance,
             agent_shipyards
@@ -248,6 +203,8 @@ def coordinate_shipyard_capture(agent: Player, max_attack_distance: int = 10, se
 
         loaded_attack = False
         for i in range(2, len(shipyards) + 1):
+            if is_expired(deadline):
+                break
             shipyard_to_launch = {}
             total_power = 0
             max_sy_dist = max(x.distance_from(t.point) for x in shipyards[:i])
@@ -307,6 +264,11 @@ def coordinate_shipyard_capture(agent: Player, max_attack_distance: int = 10, se
 WHITTLE_COOLDOWN = 20
 last_whittle_attack = -WHITTLE_COOLDOWN
 
+
+def reset_whittle_attack():
+    global last_whittle_attack
+    last_whittle_attack = -WHITTLE_COOLDOWN
+
 def should_whittle_attack(agent: Player, step: int, min_overage: int = 50):
     global last_whittle_attack
     board = agent.board
@@ -392,17 +354,17 @@ def whittle_attack(agent: Player, step: int,
                 continue
 
             num_ships_to_launch = min(max(whittle_power, int(agent.ship_count / 10)), sy.available_ship_count)
-            routes = find_shortcut_routes(
+            best_route = find_best_shortcut_route(
                 board,
                 sy.point,
                 t.point,
                 agent,
                 num_ships_to_launch,
+                lowest=True,
                 max_route_distance=min(distance+4, max_attack_distance)
             )
 
-            if routes:
-                best_route = min(routes, key=lambda route: (route.expected_kore(board, num_ships_to_launch), len(route)))
+            if best_route is not None:
                 if best_route.expected_kore(board, num_ships_to_launch) > 50:
                     continue
                 logger.info(
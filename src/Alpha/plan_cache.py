@@ -0,0 +1,163 @@
+import numpy as np
+import os
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Tuple
+
+IS_KAGGLE = os.path.exists("/kaggle_simulations")
+
+# <--->
+if IS_KAGGLE:
+    from board import Board, BoardRoute
+    from geometry import Field, Point, PlanRoute
+    from occupancy import route_cells
+else:
+    from .board import Board, BoardRoute
+    from .geometry import Field, Point, PlanRoute
+    from .occupancy import route_cells
+
+# <--->
+
+_PLAN_CACHE = None
+
+
+def get_mining_plan_cache(field: Field) -> "MiningPlanCache":
+    global _PLAN_CACHE
+    if _PLAN_CACHE is None or _PLAN_CACHE.field is not field:
+        _PLAN_CACHE = MiningPlanCache(field)
+    return _PLAN_CACHE
+
+
+def reset_mining_plan_cache():
+    """
+    the answers depend on the kore of the game, a new game starts with an empty cache
+    """
+    global _PLAN_CACHE
+    _PLAN_CACHE = None
+
+
+def fleet_size_bucket(ship_count: int) -> int:
+    """
+    fleets of 2^(k-1) <= ship_count < 2^k ships share the cached plans
+    """
+    return int(ship_count).bit_length()
+
+
+class MiningPlanCache:
+    """
+    The plan with the most expected kore between two points, kept across the turns.
+
+    The answer depends only on the kore and the fleets at the cells of the two L-shaped plans,
+    so an entry is dropped when the kore at one of these cells drifts by more than
+    the regeneration does since the entries of the cell were stored,
+    or the fleets that will pass through it change.
+    Least recently used entries are evicted when the cache is full.
+    """
+
+    max_size = 50000
+    # relative change of the kore at a cell, the kore regenerates by 2% per turn
+    kore_tolerance = 0.05
+
+    def __init__(self, field: Field):
+        self._field = field
+        # (start cell, end cell, fleet size bucket) -> plan, cells of both plans
+        self._entries: "OrderedDict[Tuple[int, int, int], Tuple[PlanRoute, List[int]]]" = OrderedDict()
+        # cell -> keys of the entries that depend on it
+        self._cell_to_keys: Dict[int, set] = defaultdict(set)
+
+        self._step = None
+        # cell -> kore when the entries that depend on it were stored, nan if there are none
+        self._kore = np.full(field.size ** 2, np.nan)
+        # cell -> fleet visits and ships at the last update
+        self._visits = None
+        self._ships = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def field(self) -> Field:
+        return self._field
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "evicted": self.evicted,
+        }
+
+    def _drop(self, key: Tuple[int, int, int]):
+        _, cells = self._entries.pop(key)
+        for cell in cells:
+            keys = self._cell_to_keys[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cell_to_keys[cell]
+                self._kore[cell] = np.nan
+
+    def _update(self, board: Board):
+        """
+        drops the entries that depend on the cells changed since they were stored
+        """
+        if self._step == board.step:
+            return
+        self._step = board.step
+
+        n = self._field.size ** 2
+        kore = board.kore_index.kore.reshape(-1)
+        fleets = board.fleets
+        tracks, _ = route_cells([f.route for f in fleets], self._field.size)
+        fleet_index, times = np.nonzero(tracks >= 0)
+        cells = tracks[fleet_index, times]
+        visits = np.bincount(cells, minlength=n)
+        ships = np.bincount(cells, weights=np.array([f.ship_count for f in fleets])[fleet_index], minlength=n)
+
+        # the comparisons with nan are false, the cells without entries never change
+        changed = np.abs(kore - self._kore) > self.kore_tolerance * np.maximum(self._kore, 1)
+        if self._visits is not None:
+            changed |= (visits != self._visits) | (ships != self._ships)
+        for cell in np.flatnonzero(changed).tolist():
+            for key in list(self._cell_to_keys.get(cell, ())):
+                self._drop(key)
+                self.invalidated += 1
+
+        self._visits = visits
+        self._ships = ships
+
+    def best_plan(self, board: Board, p1: Point, p2: Point, ship_count: int) -> PlanRoute:
+        """
+        the L-shaped plan from p1 to p2 with the most expected kore for a fleet of ship_count ships
+        """
+        self._update(board)
+
+        key = (p1.cell, p2.cell, fleet_size_bucket(ship_count))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        self.misses += 1
+        routes = [BoardRoute(p1, PlanRoute(plan)) for plan in p1.dirs_to(p2)]
+        best_route = max(routes, key=lambda x: x.expected_kore(board, ship_count))
+
+        cells = sorted({p.cell for route in routes for p in route.points()})
+        self._entries[key] = (best_route.plan, cells)
+        kore = board.kore_index.kore.reshape(-1)
+        for cell in cells:
+            if cell not in self._cell_to_keys:
+                self._kore[cell] = kore[cell]
+            self._cell_to_keys[cell].add(key)
+
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+            self.evicted += 1
+
+        return best_route.plan
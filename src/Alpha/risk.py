@@ -0,0 +1,89 @@
+import numpy as np
+import os
+from typing import List, Union
+
+IS_KAGGLE = os.path.exists("/kaggle_simulations")
+
+# <--->
+if IS_KAGGLE:
+    from geometry import Field, Point
+else:
+    from .geometry import Field, Point
+
+# <--->
+
+
+def _toroidal_distances(field: Field, points: List[Point]) -> np.ndarray:
+    """
+    shipyard -> x -> y -> distance
+    """
+    size = field.size
+    coords = np.arange(size)
+    xs = np.array([p.x for p in points])[:, None]
+    ys = np.array([p.y for p in points])[:, None]
+    dx = np.abs(coords[None, :] - xs)
+    dy = np.abs(coords[None, :] - ys)
+    dx = np.minimum(dx, size - dx)
+    dy = np.minimum(dy, size - dy)
+    return dx[:, :, None] + dy[:, None, :]
+
+
+class BoardRisk:
+    """
+    Max power the given shipyards can send to every point of the board.
+
+    Both the pessimistic and the optimistic estimates are stored as
+    `(time, x, y)` arrays, together with the "adjacent" variant
+    which takes the max over the four neighbours of a point.
+    """
+
+    def __init__(self, field: Field, shipyards: List[Union["Shipyard", "FutureShipyard"]], max_time: int = 40):
+        self._max_time = max_time
+        size = field.size
+        shape = (max_time + 1, size, size)
+
+        if not shipyards:
+            self._not_adj = np.zeros((2,) + shape, dtype=int)
+            self._adj = np.zeros((2,) + shape, dtype=int)
+            return
+
+        # shipyard -> time -> power
+        curves = np.array(
+            [[sy.estimate_shipyard_power(t) for t in range(max_time + 1)] for sy in shipyards]
+        )
+        ship_counts = np.array([sy.ship_count for sy in shipyards])
+
+        distances = _toroidal_distances(field, [sy.point for sy in shipyards])
+        times = np.arange(max_time + 1)[:, None, None, None]
+        departure_times = times - distances[None]
+        can_reach = departure_times >= 0
+
+        sy_index = np.arange(len(shipyards))[None, :, None, None]
+        power = np.where(can_reach, curves[sy_index, np.maximum(departure_times, 0)], 0)
+
+        pessimistic = power.max(axis=1)
+        optimistic = (power - ship_counts[None, :, None, None]).max(axis=1)
+        self._not_adj = np.stack([pessimistic, optimistic])
+        self._adj = np.maximum.reduce([
+            np.roll(self._not_adj, 1, axis=2),
+            np.roll(self._not_adj, -1, axis=2),
+            np.roll(self._not_adj, 1, axis=3),
+            np.roll(self._not_adj, -1, axis=3),
+        ])
+
+    @property
+    def max_time(self) -> int:
+        return self._max_time
+
+    def risk(self, p: Point, time: int, pessimistic: bool = True) -> int:
+        return self._adj.item(0 if pessimistic else 1, time, p.x, p.y)
+
+    def risk_not_adj(self, p: Point, time: int, pessimistic: bool = True) -> int:
+        return self._not_adj.item(0 if pessimistic else 1, time, p.x, p.y)
+
+    def grid(self, pessimistic: bool = True, adjacent: bool = True) -> np.ndarray:
+        """
+        time -> x -> y -> power
+        """
+        data = self._adj if adjacent else self._not_adj
+        return data[0 if pessimistic else 1]
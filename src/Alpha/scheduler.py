@@ -0,0 +1,63 @@
+import time
+
+# the agent phases in the order they run and their shares of the turn time
+PHASE_SHARES = {
+    "conservative_save_kore": 0.1,
+    "defend_shipyards": 0.5,
+    "save_kore": 0.1,
+    "coordinate_shipyard_capture": 1,
+    "capture_shipyards": 1,
+    "expand": 1,
+    "whittle_attack": 0.5,
+    "adjacent_attack": 0.5,
+    "direct_attack": 1,
+    "greedy_spawn": 0.1,
+    "mine": 6,
+    "spawn": 0.1,
+}
+
+
+def is_expired(deadline: float) -> bool:
+    return time.perf_counter() > deadline
+
+
+class TurnScheduler:
+    """
+    Splits the time of a turn between the agent phases.
+
+    The turn gets actTimeout minus a safety margin plus an even share
+    of the remaining overage time over the steps left.
+    A phase gets a deadline when it starts: its share of the time that is left,
+    compared to the phases after it, so an early phase that finishes quickly
+    leaves more time for the later ones.
+    """
+
+    # time for the board, the actions and the environment
+    safety_margin = 0.5
+    # the overage time needed to spend the surplus on deeper searches
+    surplus_overage_time = 30
+
+    def __init__(self, act_timeout: float, remaining_overage_time: float, steps_left: int):
+        self._start = time.perf_counter()
+        self._remaining_overage_time = remaining_overage_time
+        overage_share = remaining_overage_time / max(steps_left, 1)
+        self._budget = max(act_timeout - self.safety_margin, 0) + overage_share
+        self._end = self._start + self._budget
+
+    @property
+    def budget(self) -> float:
+        return self._budget
+
+    def time_left(self) -> float:
+        return max(self._end - time.perf_counter(), 0)
+
+    def deadline(self, phase: str) -> float:
+        phases = list(PHASE_SHARES)
+        shares = [PHASE_SHARES[x] for x in phases[phases.index(phase):]]
+        return time.perf_counter() + self.time_left() * shares[0] / sum(shares)
+
+    def has_surplus(self) -> bool:
+        """
+        plenty of overage time left, deeper searches are affordable
+        """
+        return self._remaining_overage_time > self.surplus_overage_time
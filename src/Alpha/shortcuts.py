@@ -0,0 +1,184 @@
+import numpy as np
+import os
+from typing import Dict, List, Optional, Tuple
+
+IS_KAGGLE = os.path.exists("/kaggle_simulations")
+
+# <--->
+if IS_KAGGLE:
+    from basic import max_flight_plan_len_for_ship_count, min_ship_count_for_flight_plan_len
+    from board import Board, Player, BoardRoute
+    from geometry import Point
+    from timing import timer
+else:
+    from .basic import max_flight_plan_len_for_ship_count, min_ship_count_for_flight_plan_len
+    from .board import Board, Player, BoardRoute
+    from .geometry import Point
+    from .timing import timer
+
+# <--->
+
+_SHORTCUTS = None
+
+
+def get_shortcut_routes(board: Board) -> "ShortcutRoutes":
+    global _SHORTCUTS
+    if _SHORTCUTS is None or _SHORTCUTS.board is not board:
+        _SHORTCUTS = ShortcutRoutes(board)
+    return _SHORTCUTS
+
+
+def max_plan_len_for_ship_count(ship_count: int) -> int:
+    """
+    the longest plan with min_fleet_size <= ship_count,
+    max_flight_plan_len_for_ship_count can be one off because of the rounding
+    """
+    if ship_count < 1:
+        return 0
+    plan_len = max_flight_plan_len_for_ship_count(ship_count)
+    while min_ship_count_for_flight_plan_len(plan_len + 1) <= ship_count:
+        plan_len += 1
+    while plan_len > 0 and min_ship_count_for_flight_plan_len(plan_len) > ship_count:
+        plan_len -= 1
+    return plan_len
+
+
+class ShortcutRoutes:
+    """
+    The shortest routes from start to end through one more point, kept for the turn.
+
+    The points are the ones of the "ellipse" of the distance table:
+    dist(start, p) + dist(p, end) is the distance of the route or at most the max distance.
+    The same plan through different points is taken once, in the order of the points.
+    The fleet size only limits the length of the plans,
+    so the routes that are not intercepted are shared by all fleet sizes.
+    """
+
+    def __init__(self, board: Board):
+        self._board = board
+        # search -> routes that are not intercepted
+        self._routes: Dict[Tuple, List[BoardRoute]] = {}
+        # search, max plan length -> routes
+        self._fleet_routes: Dict[Tuple, List[BoardRoute]] = {}
+        # search, max plan length, ship count, lowest -> route
+        self._best_routes: Dict[Tuple, Optional[BoardRoute]] = {}
+
+    @property
+    def board(self) -> Board:
+        return self._board
+
+    def _get_routes(self, key: Tuple, start: Point, end: Point, player: Player) -> List[BoardRoute]:
+        routes = self._routes.get(key)
+        if routes is not None:
+            return routes
+
+        if timer.enabled:
+            timer.count("shortcut_searches")
+
+        _, _, _, safety, allow_shipyard_intercept, allow_join, route_distance, max_route_distance = key
+        board = self._board
+        distances = board.field.tables.distances
+        distance = distances[start.cell].astype(int) + distances[:, end.cell]
+        if max_route_distance is None:
+            cells = np.flatnonzero(distance == route_distance)
+        else:
+            cells = np.flatnonzero(distance <= max_route_distance)
+
+        routes = []
+        plans = set()
+        for p in board.field.points.reshape(-1)[cells]:
+            for plan in board.catalogue.plans_through(start, [p, end]):
+                s = plan.to_str()
+                if s in plans:
+                    continue
+                plans.add(s)
+                routes.append(BoardRoute(start, plan))
+
+        is_intercepted = board.occupancy.intercepted(
+            routes, player, safety, allow_shipyard_intercept, end if allow_join else None
+        )
+        routes = [route for route, x in zip(routes, is_intercepted) if not x]
+        self._routes[key] = routes
+        return routes
+
+    def routes(
+        self,
+        start: Point,
+        end: Point,
+        player: Player,
+        num_ships: int,
+        safety: bool = True,
+        allow_shipyard_intercept=False,
+        route_distance=None,
+        max_route_distance=None,
+        allow_join=False,
+    ) -> List[BoardRoute]:
+        """
+        the same as helpers.find_shortcut_routes, without the repeated plans
+        """
+        return list(self._get_fleet_routes(
+            start, end, player, num_ships, safety, allow_shipyard_intercept,
+            route_distance, max_route_distance, allow_join
+        )[1])
+
+    def _get_fleet_routes(
+        self, start, end, player, num_ships, safety, allow_shipyard_intercept,
+        route_distance, max_route_distance, allow_join
+    ) -> Tuple[Tuple, List[BoardRoute]]:
+        if max_route_distance is not None:
+            route_distance = None
+        elif route_distance is None:
+            route_distance = start.distance_from(end)
+
+        key = (
+            start.cell, end.cell, player.game_id, safety, allow_shipyard_intercept,
+            allow_join, route_distance, max_route_distance
+        )
+        fleet_key = key + (max_plan_len_for_ship_count(num_ships),)
+        routes = self._fleet_routes.get(fleet_key)
+        if routes is None:
+            max_plan_len = fleet_key[-1]
+            routes = [
+                x for x in self._get_routes(key, start, end, player) if x.plan.command_length() <= max_plan_len
+            ]
+            self._fleet_routes[fleet_key] = routes
+        return fleet_key, routes
+
+    def best_route(
+        self,
+        start: Point,
+        end: Point,
+        player: Player,
+        num_ships: int,
+        ship_count: Optional[int] = None,
+        lowest: bool = False,
+        safety: bool = True,
+        allow_shipyard_intercept=False,
+        route_distance=None,
+        max_route_distance=None,
+        allow_join=False,
+    ) -> Optional[BoardRoute]:
+        """
+        the route with the most expected kore for a fleet of ship_count ships (num_ships by default),
+        or the one with the least expected kore and then the shortest one if lowest is True
+        """
+        if ship_count is None:
+            ship_count = num_ships
+
+        fleet_key, routes = self._get_fleet_routes(
+            start, end, player, num_ships, safety, allow_shipyard_intercept,
+            route_distance, max_route_distance, allow_join
+        )
+        key = fleet_key + (ship_count, lowest)
+        if key in self._best_routes:
+            return self._best_routes[key]
+
+        board = self._board
+        best_route = None
+        if routes:
+            if lowest:
+                best_route = min(routes, key=lambda route: (route.expected_kore(board, ship_count), len(route)))
+            else:
+                best_route = max(routes, key=lambda route: route.expected_kore(board, ship_count))
+        self._best_routes[key] = best_route
+        return best_route
@@ -9,13 +9,13 @@ if IS_KAGGLE:
     from basic import min_ship_count_for_flight_plan_len
     from board import Shipyard, Player, Launch, BoardRoute, Spawn, AllowMine
     from geometry import Point, Convert, PlanRoute, PlanPath
-    from helpers import find_shortcut_routes, is_safety_route_to_convert, _spawn
+    from helpers import find_best_shortcut_route, is_safety_route_to_convert, _spawn
     from logger import logger
 else:
     from .basic import min_ship_count_for_flight_plan_len
     from .board import Shipyard, Player, Launch, BoardRoute, Spawn, AllowMine
     from .geometry import Point, Convert, PlanRoute, PlanPath
-    from .helpers import find_shortcut_routes, is_safety_route_to_convert, _spawn
+    from .helpers import find_best_shortcut_route, is_safety_route_to_convert, _spawn
     from .logger import logger
 
 class Memory:
@@ -97,17 +97,17 @@ class CoordinatedAttack(State):
             if wait_time <= 0:
                 if sy.available_ship_count < power:
                     logger.info(f"CoordinatedAttack: {sy} has {sy.available_ship_count} ships, but {power} power")
-                routes = find_shortcut_routes(
+                best_route = find_best_shortcut_route(
                     board,
                     sy.point,
                     self.target,
                     agent,
                     num_ships_to_launch,
+                    lowest=True,
                     allow_join=True
                 )
 
-                if routes:
-                    best_route = min(routes, key=lambda route: (route.expected_kore(board, num_ships_to_launch), len(route)))
+                if best_route is not None:
                     logger.info(
                         f"Coordinated attack shipyard {num_ships_to_launch} {sy.point}->{self.target}"
                     )
@@ -222,7 +222,10 @@ class Expansion(State):
 
             target_distance = shipyard.distance_from(target) + 2 * (self.extra_distance)
 
-            routes = []
+            # the shortest routes first, then the ones with more kore at their points,
+            # it is an upper bound of the kore the fleet collects
+            kore_index = board.kore_index
+            plans = []
             for p in board:
                 if p in shipyard_positions:
                     continue
@@ -231,26 +234,38 @@ class Expansion(State):
                 if distance > target_distance:
                     continue
 
-                plans = shipyard.get_plans_through([p, target])
-                rs = [BoardRoute(shipyard.point, plan + PlanRoute([PlanPath(Convert)])) for plan in plans]
-
-                for route in rs:
+                for plan in shipyard.get_plans_through([p, target]):
+                    plan = plan + PlanRoute([PlanPath(Convert)])
                     if shipyard.available_ship_count < min_ship_count_for_flight_plan_len(
-                        len(route.plan.to_str())
+                        len(plan.to_str())
                     ):
                         continue
 
-                    route_points = route.points()
-                    if any(x in shipyard_positions for x in route_points):
-                        continue
+                    max_kore = kore_index.plan_kore(shipyard.point, plan, sy.available_ship_count)
+                    # the prefix sums are not exact
+                    max_kore = max_kore * (1 + 1e-9) + 1e-9
+                    plans.append((plan.num_steps, -max_kore, len(plans), plan))
+            plans.sort()
 
-                    if not is_safety_route_to_convert(route_points, agent, sy.available_ship_count):
-                        continue
+            route, route_kore, route_index = None, None, None
+            for num_steps, neg_max_kore, i, plan in plans:
+                if route is not None and (num_steps > len(route) or -neg_max_kore < route_kore):
+                    break
+
+                new_route = BoardRoute(shipyard.point, plan)
+                route_points = new_route.points()
+                if any(x in shipyard_positions for x in route_points):
+                    continue
+
+                if not is_safety_route_to_convert(route_points, agent, sy.available_ship_count):
+                    continue
 
-                    routes.append(route)
+                # the first of the routes with the same kore, the same as max
+                kore = new_route.expected_kore(board, sy.available_ship_count)
+                if route is None or kore > route_kore or (kore == route_kore and i < route_index):
+                    route, route_kore, route_index = new_route, kore, i
 
-            if routes:
-                route = max(routes, key=lambda route: (-len(route), route.expected_kore(board, sy.available_ship_count)))
+            if route is not None:
                 logger.info(f"Building new sy {sy.point}->{route.end}")
                 sy.action = Launch(sy.available_ship_count, route)
                 self.self_built_sys.add(target)
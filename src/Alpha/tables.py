@@ -0,0 +1,89 @@
+import numpy as np
+
+_TABLES = {}
+
+
+def get_geometry_tables(size: int) -> "GeometryTables":
+    if size not in _TABLES:
+        _TABLES[size] = GeometryTables(size)
+    return _TABLES[size]
+
+
+class GeometryTables:
+    """
+    Distances, neighbourhoods and rays of a toroidal field as arrays,
+    cell = x * size + y.
+
+    Only depends on the size of the field, so it is built once per size.
+    """
+
+    # directions in the order of Action.game_id: North, East, South, West
+    directions = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+    def __init__(self, size: int, max_ray_length: int = 31):
+        self._size = size
+        n = size * size
+        x, y = np.divmod(np.arange(n), size)
+
+        dx = np.abs(x[:, None] - x[None, :])
+        dy = np.abs(y[:, None] - y[None, :])
+        # cell -> cell -> distance
+        self._distances = (np.minimum(dx, size - dx) + np.minimum(dy, size - dy)).astype(np.int8)
+
+        # radius -> (dx, dy) of the cells at the distance from 1 to the radius
+        self._offsets = {}
+
+        # cell -> direction -> step - 1 -> cell
+        steps = np.arange(1, max_ray_length + 1)
+        self._rays = np.stack(
+            [
+                ((x[:, None] + dx * steps) % size) * size + (y[:, None] + dy * steps) % size
+                for dx, dy in self.directions
+            ],
+            axis=1,
+        )
+        # cell -> direction -> the adjacent cell
+        self._adjacent_cells = np.ascontiguousarray(self._rays[:, :, 0])
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def distances(self) -> np.ndarray:
+        return self._distances
+
+    def distance(self, c1: int, c2: int) -> int:
+        return self._distances.item(c1, c2)
+
+    def offsets(self, r: int) -> np.ndarray:
+        """
+        (dx, dy) of the diamond neighbourhood 0 < distance <= r
+        """
+        if r not in self._offsets:
+            d = self._distances[0].reshape(self._size, self._size)
+            x, y = np.nonzero((d > 0) & (d <= r))
+            self._offsets[r] = np.stack([x, y], axis=1)
+        return self._offsets[r]
+
+    def nearby_cells(self, cell: int, r: int) -> np.ndarray:
+        """
+        cells at the distance from 1 to r, in the order of the cell index
+        """
+        size = self._size
+        x, y = divmod(cell, size)
+        offsets = self.offsets(r)
+        cells = ((x + offsets[:, 0]) % size) * size + (y + offsets[:, 1]) % size
+        return np.sort(cells)
+
+    def rays(self) -> np.ndarray:
+        """
+        cell -> direction -> the next cells in the direction
+        """
+        return self._rays
+
+    def adjacent_cells(self) -> np.ndarray:
+        """
+        cell -> direction -> the adjacent cell
+        """
+        return self._adjacent_cells
@@ -0,0 +1,116 @@
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+TIMING_ENABLED = os.environ.get("KORE_TIMING", "") == "1"
+
+
+class _NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _Phase:
+    def __init__(self, timer: "Timer", name: str):
+        self._timer = timer
+        self._name = name
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self._timer.add_time(self._name, time.perf_counter() - self._start)
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class Timer:
+    """
+    Wall time of the agent phases and counters of the hot primitives, per turn.
+
+    Disabled by default, then a phase is a shared no-op context manager
+    and the callers check `timer.enabled` before counting.
+    Set KORE_TIMING=1 or `timer.enabled = True` to turn it on.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._step = 0
+        # step -> phase -> [seconds, calls]
+        self._phases: Dict[int, Dict[str, List[float]]] = defaultdict(dict)
+        # step -> counter -> value
+        self._counters: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def start_turn(self, step: int):
+        if step == 0:
+            self.reset()
+        self._step = step
+
+    def reset(self):
+        self._step = 0
+        self._phases.clear()
+        self._counters.clear()
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def add_time(self, name: str, seconds: float):
+        phases = self._phases[self._step]
+        if name not in phases:
+            phases[name] = [0.0, 0]
+        phases[name][0] += seconds
+        phases[name][1] += 1
+
+    def count(self, name: str, value: int = 1):
+        self._counters[self._step][name] += value
+
+    def records(self) -> List[Dict]:
+        """
+        one row per step and phase or counter, easy to dump and aggregate across games
+        """
+        rows = []
+        for step, phases in sorted(self._phases.items()):
+            for name, (seconds, calls) in phases.items():
+                rows.append({"step": step, "kind": "phase", "name": name, "value": seconds, "calls": calls})
+        for step, counters in sorted(self._counters.items()):
+            for name, value in counters.items():
+                rows.append({"step": step, "kind": "counter", "name": name, "value": value, "calls": 1})
+        return rows
+
+    def table(self) -> str:
+        """
+        per-game totals: phases with total / mean / max turn time, then counters
+        """
+        phase_times = defaultdict(list)
+        for phases in self._phases.values():
+            for name, (seconds, _) in phases.items():
+                phase_times[name].append(seconds)
+        counter_totals = defaultdict(int)
+        for counters in self._counters.values():
+            for name, value in counters.items():
+                counter_totals[name] += value
+
+        lines = [f"{'phase':<28}{'turns':>7}{'total s':>10}{'mean ms':>10}{'max ms':>10}"]
+        for name, times in sorted(phase_times.items(), key=lambda x: -sum(x[1])):
+            total = sum(times)
+            lines.append(
+                f"{name:<28}{len(times):>7}{total:>10.2f}{1000 * total / len(times):>10.1f}{1000 * max(times):>10.1f}"
+            )
+        if counter_totals:
+            lines.append(f"{'counter':<28}{'total':>17}")
+            for name, value in sorted(counter_totals.items()):
+                lines.append(f"{name:<28}{value:>17}")
+        return "\n".join(lines)
+
+
+timer = Timer(enabled=TIMING_ENABLED)
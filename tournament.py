@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+import argparse
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+from worker_pool import run_games
+
+AGENT_A = "Alpha"
+AGENT_B = "Beta"
+# every pair is two games on the same map with the seats swapped
+MAX_PAIRS = 100
+NUM_WORKERS = os.cpu_count()
+# the sequential probability ratio test: elo of AGENT_A over AGENT_B is ELO0 or ELO1,
+# ALPHA is the chance to accept ELO1 when ELO0 is true and BETA the other way around
+ELO0 = 0
+ELO1 = 100
+ALPHA = 0.05
+BETA = 0.05
+# the variance of the pair scores is unknown after a few pairs
+MIN_PAIRS = 5
+MIN_VARIANCE = 1e-3
+
+
+def game_score(rewards, seat):
+    """
+    1 for a win of the player of the seat, 0.5 for a draw, a player without a reward lost
+    """
+    a, b = [-math.inf if x is None else x for x in (rewards[seat], rewards[1 - seat])]
+    if a == b:
+        return 0.5
+    return float(a > b)
+
+
+def format_reward(reward):
+    """
+    the agents that failed to act have no reward
+    """
+    return "-" if reward is None else f"{reward:.0f}"
+
+
+def game_result(spec, game):
+    return {"rewards": game.rewards, "statuses": game.statuses, "score": game_score(game.rewards, spec["seat"])}
+
+
+def game_specs(agent_a, agent_b, max_pairs, seed):
+    """
+    seat is the one of agent a
+    """
+    for pair in range(max_pairs):
+        for seat in range(2):
+            yield {
+                "agents": [agent_a, agent_b] if seat == 0 else [agent_b, agent_a],
+                "configuration": {"randomSeed": seed + pair},
+                "pair": pair,
+                "seat": seat,
+            }
+
+
+def elo_to_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    score = min(max(score, 1e-3), 1 - 1e-3)
+    return 400 * math.log10(score / (1 - score))
+
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def sprt_llr(pair_scores, elo0, elo1):
+    """
+    the log likelihood ratio of ELO1 against ELO0 for the mean scores of the pairs,
+    the generalized SPRT with the normal approximation of the pair scores
+    """
+    n = len(pair_scores)
+    if n < 2:
+        return 0.0
+    s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+    mean = np.mean(pair_scores)
+    variance = max(np.var(pair_scores, ddof=1), MIN_VARIANCE)
+    return n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+
+
+def elo_interval(pair_scores):
+    """
+    elo of agent a and the 95% confidence interval
+    """
+    n = len(pair_scores)
+    mean = np.mean(pair_scores)
+    error = 1.96 * math.sqrt(np.var(pair_scores, ddof=1) / n) if n > 1 else 0.5
+    return score_to_elo(mean), score_to_elo(mean - error), score_to_elo(mean + error)
+
+
+def run(agent_a, agent_b, max_pairs, num_workers, elo0, elo1, alpha, beta, seed):
+    """
+    plays the pairs of games in parallel and stops as soon as the test is decided
+    """
+    lower, upper = sprt_bounds(alpha, beta)
+    print(f"{agent_a} vs {agent_b}: elo {elo0} or {elo1}, llr bounds [{lower:.2f}, {upper:.2f}], seed {seed}")
+
+    # pair -> seat -> score
+    games = {}
+    pair_scores = []
+    errors = 0
+    verdict = None
+    llr = 0.0
+    t = time.perf_counter()
+    outcomes = run_games(game_specs(agent_a, agent_b, max_pairs, seed), game_result, num_workers)
+    try:
+        for outcome in outcomes:
+            pair, seat = outcome["spec"]["pair"], outcome["spec"]["seat"]
+            if outcome["error"] is not None:
+                # a game that raised is lost by the agent that failed, by agent a if it is not known
+                errors += 1
+                score = float(outcome["failed_seat"] not in (None, seat))
+                what = "Win" if score else "Lost"
+                print(f"Game of pair {pair} seat {seat} failed, counted as {what}:\n{outcome['error']}")
+            else:
+                result = outcome["result"]
+                score = result["score"]
+                what = {1: "Win", 0.5: "Draw", 0: "Lost"}[score]
+                a, b = result["rewards"][seat], result["rewards"][1 - seat]
+                print(
+                    f"Pair #{pair} seat {seat}: {what} with score {format_reward(a)} vs {format_reward(b)} "
+                    f"({' '.join(result['statuses'])}, {outcome['seconds']:.0f}s)"
+                )
+
+            games.setdefault(pair, {})[seat] = score
+            if len(games[pair]) < 2:
+                continue
+            pair_scores.append(sum(games[pair].values()) / 2)
+
+            llr = sprt_llr(pair_scores, elo0, elo1)
+            elo, elo_low, elo_high = elo_interval(pair_scores)
+            print(
+                f"{len(pair_scores)} pairs: score {np.mean(pair_scores):.3f}, "
+                f"elo {elo:.0f} [{elo_low:.0f}, {elo_high:.0f}], llr {llr:.2f}"
+            )
+            if len(pair_scores) >= MIN_PAIRS:
+                if llr >= upper:
+                    verdict = f"elo {elo1}"
+                elif llr <= lower:
+                    verdict = f"elo {elo0}"
+            if verdict:
+                break
+    finally:
+        # the games that are still running are dropped
+        outcomes.close()
+
+    if not pair_scores:
+        print(f"No pairs finished, {errors} games failed")
+        return
+
+    elo, elo_low, elo_high = elo_interval(pair_scores)
+    print(
+        f"{verdict or 'Undecided'} after {len(pair_scores)} pairs in {time.perf_counter() - t:.0f}s: "
+        f"score {np.mean(pair_scores):.3f}, elo {elo:.0f} [{elo_low:.0f}, {elo_high:.0f}], "
+        f"llr {llr:.2f}, {errors} failed games"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Plays pairs of games with swapped seats until a sequential probability ratio test is decided."
+    )
+    parser.add_argument("--a", default=AGENT_A, choices=["Alpha", "Beta", "KoreBeta", "Miner"])
+    parser.add_argument("--b", default=AGENT_B, choices=["Alpha", "Beta", "KoreBeta", "Miner"])
+    parser.add_argument("--pairs", type=int, default=MAX_PAIRS)
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS)
+    parser.add_argument("--elo0", type=float, default=ELO0)
+    parser.add_argument("--elo1", type=float, default=ELO1)
+    parser.add_argument("--alpha", type=float, default=ALPHA)
+    parser.add_argument("--beta", type=float, default=BETA)
+    parser.add_argument("--seed", type=int, default=None, help="the map seed of the first pair")
+    args = parser.parse_args()
+
+    seed = random.randrange(1 << 30) if args.seed is None else args.seed
+    run(args.a, args.b, args.pairs, args.workers, args.elo0, args.elo1, args.alpha, args.beta, seed)
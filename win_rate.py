@@ -1,53 +1,118 @@
-from kaggle_environments import make
-from tqdm.contrib.concurrent import process_map
+from tqdm import tqdm
 import numpy as np
 from datetime import datetime
+import glob
+import hashlib
+import json
+import os
+import random
+import shutil
 import traceback
 
-from src.Alpha.multi import make_agent as Alpha
-from src.Beta.multi import make_agent as Beta
-from src.KoreBeta.main import agent as KoreBeta
-from src.Miner.main import agent as Miner
+from engine import render_html
+from worker_pool import run_games
 
-# agenta, agentb = Alpha, Beta
+import src.Alpha.logger as alpha_logger
+
+# the logs of the games are not needed, only the last turns are kept in case of an error,
+# every worker has its own log file and a dumped log is saved next to the replay
+alpha_logger.MODE = alpha_logger.RING
+alpha_logger.FILE = "games/game_{pid}.log"
+
+# the packages of the agents in src, e.g. Alpha, Beta, KoreBeta or Miner
+agent_names = ("Alpha", "Beta")
 
 No_games_to_run = 50
 show_result_per_game = True
 
-def runs(i):
-    env = make("kore_fleets")
-    agenta = Alpha()
-    agentb = Beta()
-    env.run([agenta, agentb])
+# a line per game is appended as soon as it finishes
+results_file = "games/results.jsonl"
+# the replays of the lost games and of the errors are saved, and this fraction of the others
+save_replay_fraction = 0.05
+# the replays are saved as compact json, and also as html if this is set
+save_html = False
+
 
-    now = datetime.now()
-    file_name = now.strftime(f"games/game{i}_%m-%d_%H:%M:%S.html")
-    game_out = env.render(mode="html")
-    with open(file_name, "w") as f:
-        f.write(game_out)
+def agent_version(name):
+    """
+    hash of the source files of the agent, it changes with any edit, committed or not
+    """
+    h = hashlib.sha1()
+    for file_name in sorted(glob.glob(f"src/{name}/*.py")):
+        with open(file_name, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:10]
 
-    rewards = [x["reward"] for x in env.steps[-1]]
+
+def runs(spec, game):
+    i = spec["game"]
+    rewards = game.rewards
     scores1, scores2 = rewards[0], rewards[1]
 
+    error = None
     if scores2 == None:
         wins = True
-        raise Exception(f"Error for P2: No rewards in game no. {i}")
+        error = f"Error for P2: No rewards in game no. {i}"
     elif scores1 == None:
         wins = False
-        raise Exception(f"Error for P1: No rewards in game no. {i}")
+        error = f"Error for P1: No rewards in game no. {i}"
     else:
         wins = scores1 > scores2
 
-    if show_result_per_game:
-        what = 'Win' if wins==1 else 'Lost'
-        print(f'Game no. #{i} : {what} with score {scores1:.0f} vs {scores2:.0f}')
+    replay = None
+    if error or not wins or random.random() < save_replay_fraction:
+        replay = datetime.now().strftime(f"games/game{i}_%m-%d_%H:%M:%S")
+        with open(f"{replay}.json", "w") as f:
+            json.dump(game.toJSON(), f, separators=(",", ":"))
+        if save_html:
+            with open(f"{replay}.html", "w") as f:
+                f.write(render_html(game))
+        log_file = alpha_logger.log_file()
+        if os.path.exists(log_file) and os.path.getsize(log_file):
+            shutil.copyfile(log_file, f"{replay}.log")
 
-    return scores1, scores2, wins
+    return {
+        "scores": rewards,
+        "statuses": game.statuses,
+        "winner": None if error else int(not wins),
+        "error": error,
+        "steps": len(game.steps) - 1,
+        # agent -> turn -> ms
+        "turn_ms": [[None if x[j] is None else round(1000 * x[j], 1) for x in game.durations] for j in range(2)],
+        "replay": replay,
+    }
 
 
 if __name__ == '__main__':
-    env = make("kore_fleets", debug=True)
-    print(env.name, env.version)
+    os.makedirs(os.path.dirname(results_file), exist_ok=True)
+    versions = [agent_version(x) for x in agent_names]
+    specs = ({"agents": agent_names, "game": i} for i in range(No_games_to_run))
+
+    results = []
+    with open(results_file, "a") as sink:
+        # the workers keep the agents for all their games, the logs are kept in the ring buffer
+        for outcome in tqdm(run_games(specs, runs, logging_enabled=True), total=No_games_to_run):
+            result = {
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "game": outcome["spec"]["game"],
+                # by seat, the scores and the winner are in this order
+                "agents": agent_names,
+                "versions": versions,
+                "seconds": round(outcome["seconds"], 1),
+                **(outcome["result"] or {"error": outcome["error"]}),
+            }
+            sink.write(json.dumps(result) + "\n")
+            sink.flush()
+
+            if result["error"]:
+                tqdm.write(result["error"])
+                continue
+            results.append(result)
+            if show_result_per_game:
+                scores1, scores2 = result["scores"]
+                what = 'Win' if result["winner"] == 0 else 'Lost'
+                tqdm.write(f'Game no. #{result["game"]} : {what} with score {scores1:.0f} vs {scores2:.0f}')
 
-    results = process_map(runs, range(No_games_to_run))
-    print(f' Win rate {100*np.array(results)[:,2].sum()/No_games_to_run}% with mean score {np.array(results)[:,0].mean():.0f} vs {np.array(results)[:,1].mean():.0f} ')
+    wins = np.array([x["winner"] == 0 for x in results])
+    scores = np.array([x["scores"] for x in results])
+    print(f' Win rate {100*wins.mean()}% with mean score {scores[:,0].mean():.0f} vs {scores[:,1].mean():.0f} ({No_games_to_run - len(results)} errors)')
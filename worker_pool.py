@@ -0,0 +1,113 @@
+import importlib
+import multiprocessing
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from engine import DEFAULT_CONFIGURATION, KoreEngine
+
+# the state of a worker process, kept for all the games it plays
+_LOGGING_ENABLED = True
+# seat, agent name -> agent
+_AGENTS: Dict[tuple, "PooledAgent"] = {}
+_ENGINE: Optional[KoreEngine] = None
+
+
+class PooledAgent:
+    """
+    The agent of src/<name>, imported once and reset before every game.
+
+    The agents of multi.py with a reset hook keep their closure and the caches of their modules,
+    the others are made again, main.py keeps the state in globals so it is reloaded.
+    """
+
+    def __init__(self, name: str, logging_enabled: bool = True):
+        self.name = name
+        package = f"src.{name}"
+        if not logging_enabled:
+            try:
+                importlib.import_module(f"{package}.logger").LOGGING_ENABLED = False
+            except ModuleNotFoundError:
+                pass
+
+        try:
+            self._make_agent = importlib.import_module(f"{package}.multi").make_agent
+            self._module = None
+        except ModuleNotFoundError:
+            self._make_agent = None
+            self._module = importlib.import_module(f"{package}.main")
+        self.agent = None
+
+    def reset(self) -> Callable:
+        reset = getattr(self.agent, "reset", None)
+        if reset is not None:
+            reset()
+        elif self._make_agent is not None:
+            self.agent = self._make_agent()
+        else:
+            self.agent = importlib.reload(self._module).agent
+        return self.agent
+
+
+def _init_worker(logging_enabled: bool):
+    global _LOGGING_ENABLED
+    _LOGGING_ENABLED = logging_enabled
+
+
+def _get_engine(configuration: Dict[str, Any], num_agents: int) -> KoreEngine:
+    """
+    the engine of the worker on a new map, it is made again only if the configuration changes
+    """
+    global _ENGINE
+    configuration = {**DEFAULT_CONFIGURATION, **configuration}
+    random_seed = configuration.pop("randomSeed", None)
+    if _ENGINE is None or {k: v for k, v in _ENGINE.configuration.items() if k != "randomSeed"} != configuration:
+        _ENGINE = KoreEngine(configuration, num_agents)
+    _ENGINE.reset(num_agents, random_seed)
+    return _ENGINE
+
+
+def _play(task) -> Dict[str, Any]:
+    finish, spec = task
+    names = spec["agents"]
+    outcome = {"spec": spec, "result": None, "error": None, "failed_seat": None}
+
+    t = time.perf_counter()
+    try:
+        agents = []
+        for seat, name in enumerate(names):
+            key = seat, name
+            outcome["failed_seat"] = seat
+            if key not in _AGENTS:
+                _AGENTS[key] = PooledAgent(name, _LOGGING_ENABLED)
+            agents.append(_AGENTS[key].reset())
+        outcome["failed_seat"] = None
+
+        engine = _get_engine(spec.get("configuration", {}), len(names))
+        engine.run(agents)
+        outcome["seconds"] = time.perf_counter() - t
+        outcome["result"] = finish(spec, engine)
+    except BaseException:
+        outcome["error"] = traceback.format_exc()
+    outcome.setdefault("seconds", time.perf_counter() - t)
+    return outcome
+
+
+def run_games(
+    specs: Iterable[Dict[str, Any]],
+    finish: Callable[[Dict[str, Any], KoreEngine], Any],
+    num_workers: Optional[int] = None,
+    logging_enabled: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    plays the games on a pool of worker processes, each worker takes the next spec from the queue of the pool,
+    a spec has the names of the agents by seat and optionally the configuration of the game.
+    The workers import the agents once and keep them, the engine and the geometry caches for all their games.
+
+    finish(spec, engine) runs in the worker after the game and returns what is sent back,
+    yields {"spec", "result", "error", "failed_seat", "seconds"} as the games finish,
+    failed_seat is the seat whose agent could not be loaded if that is why the game failed,
+    the pool is terminated when the generator is closed
+    """
+    with multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=(logging_enabled,)) as pool:
+        yield from pool.imap_unordered(_play, ((finish, spec) for spec in specs))